@@ -4,5 +4,6 @@ from . import views
 urlpatterns = [
     path("season", views.WineRegionSeasonAnalysisView.as_view()),
     path("viability", views.WineRegionViabilityAnalysisView.as_view()),
-    path("compare_performance", views.WineRegionPerformanceComparisonView.as_view())
+    path("compare_performance", views.WineRegionPerformanceComparisonView.as_view()),
+    path("summary", views.WineRegionSummaryView.as_view())
 ]
\ No newline at end of file
@@ -1,7 +1,8 @@
 # In api/views.py
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from main.lib.climate_analyzation import analyze_seasonal_suitability, analyze_longterm_viability, analyze_historical_performance
+from main.lib.climate_analyzation import analyze_seasonal_suitability_batch, analyze_longterm_viability_batch, analyze_historical_performance_batch, SUMMARY_FIELDS
+from main.lib.analysis_snapshots import snapshot_analysis, snapshot_summary
 from main.models import Region
 
 class WineRegionSeasonAnalysisView(APIView):
@@ -21,15 +22,19 @@ class WineRegionSeasonAnalysisView(APIView):
             regions = Region.objects.filter(name__in=regions_query)
         else:
             regions = Region.objects.all()
+        regions = regions.select_related('analysis_snapshot')
 
         if len(regions) == 0:
             return Response({"message": "No regions found."}, status=404)
 
+        # Serve precomputed results, analyzing regions without a fresh snapshot together
+        seasons = snapshot_analysis('best_growing_season', 'season', regions, analyze_seasonal_suitability_batch)
+
         results = []
         for region in regions:
             results.append({
                 "name": region.name,
-                "best_growing_season": analyze_seasonal_suitability(region)
+                "best_growing_season": seasons[region.id]
                 })
         return Response(results)
     
@@ -49,15 +54,19 @@ class WineRegionViabilityAnalysisView(APIView):
             regions = Region.objects.filter(name__in=regions_query)
         else:
             regions = Region.objects.all()
+        regions = regions.select_related('analysis_snapshot')
 
         if len(regions) == 0:
             return Response({"message": "No regions found."}, status=404)
 
+        # Serve precomputed results, analyzing regions without a fresh snapshot together
+        viability = snapshot_analysis('longterm_viability', 'viability', regions, analyze_longterm_viability_batch)
+
         results = []
         for region in regions:
             results.append({
                 "name": region.name,
-                "longterm_viability": analyze_longterm_viability(region)
+                "longterm_viability": viability[region.id]
                 })
         return Response(results)
     
@@ -80,15 +89,19 @@ class WineRegionPerformanceComparisonView(APIView):
             regions = Region.objects.filter(name__in=regions_query)
         else:
             regions = Region.objects.all()
+        regions = regions.select_related('analysis_snapshot')
 
         if len(regions) == 0:
             return Response({"message": "No regions found."}, status=404)
         
+        # Serve precomputed results, analyzing regions without a fresh snapshot together
+        performance = snapshot_analysis('avg_historical_performance', 'performance', regions, analyze_historical_performance_batch)
+
         results = []
         for region in regions:
             results.append({
                 "name": region.name,
-                "avg_historical_performance": analyze_historical_performance(region)
+                "avg_historical_performance": performance[region.id]
                 })
             
         results = sorted(results, key=lambda x: x['avg_historical_performance'], reverse=True)
@@ -100,4 +113,46 @@ class WineRegionPerformanceComparisonView(APIView):
         if only and only.lower() == 'worst':
             results = results[-1]
         
-        return Response(data=results, status=200)
\ No newline at end of file
+        return Response(data=results, status=200)
+
+class WineRegionSummaryView(APIView):
+    def get(self, request):
+        """
+        GET request used for fetching all analysis metrics of Regions in one call.
+
+        Supports multiple regions by repeating the 'region' parameter:
+        /api/analysis/summary?region=Region1&region=Region2
+
+        Metrics can be limited with the 'fields' parameter, comma separated or repeated:
+        /api/analysis/summary?fields=longterm_viability,avg_historical_performance
+
+        If no regions are provided, all regions will be summarized. If no fields are provided, all metrics are returned.
+        """
+        # Get requested fields, keeping the order of SUMMARY_FIELDS so equal requests share cache entries
+        fields_query = [field.strip() for value in request.query_params.getlist('fields') for field in value.split(',') if field.strip()]
+        invalid_fields = [field for field in fields_query if field not in SUMMARY_FIELDS]
+        if invalid_fields:
+            return Response({"message": f"Invalid fields: {', '.join(invalid_fields)}. Valid fields are: {', '.join(SUMMARY_FIELDS)}."}, status=400)
+        fields = [field for field in SUMMARY_FIELDS if field in fields_query] if fields_query else list(SUMMARY_FIELDS)
+
+        # Get regions from query params, if none are provided, get all regions
+        regions_query = request.query_params.getlist('region')
+        if regions_query:
+            regions = Region.objects.filter(name__in=regions_query)
+        else:
+            regions = Region.objects.all()
+        regions = regions.select_related('analysis_snapshot')
+
+        if len(regions) == 0:
+            return Response({"message": "No regions found."}, status=404)
+
+        # Serve precomputed results, analyzing regions without a fresh snapshot together in one pass
+        summaries = snapshot_summary(regions, fields)
+
+        results = []
+        for region in regions:
+            results.append({
+                "name": region.name,
+                **summaries[region.id]
+                })
+        return Response(results)
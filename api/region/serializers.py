@@ -1,7 +1,21 @@
 from rest_framework import serializers
 
 class RegionSerializer(serializers.Serializer):
-    name = serializers.CharField()
-    latitude = serializers.FloatField()
-    longitude = serializers.FloatField()
-    description = serializers.CharField(required=False)
\ No newline at end of file
+    name = serializers.CharField(max_length=255)
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+class OnboardingJobSerializer(serializers.Serializer):
+    job_id = serializers.UUIDField(source='id')
+    region = serializers.CharField(source='region_name')
+    status = serializers.CharField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    days_loaded = serializers.IntegerField()
+    days_total = serializers.IntegerField()
+    progress = serializers.FloatField()
+    readings_loaded = serializers.IntegerField()
+    error = serializers.CharField(allow_null=True)
+    created_at = serializers.DateTimeField()
+    finished_at = serializers.DateTimeField(allow_null=True)
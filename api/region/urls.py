@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path("", views.RegionView.as_view()),
+    path("bulk/", views.RegionBulkImportView.as_view()),
+    path("jobs/<uuid:job_id>/", views.OnboardingJobView.as_view()),
 ]
\ No newline at end of file
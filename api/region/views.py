@@ -1,11 +1,31 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from main.models import Region
-from django.db import IntegrityError
-from .serializers import RegionSerializer
-from main.lib.open_meteo import ClimateDataProvider
+from main.models import Region, OnboardingJob
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from functools import partial
+from .serializers import RegionSerializer, OnboardingJobSerializer
 from datetime import date, timedelta
-from main.lib.climate_data_functions import process_climate_data, create_climate_readings
+from main.lib.climate_data_functions import default_start_date
+from main.lib.region_import import validate_regions, create_regions
+from config.tasks import onboard_region, start_ingestion_run
+
+def _queue_onboarding(job: OnboardingJob):
+    """
+    Queue the OnboardingJob of a new Region, failing the job and deleting the Region if it cannot be queued
+
+    Parameters:
+        job (OnboardingJob): The committed job, its status is updated in place.
+    """
+    try:
+        onboard_region.delay(str(job.id))
+    except Exception as error:
+        # Without a queued job the Region would never get its climate data
+        job.status = 'failed'
+        job.error = f"Could not queue the job: {type(error).__name__}: {error}"
+        job.finished_at = timezone.now()
+        job.save()
+        job.region.delete()
 
 # None of these API endpoints are entirely required but I have added them for the sake of completeness.
 
@@ -29,7 +49,8 @@ class RegionView(APIView):
     def post(self, request):
         """
         POST request used for creating new Region entry.
-        This also fetches and processes climate data for the Region.
+        The climate data of the Region is loaded in the background, the response holds the id of the
+        OnboardingJob whose progress is reported by the job status endpoint.
         """
         data = request.data.copy()
 
@@ -42,27 +63,32 @@ class RegionView(APIView):
             return Response({"message": "Missing required fields."}, status=400)
 
         try:
-            # Create new Region entry.
-            region = Region.objects.create(
-                name=name,
-                latitude=latitude,
-                longitude=longitude,
-                description=description
-            )
-
-            provider =  ClimateDataProvider()
-            today = date.today()
-            start_date = date(today.year - 1, today.month, today.day)
-            end_date = date.today() - timedelta(days=1)
-            climate_data = provider.get_climate_data(latitude, longitude, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
-
-            reading_objects =  process_climate_data(region, climate_data[f"{latitude},{longitude}"])
-            create_climate_readings(reading_objects)
+            # Create the Region and its job together, the job is only queued once both are committed
+            with transaction.atomic():
+                # Create new Region entry.
+                region = Region.objects.create(
+                    name=name,
+                    latitude=latitude,
+                    longitude=longitude,
+                    description=description
+                )
+
+                # Hand the fetching and loading of the climate data to a worker
+                job = OnboardingJob.objects.create(
+                    region=region,
+                    region_name=region.name,
+                    start_date=default_start_date(),
+                    end_date=date.today() - timedelta(days=1)
+                )
+                transaction.on_commit(partial(_queue_onboarding, job))
 
         except IntegrityError:
             return Response({"message": "Region with this name or exact latitude and longitude already exists."}, status=400)
 
-        return Response(status=200)
+        if job.status == 'failed':
+            return Response({"message": "The climate data of the Region could not be scheduled, try again later.", "job_id": str(job.id)}, status=503)
+
+        return Response(data={"job_id": str(job.id), "status_url": f"/api/region/jobs/{job.id}/"}, status=202)
 
     def delete(self, request):
         """
@@ -81,4 +107,43 @@ class RegionView(APIView):
             region.delete()
             return Response(status=200)
         except Region.DoesNotExist:
-            return Response({"message": "Region with this name does not exist."}, status=404)
\ No newline at end of file
+            return Response({"message": "Region with this name does not exist."}, status=404)
+
+class RegionBulkImportView(APIView):
+    def post(self, request):
+        """
+        POST request used for creating many Region entries at once.
+
+        Accepts a list of Regions, or an object with a 'regions' list. Nothing is created unless every Region is valid.
+        The climate data of the new Regions is then loaded in the background, in batched requests.
+        """
+        rows = request.data.get('regions') if isinstance(request.data, dict) else request.data
+
+        if not isinstance(rows, list) or not rows:
+            return Response({"message": "A list of regions is required."}, status=400)
+
+        regions, errors = validate_regions(rows)
+        if errors:
+            return Response({"message": f"{len(errors)} of {len(rows)} regions are invalid.", "errors": errors}, status=400)
+
+        regions = create_regions(regions)
+
+        # New Regions have no readings, so they share a single fetch window
+        run = start_ingestion_run({default_start_date(): regions}, date.today() - timedelta(days=1))
+
+        return Response(data={"created": len(regions), "ingestion_run_id": run.id}, status=202)
+
+
+class OnboardingJobView(APIView):
+    def get(self, request, job_id):
+        """
+        GET request used for fetching the status and progress of the climate data loading of a new Region.
+        """
+        try:
+            job = OnboardingJob.objects.get(pk=job_id)
+        except OnboardingJob.DoesNotExist:
+            return Response({"message": "Job with this id does not exist."}, status=404)
+
+        _serializer = OnboardingJobSerializer(job)
+
+        return Response(data=_serializer.data, status=200)
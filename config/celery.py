@@ -24,6 +24,10 @@ app.conf.beat_schedule = {
         'task': 'config.tasks.fetch_data',  # Adjust to your actual app and task
         'schedule': crontab(minute=1, hour=0), # Fetch new data just after midnight to get full data for previous day
     },
+    'maintain_climate_partitions_task': {
+        'task': 'config.tasks.maintain_climate_partitions',
+        'schedule': crontab(minute=0, hour=12, day_of_month=1), # Monthly, partitions are created years ahead
+    },
 }
 
 # Execute task on worker startup
@@ -1,4 +1,6 @@
 import os
+import sys
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -91,6 +93,79 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# Analysis results are cached in Redis, keyed by each Region's data watermark (see main.lib.analysis_cache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL', 'redis://redis:6379/1'),
+        'TIMEOUT': int(os.getenv('ANALYSIS_CACHE_TTL', 60 * 60 * 24)),
+        'KEY_PREFIX': 'wine_region_evaluator',
+    },
+    # Open-Meteo responses shared by every container, stored as one tile per location, variable set and year
+    # (see main.lib.open_meteo). Tiles are kept in a directory shared by the containers, as years of tiles for every
+    # Region would evict the analysis results and Celery chord state from the main Redis. Set CLIMATE_TILE_CACHE_URL
+    # to keep them in a Redis instance of their own instead, with its own maxmemory and an allkeys-lru policy.
+    'climate_tiles': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CLIMATE_TILE_CACHE_URL'),
+        'TIMEOUT': int(os.getenv('CLIMATE_TILE_CACHE_TTL', 60 * 60 * 24 * 30)),
+        'KEY_PREFIX': 'wine_region_evaluator',
+    } if os.getenv('CLIMATE_TILE_CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CLIMATE_TILE_CACHE_DIR', str(BASE_DIR / '.climate_tiles')),
+        'TIMEOUT': int(os.getenv('CLIMATE_TILE_CACHE_TTL', 60 * 60 * 24 * 30)),
+        # One tile per Region and year, the default of 300 entries would cull tiles still in use
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CLIMATE_TILE_CACHE_MAX_ENTRIES', 100000))},
+    },
+}
+
+# Memory-mapped columnar cache of daily climate series shared by all worker processes (see main.lib.series_cache).
+# Set to an empty string to disable.
+CLIMATE_SERIES_CACHE_DIR = os.getenv('CLIMATE_SERIES_CACHE_DIR', str(BASE_DIR / '.series_cache'))
+
+# Tests write series and tiles of their own Regions, keep them out of the shared caches
+if 'test' in sys.argv[1:2]:
+    CLIMATE_SERIES_CACHE_DIR = tempfile.mkdtemp(prefix='series_cache_')
+    CACHES['climate_tiles'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='climate_tiles_'),
+    }
+
+# Maximum number of locations sent to the Open-Meteo climate API in one request (see main.lib.open_meteo).
+OPEN_METEO_BATCH_SIZE = int(os.getenv('OPEN_METEO_BATCH_SIZE', '50'))
+
+# Maximum number of concurrent requests to the Open-Meteo climate API, 1 fetches batches one after another.
+OPEN_METEO_WORKERS = int(os.getenv('OPEN_METEO_WORKERS', '4'))
+
+# Maximum number of Regions fetched and loaded by one ingestion task (see config.tasks.fetch_data).
+INGESTION_CHUNK_SIZE = int(os.getenv('INGESTION_CHUNK_SIZE', OPEN_METEO_BATCH_SIZE))
+
+# Memory an ingestion task may use for climate data, chunks are fetched and loaded in date spans that fit in it (see main.lib.ingestion).
+INGESTION_MEMORY_BUDGET_MB = int(os.getenv('INGESTION_MEMORY_BUDGET_MB', '256'))
+
+# Weighted calls per minute allowed to the Open-Meteo API, kept just under the free quota of 600.
+# The limiter state is shared by all workers through Redis, set RATE_LIMIT_REDIS_URL to an empty string to keep it per process.
+OPEN_METEO_RATE_LIMIT = float(os.getenv('OPEN_METEO_RATE_LIMIT', '500'))
+# Weighted calls per clock hour and per day, kept under the free quotas of 5000 and 10000. Set to 0 to disable either quota.
+OPEN_METEO_HOURLY_LIMIT = float(os.getenv('OPEN_METEO_HOURLY_LIMIT', '4500'))
+OPEN_METEO_DAILY_LIMIT = float(os.getenv('OPEN_METEO_DAILY_LIMIT', '9000'))
+# Longest a request waits for the limiter (seconds). Longer waits, such as for the next quota window, raise so Celery tasks
+# retry once the wait is over instead of blocking a worker. Set to 0 to always wait.
+OPEN_METEO_MAX_WAIT = float(os.getenv('OPEN_METEO_MAX_WAIT', '60'))
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://redis:6379/2')
+
+# How the climate provider answers requests: 'live' (the API), 'record' (the API, saving each response body in
+# OPEN_METEO_RECORDINGS_DIR), 'replay' (saved responses only) or 'synthetic' (saved responses, generated data for the rest).
+# Replay and synthetic responses are delayed by OPEN_METEO_REPLAY_LATENCY seconds, to benchmark ingestion without network access.
+OPEN_METEO_MODE = os.getenv('OPEN_METEO_MODE', 'live')
+OPEN_METEO_RECORDINGS_DIR = os.getenv('OPEN_METEO_RECORDINGS_DIR', str(BASE_DIR / '.climate_recordings'))
+OPEN_METEO_REPLAY_LATENCY = float(os.getenv('OPEN_METEO_REPLAY_LATENCY', '0'))
+
+# On PostgreSQL climate readings are partitioned by year (see main.lib.partitions). Partitions are created this many years
+# ahead, and years older than CLIMATE_READING_RETENTION_YEARS (including the current one) are detached, unset to keep every year.
+CLIMATE_PARTITION_YEARS_AHEAD = int(os.getenv('CLIMATE_PARTITION_YEARS_AHEAD', '2'))
+CLIMATE_READING_RETENTION_YEARS = int(os.getenv('CLIMATE_READING_RETENTION_YEARS')) if os.getenv('CLIMATE_READING_RETENTION_YEARS') else None
+
 CELERY_BROKER_URL = "redis://redis:6379"
 CELERY_RESULT_BACKEND = "redis://redis:6379"
 
@@ -1,41 +1,227 @@
-from celery import shared_task
-from main.lib.open_meteo import ClimateDataProvider
+from celery import shared_task, chord
+from django.conf import settings
+from django.utils import timezone
 from datetime import date, timedelta
 
-from main.lib.climate_data_functions import get_all_region_coordinates, process_climate_data, determine_start_date, create_climate_readings
+from main.lib.climate_data_functions import plan_fetch_windows
+from main.lib.ingestion import ingest_regions, max_chunk_regions
+from main.lib.analysis_snapshots import compute_snapshots
+from main.lib.partitions import maintain_partitions
+from main.lib.rate_limiter import RateLimitExceeded
+from main.models import Region, IngestionRun, OnboardingJob
+from typing import Any, Dict, List
 
 @shared_task
 def fetch_data():
     """Main task to fetch and process climate data
 
-    This task fetches climate data for all Regions and processes it.
-    NOTE: Always fetches data from yesterday to ensure completeness.
+    Plans the climate data each Region is missing and fans the work out as chunk tasks, which stream
+    a batch of Regions sharing a fetch window into the database in bounded date spans and can run on
+    any worker with their own retries.
+    A chord callback records the run statistics once every chunk has finished.
+    NOTE: Always fetches data up to yesterday to ensure completeness.
     """
     
-    # Get Region data
-    latitudes, longitudes, region_lookup, regions = get_all_region_coordinates()
-
+    # Plan the dates each Region is missing
+    regions = Region.objects.all()
     yesterday = date.today() - timedelta(days=1)
-    from_date = determine_start_date(regions)
+    windows = plan_fetch_windows(regions, yesterday)
 
-    if from_date >= yesterday:
+    if not windows:
+        # Analysis periods end today, so snapshots are still refreshed daily
+        precompute_analysis.delay()
         return "No new data to fetch"
     
-    # Fetch climate data
-    provider = ClimateDataProvider()
-    climate_data = provider.get_climate_data(
-        latitude=latitudes,
-        longitude=longitudes,
-        start_date=determine_start_date(regions).strftime("%Y-%m-%d"),
-        end_date=yesterday.strftime("%Y-%m-%d")
-    )
-    
-    # Process each Region's data
-    reading_objects = []
-    for coord_key, df in climate_data.items():
-        region = region_lookup[coord_key]
-        reading_objects.extend(process_climate_data(region, df))
-
-    create_climate_readings(reading_objects)
-        
-    return "Data processing complete"
\ No newline at end of file
+    run = start_ingestion_run(windows, yesterday)
+
+    return f"Started ingestion run {run.id} with {run.chunk_count} chunks"
+
+def start_ingestion_run(windows: Dict[date, List[Region]], end_date: date) -> IngestionRun:
+    """Fan the planned fetch windows of Regions out as chunk tasks, recorded as one IngestionRun
+
+    Parameters:
+        windows (Dict[date, List[Region]]): Regions keyed by the start date of their fetch window, as returned by plan_fetch_windows
+        end_date (date): The last date to fetch
+
+    Returns:
+        The IngestionRun, finalized by a chord callback once every chunk has finished
+    """
+    # Split each window into chunks of Regions fetched in a single batched request, small enough
+    # that at least one day (one year with the tile cache) of every Region in a chunk fits in the ingestion memory budget
+    chunk_size = min(settings.INGESTION_CHUNK_SIZE, max_chunk_regions())
+    chunks = [
+        ([region.id for region in window_regions[i:i + chunk_size]], start_date)
+        for start_date, window_regions in windows.items()
+        for i in range(0, len(window_regions), chunk_size)
+    ]
+
+    run = IngestionRun.objects.create(chunk_count=len(chunks))
+    chord(
+        fetch_region_chunk.s(region_ids, start_date.isoformat(), end_date.isoformat())
+        for region_ids, start_date in chunks
+    )(finalize_ingestion.s(run.id))
+
+    return run
+
+@shared_task(bind=True, max_retries=3)
+def fetch_region_chunk(self, region_ids: List[int], start_date: str, end_date: str, loaded: Dict[str, float] = None) -> Dict[str, Any]:
+    """Fetch and load the climate data of a chunk of Regions
+
+    The chunk is streamed one date span at a time within the ingestion memory budget, committing each span.
+    Failed chunks are retried with an exponential backoff, resuming from the span that failed. Once out of
+    retries the error is returned instead of raised, so the chord callback still records the run.
+
+    Parameters:
+        region_ids (List[int]): Ids of the Regions in the chunk
+        start_date (str): Start date in YYYY-MM-DD format
+        end_date (str): End date in YYYY-MM-DD format
+        loaded (Dict[str, float]): Statistics of the spans loaded before a retry (optional)
+
+    Returns:
+        Dict: Statistics of the chunk, with 'region_ids', 'readings', 'fetch_seconds', 'load_seconds' and 'error'
+    """
+    regions = list(Region.objects.filter(id__in=region_ids))
+    stats = {'region_ids': [region.id for region in regions], 'readings': 0, 'fetch_seconds': 0, 'load_seconds': 0, 'error': None}
+    stats.update(loaded or {})
+
+    next_date = date.fromisoformat(start_date)
+    try:
+        for span_stats in ingest_regions(regions, next_date, date.fromisoformat(end_date)):
+            for key in ['readings', 'fetch_seconds', 'load_seconds']:
+                stats[key] += span_stats[key]
+            next_date = span_stats['end_date'] + timedelta(days=1)
+    except Exception as error:
+        if self.request.retries < self.max_retries or _is_quota_wait(error):
+            raise self.retry(
+                exc=error,
+                args=(region_ids, next_date.isoformat(), end_date),
+                kwargs={'loaded': {key: stats[key] for key in ['readings', 'fetch_seconds', 'load_seconds']}},
+                **_retry_options(self, error)
+            )
+        stats['error'] = f"{type(error).__name__}: {error}"
+
+    return stats
+
+def _is_quota_wait(error: Exception) -> bool:
+    """Check if a task failed because the API quota requires waiting a known time"""
+    return isinstance(error, RateLimitExceeded) and bool(error.retry_after)
+
+def _retry_options(task, error: Exception) -> Dict[str, Any]:
+    """Get the countdown of a task retry and, for quota waits, a retry limit that lets it run
+
+    Errors are retried with an exponential backoff. Quota waits are retried once the wait given by the
+    rate limiter or the API is over, however many retries were made, as the quota is available again by then.
+    """
+    if _is_quota_wait(error):
+        return {'countdown': error.retry_after, 'max_retries': task.request.retries + 1}
+    return {'countdown': 30 * 2 ** task.request.retries}
+
+@shared_task
+def finalize_ingestion(results: List[Dict[str, Any]], run_id: int):
+    """Record the statistics of an ingestion run once all of its chunks have finished
+
+    Follows on by precomputing the analysis results of the updated Regions.
+
+    Parameters:
+        results (List[Dict]): Statistics returned by each chunk task
+        run_id (int): Id of the IngestionRun
+    """
+    succeeded = [result for result in results if result['error'] is None]
+    updated_region_ids = [region_id for result in succeeded for region_id in result['region_ids']]
+
+    run = IngestionRun.objects.get(pk=run_id)
+    run.finished_at = timezone.now()
+    run.failed_chunks = len(results) - len(succeeded)
+    run.region_count = len(updated_region_ids)
+    run.readings_loaded = sum(result['readings'] for result in results)
+    run.fetch_seconds = sum(result['fetch_seconds'] for result in results)
+    run.load_seconds = sum(result['load_seconds'] for result in results)
+    run.errors = [result['error'] for result in results if result['error'] is not None]
+    if run.failed_chunks == 0:
+        run.status = 'succeeded'
+    elif succeeded:
+        run.status = 'partial'
+    else:
+        run.status = 'failed'
+    run.save()
+
+    # Follow-on stage: precompute the analysis results of the updated regions
+    precompute_analysis.delay(updated_region_ids)
+
+    return f"Ingestion run {run.id} loaded {run.readings_loaded} readings for {run.region_count} regions"
+
+@shared_task(bind=True, max_retries=3)
+def onboard_region(self, job_id: str):
+    """Load the climate history of a Region created through the API
+
+    The history is streamed into the database one date span at a time, recording the progress of the
+    OnboardingJob after each span. Failures are retried with an exponential backoff, resuming after the
+    days already loaded. Once out of retries the job fails and its Region is deleted, so no Region is
+    left without data.
+
+    Parameters:
+        job_id (str): Id of the OnboardingJob
+    """
+    job = OnboardingJob.objects.select_related('region').get(pk=job_id)
+    if job.region is None:
+        job.status = 'failed'
+        job.error = "The Region was deleted before its climate data was loaded"
+        job.finished_at = timezone.now()
+        job.save()
+        return job.error
+
+    job.status = 'running'
+    job.save(update_fields=['status'])
+
+    try:
+        for span_stats in ingest_regions([job.region], job.start_date + timedelta(days=job.days_loaded), job.end_date):
+            job.days_loaded += (span_stats['end_date'] - span_stats['start_date']).days + 1
+            job.readings_loaded += span_stats['readings']
+            job.save(update_fields=['days_loaded', 'readings_loaded'])
+    except Exception as error:
+        if self.request.retries < self.max_retries or _is_quota_wait(error):
+            raise self.retry(exc=error, **_retry_options(self, error))
+
+        job.status = 'failed'
+        job.error = f"{type(error).__name__}: {error}"
+        job.finished_at = timezone.now()
+        job.save()
+        job.region.delete()
+        return f"Onboarding of region {job.region_name} failed: {job.error}"
+
+    job.status = 'succeeded'
+    job.finished_at = timezone.now()
+    job.save()
+
+    # Follow-on stage: precompute the analysis results of the new region
+    precompute_analysis.delay([job.region_id])
+
+    return f"Loaded {job.readings_loaded} readings for region {job.region_name}"
+
+@shared_task
+def precompute_analysis(region_ids: List[int] = None):
+    """Precompute analysis results after ingestion
+
+    Stores seasonal, viability and performance results of Regions as AnalysisSnapshots,
+    which the analysis endpoints serve instead of computing results on each request.
+
+    Parameters:
+        region_ids (List[int]): Ids of the Regions to precompute (optional, defaults to all Regions)
+    """
+    regions = Region.objects.all()
+    if region_ids is not None:
+        regions = regions.filter(id__in=region_ids)
+
+    count = compute_snapshots(regions)
+
+    return f"Precomputed analysis for {count} regions"
+
+@shared_task
+def maintain_climate_partitions():
+    """Create the climate reading partitions of the coming years and detach the partitions of expired years
+
+    Does nothing when the readings table is not partitioned (on databases other than PostgreSQL).
+    """
+    created, detached = maintain_partitions()
+
+    return f"Created partitions for {created or 'no years'}, detached partitions for {detached or 'no years'}"
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from main.models import Region, ClimateReading
+from main.models import Region, ClimateReading, IngestionRun, OnboardingJob
 
 admin.site.register(Region)
-admin.site.register(ClimateReading)
\ No newline at end of file
+admin.site.register(ClimateReading)
+admin.site.register(IngestionRun)
+admin.site.register(OnboardingJob)
\ No newline at end of file
@@ -0,0 +1,106 @@
+import logging
+from django.core.cache import cache
+from django.db.models import QuerySet
+from redis.exceptions import RedisError
+from main.models import Region
+from datetime import date
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+HITS_KEY = 'analysis:hits'
+MISSES_KEY = 'analysis:misses'
+
+# Errors of an unavailable cache backend, results are then computed live
+CACHE_ERRORS = (RedisError, ConnectionError, OSError)
+
+def _cache_key(analysis: str, region: Region, params: Dict[str, Any]) -> str:
+    """
+    Build the cache key of an analysis result for a Region
+
+    Parameters:
+        analysis (str): Name of the analysis.
+        region (Region): The analyzed Region.
+        params (Dict[str, Any]): Parameters the analysis was run with.
+    """
+    # Results depend on today's date through the analysis time periods, so it is part of the parameters
+    params = {**params, 'today': date.today().isoformat()}
+    params_key = ','.join(
+        f"{name}={'+'.join(map(str, value)) if isinstance(value, (list, tuple)) else value}"
+        for name, value in sorted(params.items())
+    )
+    watermark = region.data_updated_at.timestamp()
+    return f'analysis:{analysis}:{region.id}:{params_key}:{watermark}'
+
+def _count(key: str, amount: int):
+    """
+    Increment a hit/miss counter, counters never expire
+    """
+    if amount > 0:
+        try:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, amount)
+        except CACHE_ERRORS as error:
+            logger.warning("Analysis cache counter not updated, the cache is unavailable: %s", error)
+
+def cached_analysis(analysis: str, regions: QuerySet, compute: Callable[..., Dict[int, Any]], **params) -> Dict[int, Any]:
+    """
+    Get the results of a batch analysis for many Regions, only computing results that are not cached
+
+    Results are cached per Region and keyed by the Region's data watermark, so they invalidate themselves
+    when new readings are loaded. Regions that never had data loaded through ingestion have no watermark
+    and are always computed. If the cache backend is unavailable every result is computed live.
+
+    Parameters:
+        analysis (str): Name of the analysis, used in cache keys.
+        regions (QuerySet): A queryset of Region objects.
+        compute (Callable): Batch analysis function taking a Region queryset and returning results keyed by Region id.
+        **params: Extra parameters passed to the analysis function, also used in cache keys.
+
+    Returns:
+        A dictionary of analysis results keyed by Region id.
+    """
+    keys = {region.id: _cache_key(analysis, region, params) for region in regions if region.data_updated_at}
+    try:
+        cached = cache.get_many(keys.values())
+    except CACHE_ERRORS as error:
+        logger.warning("Analysis cache unavailable, computing results live: %s", error)
+        cached = {}
+
+    results = {region_id: cached[key] for region_id, key in keys.items() if key in cached}
+    missing_ids = [region.id for region in regions if region.id not in results]
+
+    if missing_ids:
+        computed = compute(Region.objects.filter(id__in=missing_ids), **params)
+        try:
+            cache.set_many({keys[region_id]: value for region_id, value in computed.items() if region_id in keys})
+        except CACHE_ERRORS as error:
+            logger.warning("Analysis results not cached, the cache is unavailable: %s", error)
+        results.update(computed)
+
+    _count(HITS_KEY, len(results) - len(missing_ids))
+    _count(MISSES_KEY, len(missing_ids))
+
+    return results
+
+def analysis_cache_stats() -> Dict[str, int]:
+    """
+    Get the number of cached and computed Region analysis results since the counters were last reset
+
+    Returns:
+        A dictionary with 'hits', 'misses' and 'hit_rate' (percentage).
+    """
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total * 100, 2) if total > 0 else 0,
+    }
+
+def reset_analysis_cache_stats():
+    """
+    Reset the hit/miss counters
+    """
+    cache.delete_many([HITS_KEY, MISSES_KEY])
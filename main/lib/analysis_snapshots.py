@@ -0,0 +1,120 @@
+from django.db.models import QuerySet
+from django.utils import timezone
+from main.models import Region, AnalysisSnapshot
+from main.lib.analysis_cache import cached_analysis
+from main.lib.climate_analyzation import (
+    analyze_seasonal_suitability_batch,
+    analyze_longterm_viability_batch,
+    analyze_historical_performance_batch,
+    analyze_summary_batch
+)
+from typing import Any, Callable, Dict, List, Optional
+
+def compute_snapshots(regions: QuerySet) -> int:
+    """
+    Compute and store the analysis results of Regions
+
+    Parameters:
+        regions (QuerySet): A queryset of Region objects.
+
+    Returns:
+        int: Number of snapshots stored.
+    """
+    computed_at = timezone.now()
+    seasons = analyze_seasonal_suitability_batch(regions)
+    viability = analyze_longterm_viability_batch(regions)
+    performance = analyze_historical_performance_batch(regions)
+
+    snapshots = [
+        AnalysisSnapshot(
+            region_id=region_id,
+            best_growing_season=seasons[region_id],
+            longterm_viability=viability[region_id],
+            avg_historical_performance=performance[region_id],
+            computed_at=computed_at
+        )
+        for region_id in seasons
+    ]
+    AnalysisSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['region'],
+        update_fields=['best_growing_season', 'longterm_viability', 'avg_historical_performance', 'computed_at']
+    )
+    return len(snapshots)
+
+def fresh_snapshot(region: Region) -> Optional[AnalysisSnapshot]:
+    """
+    Get the snapshot of a Region if it is still valid
+
+    A snapshot is stale when climate data was loaded after it was computed, or when it was computed
+    on an earlier day (the analysis time periods end today).
+
+    Parameters:
+        region (Region): A Region, ideally loaded with select_related('analysis_snapshot').
+
+    Returns:
+        AnalysisSnapshot: The snapshot, or None if it is missing or stale.
+    """
+    try:
+        snapshot = region.analysis_snapshot
+    except AnalysisSnapshot.DoesNotExist:
+        return None
+
+    if region.data_updated_at and snapshot.computed_at < region.data_updated_at:
+        return None
+    if timezone.localdate(snapshot.computed_at) != timezone.localdate():
+        return None
+    return snapshot
+
+def snapshot_analysis(field: str, analysis: str, regions: QuerySet, compute: Callable[..., Dict[int, Any]]) -> Dict[int, Any]:
+    """
+    Get analysis results from fresh snapshots, falling back to (cached) live computation for the other Regions
+
+    Parameters:
+        field (str): Name of the AnalysisSnapshot field holding the result.
+        analysis (str): Name of the analysis, used for the live computation cache.
+        regions (QuerySet): A queryset of Region objects, ideally with select_related('analysis_snapshot').
+        compute (Callable): Batch analysis function used when there is no fresh snapshot.
+
+    Returns:
+        A dictionary of analysis results keyed by Region id.
+    """
+    results = {}
+    stale_ids = []
+    for region in regions:
+        snapshot = fresh_snapshot(region)
+        if snapshot is None:
+            stale_ids.append(region.id)
+        else:
+            results[region.id] = getattr(snapshot, field)
+
+    if stale_ids:
+        results.update(cached_analysis(analysis, regions.filter(id__in=stale_ids), compute))
+
+    return results
+
+def snapshot_summary(regions: QuerySet, fields: List[str]) -> Dict[int, Dict[str, Any]]:
+    """
+    Get several analysis results from fresh snapshots, computing the other Regions' results in one (cached) pass
+
+    Parameters:
+        regions (QuerySet): A queryset of Region objects, ideally with select_related('analysis_snapshot').
+        fields (List[str]): Names of the requested metrics, see SUMMARY_FIELDS.
+
+    Returns:
+        A dictionary keyed by Region id of dictionaries with the requested metrics.
+    """
+    results = {}
+    stale_ids = []
+    for region in regions:
+        snapshot = fresh_snapshot(region)
+        if snapshot is None:
+            stale_ids.append(region.id)
+        else:
+            results[region.id] = {field: getattr(snapshot, field) for field in fields}
+
+    if stale_ids:
+        results.update(cached_analysis('summary', regions.filter(id__in=stale_ids), analyze_summary_batch, fields=fields))
+
+    return results
@@ -1,88 +1,329 @@
-import pandas as pd
-from main.models import Region
-from datetime import date
-from typing import List
+import numpy as np
+from main.models import Region, ClimateMonthlyAggregate, ClimateScoreIndex
+from main.lib.climate_scoring import OPTIMAL_SCORE, SCORED_FIELDS, evaluate_batch
+from main.lib.series_cache import load_series
+from django.db.models import QuerySet, Sum, OuterRef, Subquery
+from datetime import date, timedelta
+from typing import Any, List, Dict, Optional, Tuple
+
+MONTH_NAMES = {1: 'January', 2: 'February', 3: 'March', 4: 'April',
+               5: 'May', 6: 'June', 7: 'July', 8: 'August',
+               9: 'September', 10: 'October', 11: 'November', 12: 'December'}
+
+# For Southern Hemisphere, default to summer months when a Region has no readings
+DEFAULT_GROWING_SEASON = ['December', 'January', 'February']
+
+# Metrics returned by analyze_summary_batch, named like the AnalysisSnapshot fields
+SUMMARY_FIELDS = ['best_growing_season', 'longterm_viability', 'avg_historical_performance']
+
+def _period_start(time_period: int) -> date:
+    """
+    Get the first date of a period of years ending today
+
+    Parameters:
+        time_period (int): Number of years in the period.
+    """
+    today = date.today()
+    return date(today.year - time_period, today.month, today.day)
+
+def _cached_series(regions: QuerySet) -> Tuple[Dict[int, Dict[str, np.ndarray]], QuerySet]:
+    """
+    Split Regions into those with an up to date memory-mapped series cache and those without
+
+    Parameters:
+        regions (QuerySet): A queryset of Region objects.
+
+    Returns:
+        Tuple: (series: (Dict[int, Dict[str, np.ndarray]]) keyed by Region id, uncached: (QuerySet) of the other Regions, None if there are none)
+    """
+    series = {}
+    uncached_ids = []
+    for region in regions:
+        region_series = load_series(region)
+        if region_series is not None:
+            series[region.id] = region_series
+        else:
+            uncached_ids.append(region.id)
+
+    return series, regions.filter(id__in=uncached_ids) if uncached_ids else None
+
+def _series_scores(series: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Score every day of a cached series
+    """
+    return evaluate_batch(*(series[field] for field in SCORED_FIELDS))
+
+def _series_monthly_totals(region_id: int, dates: np.ndarray, scores: np.ndarray) -> List[Tuple[int, int, float, int]]:
+    """
+    Get the total score and number of days of a scored series for every month of the year with readings
+
+    Returns:
+        A list of tuples: (region id, month, total score, total days)
+    """
+    months = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    total_scores = np.bincount(months, weights=scores, minlength=13)
+    total_days = np.bincount(months, minlength=13)
+    return [(region_id, month, total_scores[month], total_days[month]) for month in range(1, 13) if total_days[month] > 0]
+
+def _index_rows_before(regions: QuerySet, before_date: date = None) -> Dict[int, ClimateScoreIndex]:
+    """
+    Get the last score index row before a date for each Region, in a single query
+
+    Parameters:
+        regions (QuerySet): A queryset of Region objects.
+        before_date (date): Rows on or after this date are ignored (optional, defaults to using the latest row).
+
+    Returns:
+        A dictionary of ClimateScoreIndex objects keyed by Region id. Regions without an earlier row are left out.
+    """
+    latest_row = ClimateScoreIndex.objects.filter(region=OuterRef('pk'))
+    if before_date is not None:
+        latest_row = latest_row.filter(date__lt=before_date)
+    latest_row = latest_row.order_by('-date').values('id')[:1]
+
+    rows = ClimateScoreIndex.objects.filter(id__in=regions.annotate(row_id=Subquery(latest_row)).values('row_id'))
+    return {row.region_id: row for row in rows}
+
+def _period_totals(regions: QuerySet, start_date: date, end_date: date = None) -> Dict[int, Dict[str, float]]:
+    """
+    Get the number of days, optimal days and total score of each Region's readings in a date range
+
+    Totals are the difference between two rows of the score index, so the cost does not depend on the length
+    of the range. The series cache is not used, as every day of a series would have to be scored.
+
+    Parameters:
+        regions (QuerySet): A queryset of Region objects.
+        start_date (date): The first date of the range.
+        end_date (date): The last date of the range (optional, defaults to the latest reading).
+
+    Returns:
+        A dictionary keyed by Region id of dictionaries with 'total_days', 'optimal_days' and 'total_score'.
+        Regions without readings in the range are left out.
+    """
+    return _index_totals(regions, start_date, end_date)
+
+def _index_totals(regions: QuerySet, start_date: date, end_date: date = None, end_rows: Dict[int, ClimateScoreIndex] = None) -> Dict[int, Dict[str, float]]:
+    """
+    Get the totals of each Region's readings in a date range from the score index, see _period_totals
+
+    The end rows can be passed in when several ranges end at the same date, so they are only queried once.
+    """
+    if end_rows is None:
+        end_rows = _index_rows_before(regions, end_date + timedelta(days=1) if end_date else None)
+    start_rows = _index_rows_before(regions, start_date)
+
+    totals = {}
+    for region_id, end_row in end_rows.items():
+        start_row = start_rows.get(region_id)
+        total_days = end_row.cumulative_days - (start_row.cumulative_days if start_row else 0)
+        if total_days > 0:
+            totals[region_id] = {
+                'total_days': total_days,
+                'optimal_days': end_row.cumulative_optimal_days - (start_row.cumulative_optimal_days if start_row else 0),
+                'total_score': end_row.cumulative_score - (start_row.cumulative_score if start_row else 0),
+            }
+
+    return totals
+
+def growing_season(best_month: int) -> List[str]:
+    """
+    Get the names of the 3-month growing season starting at a month
+
+    Parameters:
+        best_month (int): The first month (1-12) of the growing season.
+
+    Returns:
+        A list of strings: The names of the 3 consecutive months.
+    """
+    return [MONTH_NAMES[(best_month + i) % 12 or 12] for i in range(3)]
+
+def _best_growing_seasons(region_ids: List[int], monthly_totals: List[Tuple[int, int, float, int]]) -> Dict[int, List[str]]:
+    """
+    Pick the growing season of each Region from its monthly totals
+
+    Parameters:
+        region_ids (List[int]): Ids of the Regions.
+        monthly_totals (List[Tuple]): (region id, month, total score, total days) for every month with readings.
+
+    Returns:
+        A dictionary keyed by Region id: The best consecutive 3-month period, the default season for Regions without readings.
+    """
+    # Identify the month with the best average score for each region
+    # This is a simplified approach - you could make it more sophisticated
+    best_months = {}
+    best_scores = {}
+    for region_id, month, total_score, total_days in monthly_totals:
+        avg_score = total_score / total_days
+        if region_id not in best_scores or avg_score > best_scores[region_id]:
+            best_scores[region_id] = avg_score
+            best_months[region_id] = month
+
+    return {
+        region_id: growing_season(best_months[region_id]) if region_id in best_months else list(DEFAULT_GROWING_SEASON)
+        for region_id in region_ids
+    }
+
+def _viability(totals: Optional[Dict[str, float]]) -> float:
+    """
+    Get the percentage of optimal days from period totals, 0 without readings
+    """
+    if not totals or totals['total_days'] == 0:
+        return 0
+    return round((totals['optimal_days'] / totals['total_days']) * 100, 2)
+
+def _performance(totals: Optional[Dict[str, float]]) -> float:
+    """
+    Get the average score from period totals, 0 without readings
+    """
+    if not totals or totals['total_days'] == 0:
+        return 0
+    return round(totals['total_score'] / totals['total_days'], 2)
+
+def _rollup_monthly_totals(regions: QuerySet) -> List[Tuple[int, int, float, int]]:
+    """
+    Get the total score and number of days of each Region for every month of the year with readings, from the monthly rollups in a single grouped query
+
+    Returns:
+        A list of tuples: (region id, month, total score, total days)
+    """
+    return list(
+        ClimateMonthlyAggregate.objects.filter(region__in=regions).values('region_id', 'month').annotate(
+            total_score=Sum('score_sum'),
+            total_days=Sum('reading_count')
+        ).order_by('region_id', 'month').values_list('region_id', 'month', 'total_score', 'total_days')
+    )
+
+def analyze_seasonal_suitability_batch(regions: QuerySet) -> Dict[int, List[str]]:
+    """
+    Determine the best time of year for grape growing for many Regions at once.
+
+    Monthly average scores are computed from the memory-mapped series cache where it is up to date,
+    and from the monthly rollups in a single grouped query for the other Regions.
+
+    Parameters:
+        regions (QuerySet): A queryset of Region objects.
+
+    Returns:
+        A dictionary keyed by Region id: The best consecutive 3-month period for grape growing in each region.
+    """
+    series, uncached = _cached_series(regions)
+
+    # (region id, month, total score, total days) for every month with readings
+    monthly_totals = []
+    for region_id, region_series in series.items():
+        monthly_totals.extend(_series_monthly_totals(region_id, region_series['date'], _series_scores(region_series)))
+
+    if uncached is not None:
+        monthly_totals.extend(_rollup_monthly_totals(uncached))
+
+    return _best_growing_seasons([region.id for region in regions], monthly_totals)
+
+def analyze_longterm_viability_batch(regions: QuerySet, time_period: int = 30) -> Dict[int, float]:
+    """
+    Calculate percentage of time with optimal conditions over the time period for many Regions at once.
+
+    Day counts for every Region are read from the score index, see _period_totals.
+
+    Parameters:
+        regions (QuerySet): A queryset of Region objects.
+        time_period (int): Number of years to consider for long-term viability analysis (optional, defaults to 30 years).
+
+    Returns:
+        A dictionary keyed by Region id: Percentage of time with optimal conditions for grape growing over the time period.
+    """
+    # Count all days and days with good conditions (score >= 70) for each region
+    totals = _period_totals(regions, _period_start(time_period))
+
+    return {region.id: _viability(totals.get(region.id)) for region in regions}
+
+def analyze_historical_performance_batch(regions: QuerySet, time_period: int = 10) -> Dict[int, float]:
+    """
+    Calculate the average score over the time period for many Regions at once.
+
+    Average scores for every Region are read from the score index, see _period_totals.
+
+    Parameters:
+        regions (QuerySet): A queryset of Region objects.
+        time_period (int): Number of years to consider for historical performance analysis (optional, defaults to 10 years)
+
+    Returns:
+        A dictionary keyed by Region id: Average score for each region over the time period.
+    """
+    totals = _period_totals(regions, _period_start(time_period))
+
+    return {region.id: _performance(totals.get(region.id)) for region in regions}
+
+def analyze_summary_batch(regions: QuerySet, fields: List[str] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Run several analyses for many Regions at once, sharing the work between them.
+
+    Growing seasons are derived from each Region's cached series, or from the monthly rollups without an up to
+    date series cache. The period metrics of every Region come from the score index, reading the latest score
+    index rows once for both periods. Only the requested metrics are computed.
+
+    Parameters:
+        regions (QuerySet): A queryset of Region objects.
+        fields (List[str]): Metrics to compute, any of SUMMARY_FIELDS (optional, defaults to all of them).
+
+    Returns:
+        A dictionary keyed by Region id of dictionaries with the requested metrics.
+    """
+    fields = fields or SUMMARY_FIELDS
+
+    results = {region.id: {} for region in regions}
+    if 'best_growing_season' in fields:
+        series, uncached = _cached_series(regions)
+        monthly_totals = []
+        for region_id, region_series in series.items():
+            monthly_totals.extend(_series_monthly_totals(region_id, region_series['date'], _series_scores(region_series)))
+        if uncached is not None:
+            monthly_totals.extend(_rollup_monthly_totals(uncached))
+
+        seasons = _best_growing_seasons(list(results), monthly_totals)
+        for region_id in results:
+            results[region_id]['best_growing_season'] = seasons[region_id]
+
+    # Both periods end at the latest reading, so the end rows of the score index are only read once
+    periods = [(field, years, metric) for field, years, metric in [
+        ('longterm_viability', 30, _viability),
+        ('avg_historical_performance', 10, _performance)
+    ] if field in fields]
+    if periods:
+        end_rows = _index_rows_before(regions)
+        for field, years, metric in periods:
+            totals = _index_totals(regions, _period_start(years), end_rows=end_rows)
+            for region_id in results:
+                results[region_id][field] = metric(totals.get(region_id))
+
+    return results
 
 def analyze_seasonal_suitability(region: Region) -> List[str]:
     """
     Determine the best time of year for grape growing in a Region.
-    
+
     Parameters:
         region (Region): A model instance representing a wine growing region with
             associated climate_readings.
-    
+
     Returns:
         A list of strings: The best consecutive 3-month period for grape growing in the region.
     """
-    # Get all readings for this region
-    readings = region.climate_readings.all()
-    
-    # Check if there are any readings first
-    if not readings.exists():
-        # For Southern Hemisphere, default to summer months: December, January, February
-        return ['December', 'January', 'February']
-    
-    # Add evaluation score to each reading
-    evaluated_readings = []
-    for reading in readings:
-        score = reading.evaluate()
-        evaluated_readings.append({
-            'date': reading.date,
-            'month': reading.date.month,
-            'score': score
-        })
-    
-    # Convert to DataFrame for analysis
-    df = pd.DataFrame(evaluated_readings)
-    
-    # Calculate average score by month
-    monthly_avg = df.groupby('month')['score'].mean().sort_values(ascending=False)
-    
-    # Identify best consecutive 3-month period (growing season)
-    # This is a simplified approach - you could make it more sophisticated
-    best_month = monthly_avg.idxmax()
-    growing_season = [(best_month + i) % 12 or 12 for i in range(3)]
-    
-    month_names = {1: 'January', 2: 'February', 3: 'March', 4: 'April', 
-                   5: 'May', 6: 'June', 7: 'July', 8: 'August', 
-                   9: 'September', 10: 'October', 11: 'November', 12: 'December'}
-    
-    return [month_names[m] for m in growing_season]
+    return analyze_seasonal_suitability_batch(Region.objects.filter(pk=region.pk))[region.pk]
 
 def analyze_longterm_viability(region: Region, time_period: int = 30) -> float:
     """
     Calculate percentage of time with optimal conditions over last 30 years.
-    
+
     Parameters:
         region (Region): A model instance representing a wine growing region.
         time_period (int): Number of years to consider for long-term viability analysis (optional, defaults to 30 years).
-    
+
     Returns:
         A float: Percentage of time with optimal conditions for grape growing over the time period,
     """
+    return analyze_longterm_viability_batch(Region.objects.filter(pk=region.pk), time_period)[region.pk]
 
-    time_period_date = date(date.today().year - time_period, date.today().month, date.today().day)
-    
-    # Get readings for this region from the last 30 years
-    readings = region.climate_readings.filter(date__gte=time_period_date)
-    
-    total_days = readings.count()
-    if total_days == 0:
-        return 0
-    
-    # Count days with good conditions (score >= 70)
-    optimal_days = 0
-    for reading in readings:
-        score = reading.evaluate()
-        if score >= 70:
-            optimal_days += 1
-    
-    # Calculate percentage
-    percentage = (optimal_days / total_days) * 100
-    
-    return round(percentage, 2)
-
-def analyze_historical_performance(region: List[Region], time_period: int=10) -> float:
+def analyze_historical_performance(region: Region, time_period: int=10) -> float:
     """
     Find the region with worst climate for grape growing over past 10 years
 
@@ -93,15 +334,4 @@ def analyze_historical_performance(region: List[Region], time_period: int=10) ->
     Returns:
         A float: Average score for the region over the time period.
     """
-    
-    time_period_date = date(date.today().year - time_period, date.today().month, date.today().day)
-
-    readings = region.climate_readings.filter(
-            date__gte=time_period_date
-        )
-    
-    total_score = 0
-    for reading in readings:
-            total_score += reading.evaluate()
-
-    return round((total_score / readings.count() if readings.count() > 0 else 0), 2)
+    return analyze_historical_performance_batch(Region.objects.filter(pk=region.pk), time_period)[region.pk]
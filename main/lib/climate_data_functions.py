@@ -1,7 +1,12 @@
-from main.models import Region, ClimateReading
-from datetime import date
-from django.db.models import Max
-from typing import List
+from main.models import Region, ClimateReading, ClimateMonthlyAggregate, ClimateScoreIndex, AGGREGATED_FIELDS
+from main.lib.climate_scoring import SCORE_VERSION, OPTIMAL_SCORE, score_components, stored_score_expression
+from main.lib.series_cache import refresh_series
+from datetime import date, timedelta
+from django.utils import timezone
+from django.db.models import Max, Min, Avg, Sum, Count, Q, QuerySet
+from django.db.models.functions import ExtractYear, ExtractMonth
+from typing import List, Iterable, Set, Tuple, Dict
+import numpy as np
 import pandas as pd
 
 def get_all_region_coordinates():
@@ -23,6 +28,52 @@ def get_all_region_coordinates():
     
     return latitudes, longitudes, lookup_dict, regions
 
+# ClimateReading fields filled from each Open-Meteo daily variable
+CLIMATE_DATA_FIELDS = {
+    'mean_temperature': 'temperature_2m_mean',
+    'max_temperature': 'temperature_2m_max',
+    'min_temperature': 'temperature_2m_min',
+    'mean_humidity': 'relative_humidity_2m_mean',
+    'max_humidity': 'relative_humidity_2m_max',
+    'min_humidity': 'relative_humidity_2m_min',
+    'rain': 'precipitation_sum',
+    'cloud_cover': 'cloud_cover_mean',
+    'soil_moisture': 'soil_moisture_0_to_10cm_mean',
+}
+
+def climate_data_columns(climate_data: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], int]:
+    """
+    Turn climate data into insert-ready columns of ClimateReading fields in one step
+
+    Days missing any variable are dropped, as readings cannot store missing values.
+    Missing days at the end of the data (the archive lags a few days behind) are fetched again on the next run,
+    as fetching resumes after each Region's latest reading. Missing days before it are not fetched again.
+
+    Parameters:
+        climate_data (DataFrame): A DataFrame containing climate data for a Region
+
+    Returns:
+        Tuple: (columns: (Dict[str, np.ndarray]) keyed by ClimateReading field, including the scores, dropped: (int) number of incomplete days dropped)
+    """
+    # Find complete days with a single vectorized check
+    complete = climate_data[list(CLIMATE_DATA_FIELDS.values())].notna().all(axis=1).to_numpy()
+    frame = climate_data[complete]
+
+    columns = {'date': pd.to_datetime(frame['date']).dt.date.to_numpy()}
+    for field, variable in CLIMATE_DATA_FIELDS.items():
+        columns[field] = frame[variable].to_numpy(dtype=np.float64)
+
+    # Score every day at once so the scores can be stored with the readings
+    columns.update(score_components(
+        columns['max_temperature'],
+        columns['mean_humidity'],
+        columns['rain'],
+        columns['cloud_cover']
+    ))
+    columns['score_version'] = np.full(len(frame), SCORE_VERSION)
+
+    return columns, int(len(complete) - complete.sum())
+
 def process_climate_data(region: Region, climate_data: pd.DataFrame) -> List[ClimateReading]:
     """
     Process climate data for a specific region
@@ -34,25 +85,16 @@ def process_climate_data(region: Region, climate_data: pd.DataFrame) -> List[Cli
     # Add your processing logic here
     print(f"Processing data for {region.name}")
 
-    readings = []
-    # Iterate through each row (day) in the DataFrame
-    for index, row in climate_data.iterrows():
-        # Create a new climate reading for each day
-        reading = ClimateReading(
-            region=region,
-            date=row['date'],
-            mean_temperature=row['temperature_2m_mean'],
-            max_temperature=row['temperature_2m_max'],
-            min_temperature=row['temperature_2m_min'],
-            mean_humidity=row['relative_humidity_2m_mean'],
-            max_humidity=row['relative_humidity_2m_max'],
-            min_humidity=row['relative_humidity_2m_min'],
-            rain=row['precipitation_sum'],
-            cloud_cover=row['cloud_cover_mean'],
-            soil_moisture=row['soil_moisture_0_to_10cm_mean']
-        )
-        readings.append(reading)
-    return readings
+    columns, dropped = climate_data_columns(climate_data)
+    if dropped:
+        print(f"Dropped {dropped} incomplete days for {region.name}")
+
+    # Build readings from plain Python values, one column at a time rather than one pandas row at a time
+    fields = list(columns.keys())
+    return [
+        ClimateReading(region=region, **dict(zip(fields, values)))
+        for values in zip(*(columns[field].tolist() for field in fields))
+    ]
 
 def determine_start_date(regions: List[Region]) -> date:
     """Determine the start date for fetching climate data
@@ -74,10 +116,56 @@ def determine_start_date(regions: List[Region]) -> date:
         
         return earliest_of_latest
     
-    # Default to 30 years ago
+    return default_start_date()
+
+def default_start_date() -> date:
+    """
+    Get the date fetching starts from for Regions without readings
+    """
+    # Default to 1 year ago
     today = date.today()
     return date(today.year - 1, today.month, today.day)
 
+def plan_fetch_windows(regions: List[Region], end_date: date) -> Dict[date, List[Region]]:
+    """Plan the climate data each Region is missing up to a date
+
+    Each Region starts the day after its own latest reading, or at the default start date if it has
+    no readings, so a new or lagging Region does not cause data to be fetched again for the others.
+    Regions starting on the same date are grouped so they can share batched requests.
+
+    Parameters:
+        regions (List[Region]): List of Region instances
+        end_date (date): The last date to fetch
+
+    Returns:
+        A dictionary of Regions keyed by the start date of their fetch window, Regions that are up to date are left out.
+    """
+    # Get the latest date for each Region in a single query
+    latest_dates = dict(latest_reading_dates(regions))
+
+    windows = {}
+    for region in regions:
+        latest_date = latest_dates.get(region.id)
+        start_date = latest_date + timedelta(days=1) if latest_date else default_start_date()
+        if start_date <= end_date:
+            windows.setdefault(start_date, []).append(region)
+
+    return windows
+
+def latest_reading_dates(regions: List[Region]) -> QuerySet:
+    """
+    Query the latest reading date of each Region, as (region id, latest date) rows
+
+    Parameters:
+        regions (List[Region]): Regions to query, those without readings have no row.
+    """
+    return ClimateReading.objects.filter(region__in=regions).values('region').annotate(
+        latest_date=Max('date')
+    ).values_list('region', 'latest_date')
+
+# Number of rows sent to the database in one INSERT statement
+LOAD_BATCH_SIZE = 5000
+
 def create_climate_readings(reading_objects: List[ClimateReading]):
     """
     Bulk create ClimateReading objects
@@ -88,4 +176,278 @@ def create_climate_readings(reading_objects: List[ClimateReading]):
     """
     if (len(reading_objects) > 0):
         # Bulk create the ClimateReading objects
-        ClimateReading.objects.bulk_create(reading_objects, ignore_conflicts=True)
\ No newline at end of file
+        ClimateReading.objects.bulk_create(reading_objects, ignore_conflicts=True, batch_size=LOAD_BATCH_SIZE)
+
+        # Find the earliest date that received readings for each region
+        earliest_dates = {}
+        for reading in reading_objects:
+            reading_date = pd.Timestamp(reading.date).date()
+            if reading.region_id not in earliest_dates or reading_date < earliest_dates[reading.region_id]:
+                earliest_dates[reading.region_id] = reading_date
+
+        update_loaded_climate_data(
+            {(reading.region_id, *_year_month(reading.date)) for reading in reading_objects},
+            earliest_dates
+        )
+
+def update_loaded_climate_data(months: Set[Tuple[int, int, int]], earliest_dates: Dict[int, date], rollups_only: bool = False):
+    """
+    Bring everything derived from the readings up to date after readings were loaded
+
+    Parameters:
+        months (Set[Tuple[int, int, int]]): (region_id, year, month) of every month that received readings.
+        earliest_dates (Dict[int, date]): Earliest date that received readings, keyed by Region id.
+        rollups_only (bool): Only update the monthly rollups, the caller then calls update_region_data once
+            it has loaded every batch of readings (default: False).
+    """
+    # Keep the monthly rollups up to date for the months that received readings
+    update_monthly_aggregates(months)
+
+    if not rollups_only:
+        update_region_data(earliest_dates)
+
+def update_region_data(earliest_dates: Dict[int, date]):
+    """
+    Bring the score index, data watermark and cached series of Regions up to date after readings were loaded
+
+    Parameters:
+        earliest_dates (Dict[int, date]): Earliest date that received readings, keyed by Region id.
+    """
+    # Extend the score index of each region from the earliest date that received readings
+    update_score_index(earliest_dates)
+
+    # Bump the data watermark so cached analysis results for these regions are no longer used,
+    # the previous watermarks tell which cached series still match the data they are appended to
+    previous_watermarks = dict(Region.objects.filter(id__in=list(earliest_dates.keys())).values_list('id', 'data_updated_at'))
+    bump_data_watermark(earliest_dates.keys())
+
+    # Append the new days to the memory-mapped series cache
+    for region in Region.objects.filter(id__in=list(earliest_dates.keys())):
+        refresh_series(region, earliest_dates[region.id], previous_watermarks[region.id])
+
+def bump_data_watermark(region_ids: Iterable[int]):
+    """
+    Mark the climate data of Regions as updated, invalidating their cached analysis results
+
+    Parameters:
+        region_ids (Iterable[int]): Ids of the updated Regions.
+    """
+    Region.objects.filter(id__in=list(region_ids)).update(data_updated_at=timezone.now())
+
+def _year_month(value) -> Tuple[int, int]:
+    """
+    Get the (year, month) of a date, datetime, Timestamp or YYYY-MM-DD string
+    """
+    timestamp = pd.Timestamp(value)
+    return timestamp.year, timestamp.month
+
+def _aggregate_months(readings: QuerySet) -> List[ClimateMonthlyAggregate]:
+    """
+    Build ClimateMonthlyAggregate objects from a ClimateReading queryset using a single grouped query
+
+    Parameters:
+        readings (QuerySet): The ClimateReadings to aggregate.
+
+    Returns:
+        List[ClimateMonthlyAggregate]: One (unsaved) aggregate per region and month in the queryset.
+    """
+    return [ClimateMonthlyAggregate(**row) for row in monthly_aggregate_rows(readings)]
+
+def monthly_aggregate_rows(readings: QuerySet) -> QuerySet:
+    """
+    Query the rollup values of each region and month in a ClimateReading queryset, grouped in the database
+
+    Parameters:
+        readings (QuerySet): ClimateReadings to aggregate.
+    """
+    variable_stats = {}
+    for field in AGGREGATED_FIELDS:
+        variable_stats[f'{field}_min'] = Min(field)
+        variable_stats[f'{field}_max'] = Max(field)
+        variable_stats[f'{field}_mean'] = Avg(field)
+
+    return readings.annotate(
+        year=ExtractYear('date'),
+        month=ExtractMonth('date'),
+        score_value=stored_score_expression()
+    ).values('region_id', 'year', 'month').annotate(
+        reading_count=Count('id'),
+        score_sum=Sum('score_value'),
+        optimal_days=Count('id', filter=Q(score_value__gte=OPTIMAL_SCORE)),
+        **variable_stats
+    ).order_by('region_id', 'year', 'month')
+
+def _save_monthly_aggregates(aggregates: List[ClimateMonthlyAggregate]):
+    """
+    Insert or update ClimateMonthlyAggregate objects in a single statement
+    """
+    if len(aggregates) > 0:
+        ClimateMonthlyAggregate.objects.bulk_create(
+            aggregates,
+            update_conflicts=True,
+            unique_fields=['region', 'year', 'month'],
+            update_fields=[
+                field.name for field in ClimateMonthlyAggregate._meta.concrete_fields
+                if field.name not in ('id', 'region', 'year', 'month')
+            ]
+        )
+
+def update_monthly_aggregates(region_months: Set[Tuple[int, int, int]]):
+    """
+    Recompute the monthly rollups of specific months from their daily readings
+
+    Parameters:
+        region_months (Set[Tuple[int, int, int]]): Set of (region id, year, month) to recompute.
+    """
+    if len(region_months) == 0:
+        return
+
+    # Fetch the span of touched months for each region in one query, then keep only the touched months
+    spans = {}
+    for region_id, year, month in region_months:
+        first, last = spans.get(region_id, ((year, month), (year, month)))
+        spans[region_id] = (min(first, (year, month)), max(last, (year, month)))
+
+    span_filter = Q()
+    for region_id, ((first_year, first_month), (last_year, last_month)) in spans.items():
+        span_filter |= Q(
+            region_id=region_id,
+            date__gte=date(first_year, first_month, 1),
+            date__lt=date(last_year + last_month // 12, last_month % 12 + 1, 1)
+        )
+
+    aggregates = [
+        aggregate for aggregate in _aggregate_months(ClimateReading.objects.filter(span_filter))
+        if (aggregate.region_id, aggregate.year, aggregate.month) in region_months
+    ]
+    _save_monthly_aggregates(aggregates)
+
+def rebuild_monthly_aggregates(regions: Iterable[Region]):
+    """
+    Recompute all monthly rollups of the given Regions from their daily readings
+
+    Parameters:
+        regions (Iterable[Region]): Regions to rebuild the rollups for.
+    """
+    ClimateMonthlyAggregate.objects.filter(region__in=regions).delete()
+    _save_monthly_aggregates(_aggregate_months(ClimateReading.objects.filter(region__in=regions)))
+
+def _rebuild_score_index_from(region_id: int, from_date: date = None):
+    """
+    Recompute the score index rows of a Region from a date onwards
+
+    Parameters:
+        region_id (int): Id of the Region.
+        from_date (date): First date to recompute (optional, defaults to the Region's first reading).
+    """
+    index = ClimateScoreIndex.objects.filter(region_id=region_id)
+
+    # Continue the running totals from the last row before the recomputed range
+    previous = None
+    if from_date is not None:
+        previous = index.filter(date__lt=from_date).order_by('-date').first()
+        index = index.filter(date__gte=from_date)
+
+    rows = list(score_index_rows(region_id, from_date))
+    index.delete()
+    if len(rows) == 0:
+        return
+
+    dates = [row[0] for row in rows]
+    scores = np.array([row[1] for row in rows], dtype=np.float64)
+
+    cumulative_days = np.arange(1, len(scores) + 1)
+    cumulative_optimal_days = np.cumsum(scores >= OPTIMAL_SCORE)
+    cumulative_score = np.cumsum(scores)
+    if previous is not None:
+        cumulative_days += previous.cumulative_days
+        cumulative_optimal_days += previous.cumulative_optimal_days
+        cumulative_score += previous.cumulative_score
+
+    ClimateScoreIndex.objects.bulk_create([
+        ClimateScoreIndex(
+            region_id=region_id,
+            date=dates[i],
+            cumulative_days=int(cumulative_days[i]),
+            cumulative_optimal_days=int(cumulative_optimal_days[i]),
+            cumulative_score=float(cumulative_score[i])
+        )
+        for i in range(len(dates))
+    ], batch_size=5000)
+
+def score_index_rows(region_id: int, from_date: date = None) -> QuerySet:
+    """
+    Query the (date, score) of a Region's readings from a date onwards, in date order
+
+    Parameters:
+        region_id (int): Id of the Region.
+        from_date (date): First date to query (optional, defaults to the Region's first reading).
+    """
+    readings = ClimateReading.objects.filter(region_id=region_id)
+    if from_date is not None:
+        readings = readings.filter(date__gte=from_date)
+    return readings.annotate(score_value=stored_score_expression()).values_list('date', 'score_value').order_by('date')
+
+def update_score_index(earliest_dates: Dict[int, date]):
+    """
+    Extend the score index of Regions that received new readings
+
+    When readings were only added after the last indexed date this only appends rows,
+    older (backfilled) readings cause the index to be recomputed from that date onwards.
+
+    Parameters:
+        earliest_dates (Dict[int, date]): Earliest date that received readings, keyed by Region id.
+    """
+    for region_id, from_date in earliest_dates.items():
+        _rebuild_score_index_from(region_id, from_date)
+
+def rebuild_score_index(regions: Iterable[Region]):
+    """
+    Recompute the whole score index of the given Regions from their daily readings
+
+    Parameters:
+        regions (Iterable[Region]): Regions to rebuild the index for.
+    """
+    for region in regions:
+        _rebuild_score_index_from(region.id)
+
+def remove_climate_data_before(year: int) -> List[int]:
+    """
+    Remove everything derived from the readings of the years before a year, once those readings are gone
+
+    Drops the monthly rollups of those years and recomputes the score index of the affected Regions,
+    as its running totals include the removed days. Their watermarks are bumped and series rebuilt,
+    so cached analysis results and series no longer count the removed years.
+
+    Parameters:
+        year (int): The first year that is kept.
+
+    Returns:
+        List[int]: Ids of the affected Regions
+    """
+    cutoff = date(year, 1, 1)
+    region_ids = set(ClimateScoreIndex.objects.filter(date__lt=cutoff).values_list('region_id', flat=True).distinct())
+    region_ids |= set(ClimateMonthlyAggregate.objects.filter(year__lt=year).values_list('region_id', flat=True).distinct())
+
+    ClimateMonthlyAggregate.objects.filter(year__lt=year).delete()
+    for region_id in region_ids:
+        _rebuild_score_index_from(region_id)
+    bump_data_watermark(region_ids)
+
+    for region in Region.objects.filter(id__in=list(region_ids)):
+        refresh_series(region)
+    return sorted(region_ids)
+
+def rebuild_climate_aggregates(regions: Iterable[Region]):
+    """
+    Recompute the monthly rollups and score index of the given Regions from their daily readings
+
+    Parameters:
+        regions (Iterable[Region]): Regions to rebuild.
+    """
+    rebuild_monthly_aggregates(regions)
+    rebuild_score_index(regions)
+    bump_data_watermark(region.id for region in regions)
+
+    for region in Region.objects.filter(id__in=[region.id for region in regions]):
+        refresh_series(region)
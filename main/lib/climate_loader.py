@@ -0,0 +1,125 @@
+import logging
+import time
+import numpy as np
+import pandas as pd
+from django.db import connection, transaction
+from main.models import ClimateReading
+from main.lib.climate_data_functions import LOAD_BATCH_SIZE, update_loaded_climate_data
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Columns of main_climatereading filled by the loader, in COPY order
+LOADED_FIELDS = [
+    'region_id', 'date',
+    'mean_temperature', 'max_temperature', 'min_temperature',
+    'mean_humidity', 'max_humidity', 'min_humidity',
+    'rain', 'cloud_cover', 'soil_moisture',
+    'score', 'temperature_score', 'humidity_score', 'rain_score', 'cloud_score', 'score_version',
+]
+
+def load_climate_columns(region_columns: Dict[int, Dict[str, np.ndarray]], rollups_only: bool = False) -> Dict[str, float]:
+    """
+    Load readings straight from columns of values, without creating ClimateReading objects
+
+    On PostgreSQL the rows are streamed into a temporary staging table with COPY and merged into
+    main_climatereading with a single INSERT ... ON CONFLICT DO NOTHING, so existing days are kept
+    like bulk_create(ignore_conflicts=True) does. Other databases fall back to batched bulk_create.
+
+    Parameters:
+        region_columns (Dict[int, Dict[str, np.ndarray]]): Columns keyed by ClimateReading field for each Region id,
+            as returned by climate_data_columns.
+        rollups_only (bool): Only update the monthly rollups, leaving the score index, watermarks and cached
+            series to a later update_region_data call (default: False).
+
+    Returns:
+        Dict: Load statistics with 'rows' (rows inserted, existing days are not counted), 'sent' (rows sent),
+            'seconds' and 'rows_per_second' (rows inserted per second).
+    """
+    region_columns = {region_id: columns for region_id, columns in region_columns.items() if len(columns['date']) > 0}
+    if not region_columns:
+        return {'rows': 0, 'sent': 0, 'seconds': 0, 'rows_per_second': 0}
+
+    started = time.monotonic()
+
+    # Concatenate every Region's columns, adding the region_id column
+    columns = {
+        'region_id': np.concatenate([np.full(len(columns['date']), region_id) for region_id, columns in region_columns.items()])
+    }
+    for field in LOADED_FIELDS[1:]:
+        columns[field] = np.concatenate([columns[field] for columns in region_columns.values()])
+    sent = len(columns['date'])
+
+    if connection.vendor == 'postgresql':
+        rows = _copy_rows(columns)
+    else:
+        rows = _bulk_create_rows(columns)
+
+    # Months and earliest dates that received readings, for the rollups, score index and series cache
+    dates = pd.DatetimeIndex(columns['date'])
+    months = set(zip(columns['region_id'].tolist(), dates.year.tolist(), dates.month.tolist()))
+    earliest_dates = {region_id: min(region['date']) for region_id, region in region_columns.items()}
+    update_loaded_climate_data(months, earliest_dates, rollups_only)
+
+    seconds = time.monotonic() - started
+    stats = {'rows': rows, 'sent': sent, 'seconds': seconds, 'rows_per_second': rows / seconds if seconds > 0 else 0}
+    logger.info("Loaded %d of %d readings in %.2fs (%.0f rows/s)", rows, sent, seconds, stats['rows_per_second'])
+    return stats
+
+def _row_batches(columns: Dict[str, np.ndarray]) -> Iterator[List[tuple]]:
+    """
+    Yield rows of plain Python values in LOADED_FIELDS order, LOAD_BATCH_SIZE rows at a time
+    """
+    for start in range(0, len(columns['date']), LOAD_BATCH_SIZE):
+        yield list(zip(*(columns[field][start:start + LOAD_BATCH_SIZE].tolist() for field in LOADED_FIELDS)))
+
+def _copy_rows(columns: Dict[str, np.ndarray]) -> int:
+    """
+    Stream rows into a staging table with COPY and merge them into the readings table in one statement
+
+    Returns:
+        int: Number of rows inserted
+    """
+    quote = connection.ops.quote_name
+    table = quote(ClimateReading._meta.db_table)
+    column_list = ', '.join(quote(field) for field in LOADED_FIELDS)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # The staging table has the readings table's column types and is dropped at the end of the transaction,
+        # an earlier one is dropped first in case this runs inside a longer transaction
+        cursor.execute("DROP TABLE IF EXISTS climate_reading_staging")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE climate_reading_staging ON COMMIT DROP AS SELECT {column_list} FROM {table} WITH NO DATA"
+        )
+
+        # psycopg3 COPY, rows are streamed to the server as they are written
+        with cursor.copy(f"COPY climate_reading_staging ({column_list}) FROM STDIN") as copy:
+            for rows in _row_batches(columns):
+                for row in rows:
+                    copy.write_row(row)
+
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM climate_reading_staging ON CONFLICT DO NOTHING"
+        )
+        return cursor.rowcount
+
+def _bulk_create_rows(columns: Dict[str, np.ndarray]) -> int:
+    """
+    Insert rows with batched bulk_create on databases without COPY
+
+    Returns:
+        int: Number of rows inserted
+    """
+    # bulk_create does not report the rows skipped as conflicts, so count the loaded range before and after
+    loaded = ClimateReading.objects.filter(
+        region_id__in=np.unique(columns['region_id']).tolist(),
+        date__gte=columns['date'].min(),
+        date__lte=columns['date'].max()
+    )
+    before = loaded.count()
+    for rows in _row_batches(columns):
+        ClimateReading.objects.bulk_create(
+            [ClimateReading(**dict(zip(LOADED_FIELDS, row))) for row in rows],
+            ignore_conflicts=True
+        )
+    return loaded.count() - before
@@ -0,0 +1,260 @@
+import numpy as np
+import pandas as pd
+from django.db.models import Case, When, Value, Q, F, FloatField, ExpressionWrapper
+from django.db.models.functions import Coalesce
+from typing import Dict
+
+# Columns of ClimateReading used by the scoring rules, in argument order of evaluate_batch.
+SCORED_FIELDS = ['max_temperature', 'mean_humidity', 'rain', 'cloud_cover']
+
+# A day scoring at or above this threshold is considered optimal for grape growing.
+OPTIMAL_SCORE = 70
+
+# Version of the scoring rules, stored with precomputed scores on ClimateReading.
+# Increment this whenever the rules below (or ClimateReading.evaluate()) change, then run
+# `python manage.py rescore_climate_readings` to recompute the stale rows.
+SCORE_VERSION = 1
+
+def temperature_scores(max_temperature) -> np.ndarray:
+    """
+    Score maximum temperatures using the same bins as ClimateReading.evaluate()
+
+    Parameters:
+        max_temperature (array-like): Daily maximum temperatures in degrees C.
+
+    Returns:
+        np.ndarray: Temperature component scores.
+    """
+    t = np.asarray(max_temperature, dtype=np.float64)
+
+    # Conditions are checked in order, the first match wins (same as the if/elif chain)
+    return np.select(
+        [(25 <= t) & (t <= 32), (20 <= t) & (t < 25), (32 < t) & (t <= 35)],
+        [100.0, 80.0, 70.0],
+        default=40.0
+    )
+
+def humidity_scores(mean_humidity) -> np.ndarray:
+    """
+    Score mean humidity using the same bins as ClimateReading.evaluate()
+
+    Parameters:
+        mean_humidity (array-like): Daily mean relative humidity in percent.
+
+    Returns:
+        np.ndarray: Humidity component scores.
+    """
+    h = np.asarray(mean_humidity, dtype=np.float64)
+
+    return np.select(
+        [
+            (40 <= h) & (h <= 60),
+            ((30 <= h) & (h < 40)) | ((60 < h) & (h <= 70)),
+            ((20 <= h) & (h < 40)) | ((60 < h) & (h <= 80)),
+        ],
+        [100.0, 80.0, 60.0],
+        default=50.0
+    )
+
+def rain_scores(rain) -> np.ndarray:
+    """
+    Score daily rainfall using the same bins as ClimateReading.evaluate()
+
+    Parameters:
+        rain (array-like): Daily precipitation sum in mm.
+
+    Returns:
+        np.ndarray: Rainfall component scores.
+    """
+    r = np.asarray(rain, dtype=np.float64)
+
+    return np.select(
+        [(0 < r) & (r <= 5), (5 < r) & (r <= 15), r == 0],
+        [100.0, 80.0, 60.0],
+        default=40.0
+    )
+
+def cloud_scores(cloud_cover) -> np.ndarray:
+    """
+    Score cloud cover using the same rule as ClimateReading.evaluate()
+
+    Parameters:
+        cloud_cover (array-like): Daily mean cloud cover in percent.
+
+    Returns:
+        np.ndarray: Cloud cover component scores (less cloud is better).
+    """
+    return 100 - np.asarray(cloud_cover, dtype=np.float64)
+
+def score_components(max_temperature, mean_humidity, rain, cloud_cover) -> Dict[str, np.ndarray]:
+    """
+    Score a batch of readings, keeping the individual component scores
+
+    Parameters:
+        max_temperature (array-like): Daily maximum temperatures.
+        mean_humidity (array-like): Daily mean relative humidity.
+        rain (array-like): Daily precipitation sums.
+        cloud_cover (array-like): Daily mean cloud cover.
+
+    Returns:
+        Dict[str, np.ndarray]: Scores keyed by the ClimateReading field they are stored in
+            ('temperature_score', 'humidity_score', 'rain_score', 'cloud_score' and 'score').
+    """
+    scores = {
+        'temperature_score': temperature_scores(max_temperature),
+        'humidity_score': humidity_scores(mean_humidity),
+        'rain_score': rain_scores(rain),
+        'cloud_score': cloud_scores(cloud_cover),
+    }
+    # Keep the same weighting and order of operations as evaluate() so results match exactly
+    scores['score'] = (
+        (scores['temperature_score'] * 0.25)
+        + (scores['humidity_score'] * 0.25)
+        + (scores['rain_score'] * 0.25)
+        + (scores['cloud_score'] * 0.25)
+    )
+    return scores
+
+def evaluate_batch(max_temperature, mean_humidity, rain, cloud_cover) -> np.ndarray:
+    """
+    Vectorized equivalent of ClimateReading.evaluate() for whole columns of readings
+
+    Parameters:
+        max_temperature (array-like): Daily maximum temperatures.
+        mean_humidity (array-like): Daily mean relative humidity.
+        rain (array-like): Daily precipitation sums.
+        cloud_cover (array-like): Daily mean cloud cover.
+
+    Returns:
+        np.ndarray: A score from 0-100 for each reading, identical to calling evaluate() on each row.
+    """
+    return score_components(max_temperature, mean_humidity, rain, cloud_cover)['score']
+
+def evaluate_frame(readings: pd.DataFrame) -> np.ndarray:
+    """
+    Score a DataFrame holding the ClimateReading scored columns
+
+    Parameters:
+        readings (DataFrame): A DataFrame with (at least) the columns listed in SCORED_FIELDS.
+
+    Returns:
+        np.ndarray: A score from 0-100 for each row.
+    """
+    return evaluate_batch(*(readings[field].to_numpy() for field in SCORED_FIELDS))
+
+def temperature_score_expression(field: str = 'max_temperature') -> Case:
+    """
+    SQL (CASE/WHEN) equivalent of the temperature rules in ClimateReading.evaluate()
+
+    Parameters:
+        field (str): Name of the maximum temperature column (optional, defaults to 'max_temperature').
+
+    Returns:
+        Case: An ORM expression evaluating to the temperature component score.
+    """
+    return Case(
+        When(Q(**{f'{field}__gte': 25}) & Q(**{f'{field}__lte': 32}), then=Value(100.0)),
+        When(Q(**{f'{field}__gte': 20}) & Q(**{f'{field}__lt': 25}), then=Value(80.0)),
+        When(Q(**{f'{field}__gt': 32}) & Q(**{f'{field}__lte': 35}), then=Value(70.0)),
+        default=Value(40.0),
+        output_field=FloatField()
+    )
+
+def humidity_score_expression(field: str = 'mean_humidity') -> Case:
+    """
+    SQL (CASE/WHEN) equivalent of the humidity rules in ClimateReading.evaluate()
+
+    Parameters:
+        field (str): Name of the mean humidity column (optional, defaults to 'mean_humidity').
+
+    Returns:
+        Case: An ORM expression evaluating to the humidity component score.
+    """
+    return Case(
+        When(Q(**{f'{field}__gte': 40}) & Q(**{f'{field}__lte': 60}), then=Value(100.0)),
+        When(
+            (Q(**{f'{field}__gte': 30}) & Q(**{f'{field}__lt': 40}))
+            | (Q(**{f'{field}__gt': 60}) & Q(**{f'{field}__lte': 70})),
+            then=Value(80.0)
+        ),
+        When(
+            (Q(**{f'{field}__gte': 20}) & Q(**{f'{field}__lt': 40}))
+            | (Q(**{f'{field}__gt': 60}) & Q(**{f'{field}__lte': 80})),
+            then=Value(60.0)
+        ),
+        default=Value(50.0),
+        output_field=FloatField()
+    )
+
+def rain_score_expression(field: str = 'rain') -> Case:
+    """
+    SQL (CASE/WHEN) equivalent of the rainfall rules in ClimateReading.evaluate()
+
+    Parameters:
+        field (str): Name of the precipitation column (optional, defaults to 'rain').
+
+    Returns:
+        Case: An ORM expression evaluating to the rainfall component score.
+    """
+    return Case(
+        When(Q(**{f'{field}__gt': 0}) & Q(**{f'{field}__lte': 5}), then=Value(100.0)),
+        When(Q(**{f'{field}__gt': 5}) & Q(**{f'{field}__lte': 15}), then=Value(80.0)),
+        When(**{field: 0}, then=Value(60.0)),
+        default=Value(40.0),
+        output_field=FloatField()
+    )
+
+def cloud_score_expression(field: str = 'cloud_cover') -> ExpressionWrapper:
+    """
+    SQL equivalent of the cloud cover rule in ClimateReading.evaluate()
+
+    Parameters:
+        field (str): Name of the cloud cover column (optional, defaults to 'cloud_cover').
+
+    Returns:
+        ExpressionWrapper: An ORM expression evaluating to the cloud cover component score.
+    """
+    return ExpressionWrapper(Value(100.0) - F(field), output_field=FloatField())
+
+def score_expression() -> ExpressionWrapper:
+    """
+    SQL equivalent of ClimateReading.evaluate(), for use in annotate() and aggregate()
+
+    Lets the database score and aggregate readings without sending every row to Python, e.g.
+    readings.annotate(score=score_expression()).aggregate(Avg('score'))
+
+    Returns:
+        ExpressionWrapper: An ORM expression evaluating to the 0-100 score of a reading.
+    """
+    return ExpressionWrapper(
+        (temperature_score_expression() * Value(0.25))
+        + (humidity_score_expression() * Value(0.25))
+        + (rain_score_expression() * Value(0.25))
+        + (cloud_score_expression() * Value(0.25)),
+        output_field=FloatField()
+    )
+
+def score_update_fields() -> Dict[str, ExpressionWrapper]:
+    """
+    Expressions to (re)compute the stored scores of ClimateReading rows in the database
+
+    Returns:
+        Dict[str, Expression]: Keyword arguments for QuerySet.update().
+    """
+    return {
+        'temperature_score': temperature_score_expression(),
+        'humidity_score': humidity_score_expression(),
+        'rain_score': rain_score_expression(),
+        'cloud_score': cloud_score_expression(),
+        'score': score_expression(),
+        'score_version': Value(SCORE_VERSION),
+    }
+
+def stored_score_expression() -> Coalesce:
+    """
+    The precomputed score of a reading, computed on the fly for rows that have not been scored yet
+
+    Returns:
+        Coalesce: An ORM expression evaluating to the 0-100 score of a reading.
+    """
+    return Coalesce(F('score'), score_expression(), output_field=FloatField())
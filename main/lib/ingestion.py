@@ -0,0 +1,225 @@
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+from main.models import Region, ClimateReading, BackfillCheckpoint
+from main.lib.open_meteo import ClimateDataProvider, tile_cache_enabled
+from main.lib.climate_data_functions import climate_data_columns, update_region_data
+from main.lib.climate_loader import load_climate_columns
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+# Estimated peak memory used per Region and day while fetching, transforming and loading (bytes).
+# Covers the API response, the DataFrame, the insert-ready columns and the rows streamed to the database.
+INGESTION_BYTES_PER_DAY = 1024
+
+# Days of data held per Region and year while fetching through the tile cache, which fetches and keeps whole years
+TILE_DAYS = 366
+
+def memory_budget() -> int:
+    """
+    Get the memory an ingestion worker may use for climate data, from the INGESTION_MEMORY_BUDGET_MB setting (bytes)
+    """
+    return getattr(settings, 'INGESTION_MEMORY_BUDGET_MB', 256) * 1024 * 1024
+
+def max_region_days(budget: int = None) -> int:
+    """
+    Get the number of Region-days that fit in a memory budget
+
+    Parameters:
+        budget (int): Memory budget in bytes (optional, defaults to the INGESTION_MEMORY_BUDGET_MB setting).
+    """
+    return max(1, (budget or memory_budget()) // INGESTION_BYTES_PER_DAY)
+
+def max_chunk_regions(budget: int = None) -> int:
+    """
+    Get the number of Regions whose data for the smallest span fits in a memory budget, a day or a whole-year tile
+
+    Parameters:
+        budget (int): Memory budget in bytes (optional, defaults to the INGESTION_MEMORY_BUDGET_MB setting).
+    """
+    return max(1, max_region_days(budget) // (TILE_DAYS if tile_cache_enabled() else 1))
+
+def date_spans(start_date: date, end_date: date, region_count: int, budget: int = None, whole_years: bool = False) -> List[Tuple[date, date]]:
+    """
+    Split a date range into consecutive spans whose data for a number of Regions fits in a memory budget
+
+    Parameters:
+        start_date (date): The first date of the range.
+        end_date (date): The last date of the range.
+        region_count (int): Number of Regions fetched together.
+        budget (int): Memory budget in bytes (optional, defaults to the INGESTION_MEMORY_BUDGET_MB setting).
+        whole_years (bool): Whether whole years are fetched for any date, as with the tile cache. Spans then end
+            at the end of a year and are budgeted for every day of the years they touch (default: False).
+
+    Returns:
+        A list of (first date, last date) tuples covering the range.
+    """
+    span_days = max(1, max_region_days(budget) // max(1, region_count))
+    span_years = max(1, span_days // TILE_DAYS)
+
+    spans = []
+    span_start = start_date
+    while span_start <= end_date:
+        if whole_years:
+            span_end = min(end_date, date(span_start.year + span_years - 1, 12, 31))
+        else:
+            span_end = min(end_date, span_start + timedelta(days=span_days - 1))
+        spans.append((span_start, span_end))
+        span_start = span_end + timedelta(days=1)
+    return spans
+
+def ingest_regions(regions: List[Region], start_date: date, end_date: date, provider: ClimateDataProvider = None, budget: int = None, rollups_only: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the climate data of Regions into the database one bounded date span at a time
+
+    Each span is fetched, transformed and loaded (and committed) before the next one is fetched, and the
+    DataFrames are released as soon as they are transformed, so memory use does not grow with the range.
+
+    Parameters:
+        regions (List[Region]): Regions fetched together, in batched requests.
+        start_date (date): The first date to fetch.
+        end_date (date): The last date to fetch.
+        provider (ClimateDataProvider): Provider used for the requests (optional).
+        budget (int): Memory budget in bytes (optional, defaults to the INGESTION_MEMORY_BUDGET_MB setting).
+        rollups_only (bool): Only update the monthly rollups of the loaded months, the caller then calls
+            update_region_data for the Regions (default: False).
+
+    Yields:
+        Dict: Statistics of each loaded span, with 'start_date', 'end_date', 'readings', 'fetch_seconds' and 'load_seconds'.
+    """
+    provider = provider or ClimateDataProvider()
+    region_lookup = {f"{region.latitude},{region.longitude}": region for region in regions}
+
+    # The tile cache fetches and holds the whole years of a span, so spans are planned in years
+    whole_years = isinstance(getattr(provider, 'tile_cache', None), BaseCache)
+    for span_start, span_end in date_spans(start_date, end_date, len(regions), budget, whole_years):
+        started = time.monotonic()
+        climate_data = provider.get_climate_data(
+            latitude=[region.latitude for region in regions],
+            longitude=[region.longitude for region in regions],
+            start_date=span_start.strftime("%Y-%m-%d"),
+            end_date=span_end.strftime("%Y-%m-%d")
+        )
+        fetched = time.monotonic()
+
+        # Transform each Region's data into columns, dropping each DataFrame once it is transformed
+        region_columns = {}
+        while climate_data:
+            coord_key, df = climate_data.popitem()
+            region_columns[region_lookup[coord_key].id] = climate_data_columns(df)[0]
+
+        load_stats = load_climate_columns(region_columns, rollups_only)
+        # Release the columns before handing control back to the caller
+        del region_columns
+
+        yield {
+            'start_date': span_start,
+            'end_date': span_end,
+            'readings': load_stats['rows'],
+            'fetch_seconds': fetched - started,
+            'load_seconds': time.monotonic() - fetched,
+        }
+
+def year_range(year: int, end_date: date) -> Tuple[date, date]:
+    """
+    Get the dates of a calendar year, up to an end date
+    """
+    return date(year, 1, 1), min(date(year, 12, 31), end_date)
+
+def plan_backfill(region_ids: List[int], years: List[int], end_date: date, finished: Set[Tuple[int, int]], chunk_size: int = None, skip_loaded: bool = True) -> Tuple[List[Tuple[int, List[int]]], Set[Tuple[int, int]]]:
+    """
+    Split a backfill into units of one year for a batch of Regions, skipping the years already loaded
+
+    Years with a reading for every day are skipped even without a checkpoint, for example the last year
+    loaded by the regular ingestion.
+
+    Parameters:
+        region_ids (List[int]): Ids of the Regions to backfill.
+        years (List[int]): Calendar years to load.
+        end_date (date): The last date that may be fetched.
+        finished (Set[Tuple[int, int]]): Checkpointed (region_id, year) pairs.
+        chunk_size (int): Most Regions fetched together in a unit (optional, defaults to the INGESTION_CHUNK_SIZE
+            setting, capped by the memory budget).
+        skip_loaded (bool): Whether years with a reading for every day are skipped (default: True).
+
+    Returns:
+        Tuple: (units: (List[Tuple[int, List[int]]]) (year, region ids) of each unit, oldest first,
+            complete: (Set[Tuple[int, int]]) (region_id, year) pairs that were complete without a checkpoint)
+    """
+    chunk_size = max(1, min(chunk_size or settings.INGESTION_CHUNK_SIZE, max_chunk_regions()))
+
+    # Days loaded of each Region and year, in one grouped query
+    loaded_days = {}
+    if skip_loaded and years:
+        loaded_days = {
+            (row['region_id'], row['year']): row['days']
+            for row in ClimateReading.objects.filter(
+                region_id__in=region_ids, date__gte=date(min(years), 1, 1), date__lte=end_date
+            ).annotate(year=ExtractYear('date')).values('region_id', 'year').annotate(days=Count('id'))
+        }
+
+    units = []
+    complete = set()
+    for year in sorted(years):
+        start_date, last_date = year_range(year, end_date)
+        pending = []
+        for region_id in region_ids:
+            if (region_id, year) in finished:
+                continue
+            if loaded_days.get((region_id, year), 0) >= (last_date - start_date).days + 1:
+                complete.add((region_id, year))
+            else:
+                pending.append(region_id)
+        units.extend((year, pending[i:i + chunk_size]) for i in range(0, len(pending), chunk_size))
+
+    return units, complete
+
+def backfill_unit(year: int, region_ids: List[int], end_date: date) -> Tuple[int, List[int], int]:
+    """
+    Load one year of climate data for a batch of Regions in batched requests, and checkpoint it if the year is over
+
+    Only the monthly rollups are updated, finish_backfill updates the rest once every year of a Region is loaded.
+
+    Parameters:
+        year (int): The calendar year to load.
+        region_ids (List[int]): Ids of the Regions.
+        end_date (date): The last date that may be fetched.
+
+    Returns:
+        Tuple: (year, region_ids, readings loaded)
+    """
+    regions = list(Region.objects.filter(id__in=region_ids))
+    start_date, last_date = year_range(year, end_date)
+    # Backfills run outside Celery, so they wait for the rate limiter however long it takes
+    provider = ClimateDataProvider(max_wait=0)
+    readings = sum(span['readings'] for span in ingest_regions(regions, start_date, last_date, provider, rollups_only=True))
+
+    # A year that is not over yet is loaded again by the next backfill
+    if last_date == date(year, 12, 31):
+        year_readings = dict(
+            ClimateReading.objects.filter(region__in=regions, date__gte=start_date, date__lte=last_date)
+            .values('region_id').annotate(days=Count('id')).values_list('region_id', 'days')
+        )
+        for region in regions:
+            BackfillCheckpoint.objects.update_or_create(region=region, year=year, defaults={'readings_loaded': year_readings.get(region.id, 0)})
+
+    return year, region_ids, readings
+
+def finish_backfill(region_id: int, from_date: date) -> int:
+    """
+    Update the score index, data watermark and cached series of a Region once all its backfilled years are loaded
+
+    Years are loaded before the days already indexed, so this recomputes the index and rebuilds the series
+    once per Region rather than after every year.
+
+    Parameters:
+        region_id (int): Id of the Region.
+        from_date (date): First day of the earliest year loaded.
+
+    Returns:
+        int: The Region id
+    """
+    update_region_data({region_id: from_date})
+    return region_id
@@ -1,24 +1,114 @@
+import hashlib
+import random
 import openmeteo_requests
-import requests_cache
+import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
 from retry_requests import retry
-from typing import List, Dict
+from datetime import date
+from main.lib.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded, request_weight
+from main.lib.open_meteo_replay import RecordingAdapter, ReplayAdapter
+from typing import List, Dict, Optional
 from openmeteo_sdk import WeatherApiResponse
 
+CLIMATE_API_URL = "https://climate-api.open-meteo.com/v1/climate"
+CLIMATE_API_PREFIX = "https://climate-api.open-meteo.com/"
+CLIMATE_MODEL = "MRI_AGCM3_2_S"
+
+# Cache alias holding the response tiles shared by all processes
+TILE_CACHE = "climate_tiles"
+
+# How requests are answered: by the API, by the API while saving the responses, from saved responses, or from generated data
+PROVIDER_MODES = ["live", "record", "replay", "synthetic"]
+
+# Number of times a batch is sent again after the API answered 429
+RATE_LIMIT_RETRIES = 5
+
+# Tiles are cached for a random 75-100% of the cache duration, so tiles fetched together do not expire together
+TILE_TTL_JITTER = 0.25
+
+def _raise_rate_limited(response, *args, **kwargs):
+    """Session hook turning 429 responses into RateLimitExceeded, keeping the Retry-After header"""
+    if response.status_code == 429:
+        retry_after = response.headers.get("Retry-After")
+        raise RateLimitExceeded(float(retry_after) if retry_after and retry_after.isdigit() else None)
+
+def tile_cache_enabled(mode: str = None, cache_duration: int = None) -> bool:
+    """Check if responses are fetched and cached as whole-year tiles
+
+    Parameters:
+        mode: One of PROVIDER_MODES (default: OPEN_METEO_MODE setting, 'live')
+        cache_duration: Cache duration of response tiles in seconds, 0 disables caching (optional)
+    """
+    mode = mode or getattr(settings, 'OPEN_METEO_MODE', 'live')
+    return mode == "live" and cache_duration != 0 and TILE_CACHE in settings.CACHES
+
 class ClimateDataProvider:
     """Class to handle fetching and processing climate data from Open-Meteo API"""
     
-    def __init__(self, cache_duration=3600):
+    def __init__(self, cache_duration=None, batch_size=None, workers=None, rate_limiter=None, mode=None, recordings_dir=None, replay_latency=None, max_wait=None):
         """Initialize the climate data provider with cache configuration
         
         Parameters:
-            cache_duration: Cache duration in seconds (default: 1 hour)
+            cache_duration: Cache duration of response tiles in seconds (default: timeout of the climate_tiles cache, 0 disables caching)
+            batch_size: Maximum number of locations sent in one request (default: OPEN_METEO_BATCH_SIZE setting)
+            workers: Maximum number of requests in flight at once (default: OPEN_METEO_WORKERS setting)
+            rate_limiter: Limiter shared by requests to the API (default: OPEN_METEO_RATE_LIMIT calls per minute and the hourly and daily limits, shared through Redis)
+            mode: One of PROVIDER_MODES (default: OPEN_METEO_MODE setting, 'live')
+            recordings_dir: Directory of recorded responses in record and replay mode (default: OPEN_METEO_RECORDINGS_DIR setting)
+            replay_latency: Seconds added to each replayed or synthetic request (default: OPEN_METEO_REPLAY_LATENCY setting)
+            max_wait: Longest wait for the rate limiter in seconds before RateLimitExceeded is raised, 0 waits as long as needed (default: OPEN_METEO_MAX_WAIT setting)
         """
-        # Setup the API client with cache and retry
-        cache_session = requests_cache.CachedSession('.cache', expire_after=cache_duration)
-        retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
+        self.batch_size = max(1, batch_size or getattr(settings, 'OPEN_METEO_BATCH_SIZE', 50))
+        self.workers = max(1, workers or getattr(settings, 'OPEN_METEO_WORKERS', 1))
+        self.mode = mode or getattr(settings, 'OPEN_METEO_MODE', 'live')
+        if self.mode not in PROVIDER_MODES:
+            raise ValueError(f"Invalid climate provider mode '{self.mode}'. Valid modes are: {', '.join(PROVIDER_MODES)}")
+        recordings_dir = recordings_dir or getattr(settings, 'OPEN_METEO_RECORDINGS_DIR', None)
+        if self.mode in ["record", "replay"] and not recordings_dir:
+            raise ValueError(f"A recordings directory is required in {self.mode} mode")
+        
+        # Responses are cached as year tiles shared by all processes, when the tile cache is configured.
+        # Only live responses are cached, so recordings hold the requests as made and replays never fill the shared cache.
+        self.tile_cache = caches[TILE_CACHE] if tile_cache_enabled(self.mode, cache_duration) else None
+        self.tile_timeout = self.tile_cache.default_timeout if self.tile_cache is not None and cache_duration is None else cache_duration
+        
+        # Setup the API client with retry
+        retry_session = retry(requests.Session(), retries=5, backoff_factor=0.2)
+        if self.workers > 1:
+            # Pool a connection to the API host per worker, keeping the same retry policy
+            for prefix, adapter in list(retry_session.adapters.items()):
+                retry_session.mount(prefix, HTTPAdapter(max_retries=adapter.max_retries, pool_maxsize=self.workers))
+        if self.mode == "record":
+            # Save every API response body while passing it on
+            adapter = retry_session.get_adapter(CLIMATE_API_PREFIX)
+            retry_session.mount(CLIMATE_API_PREFIX, RecordingAdapter(recordings_dir, max_retries=adapter.max_retries, pool_maxsize=self.workers))
+        elif self.mode in ["replay", "synthetic"]:
+            # Answer requests without network access, generating the responses that were not recorded in synthetic mode
+            retry_session.mount(CLIMATE_API_PREFIX, ReplayAdapter(
+                recordings_dir,
+                replay_latency if replay_latency is not None else getattr(settings, 'OPEN_METEO_REPLAY_LATENCY', 0),
+                synthetic=self.mode == "synthetic"
+            ))
+        retry_session.hooks["response"].append(_raise_rate_limited)
         self.client = openmeteo_requests.Client(session=retry_session)
         
+        # Keep requests under the API quota across all workers, replayed requests do not count against it
+        if self.mode in ["live", "record"]:
+            self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+                "open-meteo",
+                getattr(settings, 'OPEN_METEO_RATE_LIMIT', 500),
+                getattr(settings, 'RATE_LIMIT_REDIS_URL', None),
+                hourly_limit=getattr(settings, 'OPEN_METEO_HOURLY_LIMIT', None),
+                daily_limit=getattr(settings, 'OPEN_METEO_DAILY_LIMIT', None),
+                max_wait=getattr(settings, 'OPEN_METEO_MAX_WAIT', 60) if max_wait is None else max_wait
+            )
+        else:
+            self.rate_limiter = rate_limiter
+        
     def get_climate_data(self, latitude: float, longitude: float, start_date: str, end_date: str, variables: List[str]=None) -> Dict[str, pd.DataFrame]:
         """Fetch climate data for one or multiple Regions
         
@@ -46,30 +136,145 @@ class ClimateDataProvider:
         if len(lats) != len(lons):
             raise ValueError("Latitude and longitude lists must have the same length")
         
-        results = {}
+        if self.tile_cache is None:
+            return self._fetch_range(lats, lons, start_date, end_date, variables)
+        return self._get_from_tiles(lats, lons, start_date, end_date, variables)
+    
+    def _get_from_tiles(self, lats: List[float], lons: List[float], start_date: str, end_date: str, variables: List[str]) -> Dict[str, pd.DataFrame]:
+        """Assemble climate data for a date range from cached year tiles, fetching only the missing tiles
         
-        # Process each region
-        for lat, lon in zip(lats, lons):
-            # Configure API request parameters
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "start_date": start_date,
-                "end_date": end_date,
-                "models": "MRI_AGCM3_2_S",
-                "daily": variables
-            }
+        Parameters:
+            lats: List of latitudes
+            lons: List of longitudes
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            variables: List of weather variables to fetch
             
-            # Make API request
-            url = "https://climate-api.open-meteo.com/v1/climate"
-            responses = self.client.weather_api(url, params=params)
+        Returns:
+            Dictionary of pandas DataFrames keyed by region coordinates
+        """
+        years = range(int(start_date[:4]), int(end_date[:4]) + 1)
+        keys = {(lat, lon, year): self._tile_key(lat, lon, year, variables) for lat, lon in zip(lats, lons) for year in years}
+        tiles = self.tile_cache.get_many(keys.values())
+        
+        # Fetch whole years of the missing tiles, locations missing the same year share batched requests
+        for year in years:
+            missing = [(lat, lon) for lat, lon in zip(lats, lons) if keys[(lat, lon, year)] not in tiles]
+            if not missing:
+                continue
+            fetched = self._fetch_range(
+                [lat for lat, lon in missing], [lon for lat, lon in missing], f"{year}-01-01", f"{year}-12-31", variables
+            )
+            new_tiles = {keys[(lat, lon, year)]: fetched[f"{lat},{lon}"] for lat, lon in missing}
+            for key, tile in new_tiles.items():
+                self.tile_cache.set(key, tile, timeout=self._tile_ttl())
+            tiles.update(new_tiles)
+        
+        # Join each location's tiles and cut them to the requested range
+        results = {}
+        for lat, lon in zip(lats, lons):
+            frame = pd.concat([tiles[keys[(lat, lon, year)]] for year in years], ignore_index=True)
+            days = frame["date"].dt.strftime("%Y-%m-%d")
+            results[f"{lat},{lon}"] = frame[(days >= start_date) & (days <= end_date)].reset_index(drop=True)
+        
+        return results
+    
+    def _tile_ttl(self) -> Optional[float]:
+        """Get the cache duration of a new tile, spread so tiles fetched together are not fetched again together"""
+        if self.tile_timeout is None:
+            return None
+        return self.tile_timeout * random.uniform(1 - TILE_TTL_JITTER, 1)
+    
+    def _tile_key(self, lat: float, lon: float, year: int, variables: List[str]) -> str:
+        """Build the cache key of a year tile"""
+        variables_key = hashlib.md5(",".join(sorted(variables)).encode()).hexdigest()[:12]
+        return f"climate_tile:{CLIMATE_MODEL}:{lat}:{lon}:{variables_key}:{year}"
+    
+    def _fetch_range(self, lats: List[float], lons: List[float], start_date: str, end_date: str, variables: List[str]) -> Dict[str, pd.DataFrame]:
+        """Fetch climate data for locations from the API, in batches sent concurrently
+        
+        Parameters:
+            lats: List of latitudes
+            lons: List of longitudes
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            variables: List of weather variables to fetch
             
-            # Process the response
-            region_key = f"{lat},{lon}"
-            results[region_key] = self._process_response(responses[0], variables)
+        Returns:
+            Dictionary of pandas DataFrames keyed by region coordinates
+        """
+        results = {}
+        
+        # Send the locations in batches, one request returns a response per location
+        batches = [(lats[i:i + self.batch_size], lons[i:i + self.batch_size]) for i in range(0, len(lats), self.batch_size)]
+        
+        def fetch(batch):
+            return self._fetch_batch(batch[0], batch[1], start_date, end_date, variables)
+        
+        if self.workers > 1 and len(batches) > 1:
+            # Fetch batches concurrently, results are still collected in the order of the batches
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                batch_results = list(executor.map(fetch, batches))
+        else:
+            batch_results = map(fetch, batches)
+        
+        for batch_result in batch_results:
+            results.update(batch_result)
         
         return results
     
+    def _fetch_batch(self, lats: List[float], lons: List[float], start_date: str, end_date: str, variables: List[str]) -> Dict[str, pd.DataFrame]:
+        """Fetch climate data for a batch of locations in a single request
+        
+        Parameters:
+            lats: List of latitudes
+            lons: List of longitudes
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            variables: List of weather variables to fetch
+            
+        Returns:
+            Dictionary of pandas DataFrames keyed by region coordinates
+        """
+        # Configure API request parameters, multiple locations are comma separated
+        params = {
+            "latitude": ",".join(str(lat) for lat in lats),
+            "longitude": ",".join(str(lon) for lon in lons),
+            "start_date": start_date,
+            "end_date": end_date,
+            "models": CLIMATE_MODEL,
+            "daily": variables
+        }
+        
+        # Requests count against the quota by number of locations, days and variables
+        days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+        weight = request_weight(len(lats), days, len(variables))
+        
+        # Make API request, waiting for the rate limiter and backing off when the quota is exceeded
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire(weight)
+            try:
+                responses = self.client.weather_api(CLIMATE_API_URL, params=params)
+            except RateLimitExceeded as error:
+                if self.rate_limiter:
+                    self.rate_limiter.rate_limited(error.retry_after)
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                continue
+            if self.rate_limiter:
+                self.rate_limiter.success()
+            break
+        
+        # Responses are returned in the order of the requested locations
+        if len(responses) != len(lats):
+            raise ValueError(f"Expected {len(lats)} responses from the climate API, got {len(responses)}")
+        
+        return {
+            f"{lat},{lon}": self._process_response(response, variables)
+            for lat, lon, response in zip(lats, lons, responses)
+        }
+    
     def _process_response(self, response: WeatherApiResponse, variables: List[str]) -> pd.DataFrame:
         """Process API response into a pandas DataFrame
         
@@ -0,0 +1,178 @@
+import hashlib
+import os
+import time
+import zlib
+import flatbuffers
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib.parse import urlsplit, parse_qs
+from typing import Dict, List
+
+# Typical (mean, seasonal amplitude, daily noise, min, max) of each daily variable, used by the synthetic generator
+SYNTHETIC_VARIABLES = {
+    "temperature_2m_mean": (15.0, 8.0, 2.0, -40.0, 50.0),
+    "temperature_2m_max": (21.0, 9.0, 2.5, -35.0, 55.0),
+    "temperature_2m_min": (9.0, 7.0, 2.0, -45.0, 45.0),
+    "cloud_cover_mean": (45.0, 15.0, 20.0, 0.0, 100.0),
+    "relative_humidity_2m_mean": (65.0, 10.0, 8.0, 5.0, 100.0),
+    "relative_humidity_2m_max": (85.0, 8.0, 6.0, 10.0, 100.0),
+    "relative_humidity_2m_min": (45.0, 10.0, 8.0, 1.0, 100.0),
+    "precipitation_sum": (2.0, 1.5, 4.0, 0.0, 200.0),
+    "soil_moisture_0_to_10cm_mean": (0.25, 0.05, 0.03, 0.0, 0.6),
+}
+
+def request_key(params: Dict[str, List[str]]) -> str:
+    """Build the file name of a recorded response from its query parameters
+
+    Parameters:
+        params: Query parameters as parsed by parse_qs, the response format is ignored
+    """
+    canonical = "&".join(f"{name}={','.join(values)}" for name, values in sorted(params.items()) if name != "format")
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+def _query(request: requests.PreparedRequest) -> Dict[str, List[str]]:
+    """Get the query parameters of a request"""
+    return parse_qs(urlsplit(request.url).query)
+
+def _response(request: requests.PreparedRequest, status_code: int, content: bytes) -> requests.Response:
+    """Build a response to a request without sending it"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers["Content-Type"] = "application/octet-stream" if status_code == 200 else "application/json"
+    response.url = request.url
+    response.request = request
+    return response
+
+def _synthetic_values(variable: str, latitude: float, longitude: float, days: pd.DatetimeIndex) -> np.ndarray:
+    """Generate a plausible, repeatable daily series of a variable for a location"""
+    mean, amplitude, noise, lowest, highest = SYNTHETIC_VARIABLES.get(variable, (0.0, 1.0, 1.0, -np.inf, np.inf))
+
+    # Seasons are reversed in the Southern Hemisphere
+    phase = 0 if latitude >= 0 else np.pi
+    season = np.cos(2 * np.pi * (days.dayofyear.to_numpy() - 200) / 365.25 + phase)
+
+    # Seed from the location, variable and first day so the same request always gets the same values
+    seed = zlib.crc32(f"{latitude},{longitude},{variable},{days[0].date() if len(days) else ''}".encode())
+    random = np.random.default_rng(seed).normal(0, noise, len(days))
+    return np.clip(mean + amplitude * season + random, lowest, highest).astype(np.float32)
+
+def synthetic_response(latitudes: List[float], longitudes: List[float], start_date: str, end_date: str, variables: List[str]) -> bytes:
+    """Generate a climate API response for any locations and dates, encoded like the real API
+
+    The body holds one size-prefixed WeatherApiResponse FlatBuffers message per location, with a daily
+    series for each requested variable, so it goes through the same decoding as live responses.
+
+    Parameters:
+        latitudes: List of latitudes
+        longitudes: List of longitudes
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        variables: List of daily weather variables
+
+    Returns:
+        The response body
+    """
+    days = pd.date_range(start_date, end_date, freq="D")
+    start = int(pd.Timestamp(start_date).timestamp())
+
+    messages = []
+    for latitude, longitude in zip(latitudes, longitudes):
+        builder = flatbuffers.Builder(1024 + len(days) * len(variables) * 4)
+
+        # VariableWithValues tables, one per variable (values vector in slot 3)
+        variable_offsets = []
+        for variable in variables:
+            values = builder.CreateNumpyVector(_synthetic_values(variable, latitude, longitude, days))
+            builder.StartObject(7)
+            builder.PrependUOffsetTRelativeSlot(3, values, 0)
+            variable_offsets.append(builder.EndObject())
+
+        builder.StartVector(4, len(variable_offsets), 4)
+        for offset in reversed(variable_offsets):
+            builder.PrependUOffsetTRelative(offset)
+        variables_vector = builder.EndVector()
+
+        # VariablesWithTime table: time, time end, interval and variables
+        builder.StartObject(4)
+        builder.PrependInt64Slot(0, start, 0)
+        builder.PrependInt64Slot(1, start + len(days) * 86400, 0)
+        builder.PrependInt32Slot(2, 86400, 0)
+        builder.PrependUOffsetTRelativeSlot(3, variables_vector, 0)
+        daily = builder.EndObject()
+
+        # WeatherApiResponse table: latitude, longitude and the daily series (slot 10)
+        builder.StartObject(11)
+        builder.PrependFloat32Slot(0, latitude, 0.0)
+        builder.PrependFloat32Slot(1, longitude, 0.0)
+        builder.PrependUOffsetTRelativeSlot(10, daily, 0)
+        builder.Finish(builder.EndObject())
+
+        message = bytes(builder.Output())
+        messages.append(len(message).to_bytes(4, byteorder="little") + message)
+
+    return b"".join(messages)
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter saving the raw body of every successful API response to a directory"""
+
+    def __init__(self, directory: str, **kwargs):
+        """
+        Parameters:
+            directory: Directory the responses are saved in, one file per distinct request
+            **kwargs: Passed to HTTPAdapter, such as max_retries
+        """
+        super().__init__(**kwargs)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 200:
+            # Write to a temporary file first so replays never read a partial recording
+            path = os.path.join(self.directory, f"{request_key(_query(request))}.fb")
+            with open(f"{path}.tmp", "wb") as recording:
+                recording.write(response.content)
+            os.replace(f"{path}.tmp", path)
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """Transport adapter answering API requests from recordings or synthetic data, without network access"""
+
+    def __init__(self, directory: str = None, latency: float = 0, synthetic: bool = False):
+        """
+        Parameters:
+            directory: Directory of recorded responses (optional)
+            latency: Seconds to wait before answering each request, to mimic the live API (default: 0)
+            synthetic: Generate responses for requests that were not recorded (default: False)
+        """
+        super().__init__()
+        self.directory = directory
+        self.latency = latency
+        self.synthetic = synthetic
+
+    def send(self, request, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+
+        params = _query(request)
+        path = os.path.join(self.directory, f"{request_key(params)}.fb") if self.directory else None
+        if path and os.path.exists(path):
+            with open(path, "rb") as recording:
+                return _response(request, 200, recording.read())
+
+        if self.synthetic:
+            return _response(request, 200, synthetic_response(
+                [float(value) for value in params["latitude"][0].split(",")],
+                [float(value) for value in params["longitude"][0].split(",")],
+                params["start_date"][0],
+                params["end_date"][0],
+                params["daily"]
+            ))
+
+        return _response(request, 404, b'{"error": true, "reason": "No recorded response for this request"}')
+
+    def close(self):
+        pass
@@ -0,0 +1,116 @@
+import re
+from datetime import date
+from django.conf import settings
+from django.db import connection
+from main.models import ClimateReading
+from main.lib.climate_data_functions import remove_climate_data_before
+from typing import List, Tuple
+
+# On PostgreSQL the readings table is range partitioned by date, one partition per calendar year (see migration 0016)
+PARTITIONED_TABLE = ClimateReading._meta.db_table
+
+def partition_name(year: int) -> str:
+    """
+    Get the name of the readings partition of a year
+    """
+    return f"{PARTITIONED_TABLE}_y{year}"
+
+def is_partitioned() -> bool:
+    """
+    Check if the readings table is partitioned, it is not on other databases than PostgreSQL
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [PARTITIONED_TABLE])
+        return cursor.fetchone() is not None
+
+def partition_years() -> List[int]:
+    """
+    Get the years of the partitions attached to the readings table, in order
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [PARTITIONED_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    pattern = re.compile(rf"^{re.escape(PARTITIONED_TABLE)}_y(\d{{4}})$")
+    return sorted(int(match.group(1)) for match in map(pattern.match, names) if match)
+
+def plan_partitions(existing_years: List[int], today: date, years_ahead: int, retention_years: int = None) -> Tuple[List[int], List[int]]:
+    """
+    Plan the yearly partitions to create and to detach
+
+    Parameters:
+        existing_years (List[int]): Years of the attached partitions.
+        today (date): The current date.
+        years_ahead (int): Number of years after the current one that must have a partition.
+        retention_years (int): Number of years of readings kept attached, including the current one (optional, defaults to keeping every year).
+
+    Returns:
+        Tuple: (years to create, years to detach)
+    """
+    # Past years were partitioned by the migration, only the current and coming years are created
+    create = [year for year in range(today.year, today.year + years_ahead + 1) if year not in existing_years]
+
+    detach = []
+    if retention_years:
+        first_kept = today.year - retention_years + 1
+        detach = [year for year in existing_years if year < first_kept]
+    return create, detach
+
+def create_partition(year: int):
+    """
+    Create the readings partition of a year, if it does not exist yet
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote(partition_name(year))} PARTITION OF {quote(PARTITIONED_TABLE)} "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+
+def detach_partition(year: int):
+    """
+    Detach the readings partition of a year
+
+    The readings leave the table without a bulk DELETE, the partition is kept as a standalone table
+    that can be archived or dropped. Data derived from the readings is not touched, see remove_climate_data_before.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote(PARTITIONED_TABLE)} DETACH PARTITION {quote(partition_name(year))}")
+
+        # The detached table keeps its own copy of the foreign keys, which would stop its Regions from being deleted
+        cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [partition_name(year)])
+        for (name,) in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {quote(partition_name(year))} DROP CONSTRAINT {quote(name)}")
+
+def maintain_partitions(today: date = None) -> Tuple[List[int], List[int]]:
+    """
+    Create the partitions of the coming years and detach the partitions of expired years
+
+    Once years are detached, the rollups, score index, series and cached results derived from them are removed.
+    Uses the CLIMATE_PARTITION_YEARS_AHEAD and CLIMATE_READING_RETENTION_YEARS settings.
+
+    Returns:
+        Tuple: (years created, years detached), both empty if the readings table is not partitioned
+    """
+    if not is_partitioned():
+        return [], []
+
+    create, detach = plan_partitions(
+        partition_years(),
+        today or date.today(),
+        getattr(settings, 'CLIMATE_PARTITION_YEARS_AHEAD', 2),
+        getattr(settings, 'CLIMATE_READING_RETENTION_YEARS', None)
+    )
+    for year in create:
+        create_partition(year)
+    for year in detach:
+        detach_partition(year)
+    if detach:
+        remove_climate_data_before(max(detach) + 1)
+    return create, detach
@@ -0,0 +1,217 @@
+import logging
+import threading
+import time
+import redis
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fraction of the rate that caused a 429 the limiter settles at, so it stays just under the quota
+CEILING_MARGIN = 0.9
+
+# How long a rate that caused a 429 is remembered before probing up to the configured rate again (seconds)
+CEILING_TTL = 60 * 60
+
+# Additive increase of the rate after each successful request, as a fraction of the configured rate
+RATE_INCREASE = 0.05
+
+# Lowest rate the limiter backs off to, as a fraction of the configured rate
+MIN_RATE = 0.05
+
+# Pause after a 429 that did not include a Retry-After header (seconds)
+DEFAULT_RETRY_AFTER = 60
+
+# Lengths of the quota windows limited besides the per-minute rate, an hour and a day (seconds)
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# How long to use the local state after Redis could not be reached (seconds)
+REDIS_RETRY_INTERVAL = 60
+
+# Limiter states of this process used when Redis is unavailable, keyed by Redis key
+_local_states = {}
+_local_lock = threading.Lock()
+
+class RateLimitExceeded(Exception):
+    """Raised when the API rejected a request because the quota was exceeded"""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+def request_weight(locations: int, days: int, variables: int) -> float:
+    """Get the quota cost of an Open-Meteo request
+
+    Requests with more than 10 variables or 2 weeks of data per location count as multiple calls.
+
+    Parameters:
+        locations: Number of locations in the request
+        days: Number of days requested
+        variables: Number of variables requested
+
+    Returns:
+        The number of calls counted against the quota
+    """
+    return locations * max(1.0, variables / 10) * max(1.0, days / 14)
+
+class AdaptiveRateLimiter:
+    """Token bucket limiting the weighted rate of API calls, shared by all workers through Redis
+
+    The bucket refills at the current rate, which backs off when the API answers 429 and then climbs back
+    towards just under the rate that was rejected, instead of repeatedly exceeding the quota.
+    Hourly and daily quotas are counted in fixed clock windows, requests wait for the next window once one is used up.
+    Waits longer than max_wait raise RateLimitExceeded instead, so Celery workers retry later rather than block.
+    Falls back to state local to the process when Redis is not configured or cannot be reached.
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, redis_url: str = None, burst_seconds: float = 10,
+                 hourly_limit: float = None, daily_limit: float = None, max_wait: float = None):
+        """Initialize the limiter
+
+        Parameters:
+            name: Name of the limited API, used in the Redis key
+            rate_per_minute: Highest weighted rate allowed (calls per minute)
+            redis_url: Redis holding the shared state (optional, state is local to the process without it)
+            burst_seconds: Seconds of calls that can be made at once after being idle (default: 10)
+            hourly_limit: Weighted calls allowed per clock hour (optional, no hourly quota without it)
+            daily_limit: Weighted calls allowed per day, in UTC (optional, no daily quota without it)
+            max_wait: Longest wait in seconds before a request raises RateLimitExceeded (optional, waits as long as needed without it)
+        """
+        self.key = f"rate_limit:{name}"
+        self.max_rate = rate_per_minute / 60
+        self.capacity = self.max_rate * burst_seconds
+        self.quotas = [(window, limit) for window, limit in [(HOUR, hourly_limit), (DAY, daily_limit)] if limit]
+        self.redis = redis.Redis.from_url(redis_url, socket_connect_timeout=1, socket_timeout=1) if redis_url else None
+        self.max_wait = max_wait
+        self._redis_down_until = 0
+
+    def acquire(self, weight: float):
+        """Block until a request of the given weight can be made
+
+        Requests heavier than the bucket capacity wait for a full bucket and leave it in debt,
+        so the average rate is still respected. A request that would wait longer than max_wait
+        raises RateLimitExceeded with the wait as retry_after instead.
+
+        Parameters:
+            weight: The quota cost of the request, see request_weight
+        """
+        while True:
+            wait = self._transact(lambda state, now: self._take(state, now, weight))
+            if wait <= 0:
+                return
+            if self.max_wait and wait > self.max_wait:
+                raise RateLimitExceeded(wait)
+            time.sleep(wait)
+
+    def success(self):
+        """Record a successful request, increasing the rate towards its target"""
+        self._transact(self._increase)
+
+    def rate_limited(self, retry_after: Optional[float] = None):
+        """Record a rejected request, halving the rate and pausing until the API accepts requests again
+
+        Requests that were in flight when the limiter backed off are rejected too, their 429s belong to
+        the same backoff and do not lower the rate again.
+
+        Parameters:
+            retry_after: Seconds to wait given by the API (optional)
+        """
+        self._transact(lambda state, now: self._decrease(state, now, retry_after))
+
+    def current_rate(self) -> float:
+        """Get the current rate in calls per minute"""
+        def rate(state, now):
+            self._refill(state, now)
+            return state['rate']
+        return self._transact(rate) * 60
+
+    def _take(self, state: Dict[str, float], now: float, weight: float) -> float:
+        """
+        Take tokens for a request, returning 0 on success or the seconds to wait before trying again
+        """
+        self._refill(state, now)
+        if now < state['paused_until']:
+            return state['paused_until'] - now
+
+        # Wait for the next window of a used up hourly or daily quota, a request heavier than a whole quota waits for an empty window
+        for window, limit in self.quotas:
+            window_start = now - now % window
+            if state.get(f'window_{window}_start') != window_start:
+                state[f'window_{window}_start'] = window_start
+                state[f'window_{window}_used'] = 0
+            used = state[f'window_{window}_used']
+            if used > 0 and used + weight > limit:
+                return window_start + window - now
+
+        needed = min(weight, self.capacity)
+        if state['tokens'] >= needed:
+            state['tokens'] -= weight
+            for window, limit in self.quotas:
+                state[f'window_{window}_used'] += weight
+            return 0
+        return (needed - state['tokens']) / state['rate']
+
+    def _increase(self, state: Dict[str, float], now: float):
+        """
+        Additively increase the rate, up to just under the last rejected rate while it is remembered
+        """
+        self._refill(state, now)
+        target = self.max_rate
+        if state['ceiling'] and now - state['ceiling_at'] < CEILING_TTL:
+            target = min(target, state['ceiling'] * CEILING_MARGIN)
+        state['rate'] = max(state['rate'], min(target, state['rate'] + self.max_rate * RATE_INCREASE))
+
+    def _decrease(self, state: Dict[str, float], now: float, retry_after: Optional[float]):
+        """
+        Multiplicatively decrease the rate and remember the rejected rate
+        """
+        self._refill(state, now)
+        if now < state['paused_until']:
+            # Already backing off, only honour a longer pause asked for by the API
+            if retry_after is not None:
+                state['paused_until'] = max(state['paused_until'], now + retry_after)
+            return
+
+        # The highest rate rejected within the TTL is kept, a lower rate rejected later does not pull it down
+        if state['ceiling'] and now - state['ceiling_at'] < CEILING_TTL:
+            state['ceiling'] = max(state['ceiling'], state['rate'])
+        else:
+            state['ceiling'] = state['rate']
+        state['ceiling_at'] = now
+        state['rate'] = max(self.max_rate * MIN_RATE, state['rate'] / 2)
+        state['tokens'] = min(state['tokens'], 0)
+        state['paused_until'] = max(state['paused_until'], now + (retry_after if retry_after is not None else DEFAULT_RETRY_AFTER))
+
+    def _refill(self, state: Dict[str, float], now: float):
+        """
+        Add the tokens earned since the state was last updated
+        """
+        if not state:
+            state.update(tokens=self.capacity, rate=self.max_rate, updated_at=now, paused_until=0, ceiling=0, ceiling_at=0)
+        state['tokens'] = min(self.capacity, state['tokens'] + (now - state['updated_at']) * state['rate'])
+        state['updated_at'] = now
+
+    def _transact(self, update: Callable[[Dict[str, float], float], float]):
+        """
+        Apply an update to the limiter state atomically, in Redis when it is available
+        """
+        if self.redis is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                return self.redis.transaction(lambda pipe: self._redis_update(pipe, update), self.key, value_from_callable=True)
+            except redis.RedisError as error:
+                logger.warning("Rate limiter state not shared, Redis is unavailable: %s", error)
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+
+        with _local_lock:
+            return update(_local_states.setdefault(self.key, {}), time.time())
+
+    def _redis_update(self, pipe: redis.client.Pipeline, update: Callable[[Dict[str, float], float], float]):
+        """
+        Read, update and write back the state in a Redis transaction, retried by redis-py if another worker changed it
+        """
+        state = {key.decode(): float(value) for key, value in pipe.hgetall(self.key).items()}
+        result = update(state, time.time())
+        pipe.multi()
+        pipe.hset(self.key, mapping=state)
+        pipe.expire(self.key, max(CEILING_TTL, DAY) * 2)
+        return result
@@ -0,0 +1,86 @@
+import csv
+import json
+import os
+from django.db import transaction
+from main.models import Region
+from api.region.serializers import RegionSerializer
+from typing import Any, Dict, List, Tuple
+
+# Number of Regions inserted in one INSERT statement
+IMPORT_BATCH_SIZE = 1000
+
+def read_regions_file(path: str) -> List[Dict[str, Any]]:
+    """
+    Read Regions to import from a CSV file with a header row, or a JSON file holding a list of objects
+
+    Parameters:
+        path (str): Path of a .csv or .json file, with name, latitude, longitude and (optional) description of each Region.
+
+    Returns:
+        A list of Region fields for each row, unvalidated.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            return list(csv.DictReader(file))
+    if extension == '.json':
+        with open(path, encoding='utf-8') as file:
+            rows = json.load(file)
+        # Also accept the body of the bulk import endpoint
+        return rows['regions'] if isinstance(rows, dict) else rows
+    raise ValueError(f"Unsupported file type '{extension}', expected .csv or .json")
+
+def validate_regions(rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validate Regions to import, against each other and the existing Regions
+
+    Parameters:
+        rows (List[Dict]): Fields of each Region.
+
+    Returns:
+        Tuple: (validated fields of the valid rows, errors of the invalid rows as {'row': index, 'errors': {field: [messages]}})
+    """
+    # Names and coordinates already taken, loaded in a single query
+    names = set()
+    coordinates = set()
+    for name, latitude, longitude in Region.objects.values_list('name', 'latitude', 'longitude'):
+        names.add(name)
+        coordinates.add((latitude, longitude))
+
+    valid = []
+    errors = []
+    for index, row in enumerate(rows):
+        serializer = RegionSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({'row': index, 'errors': serializer.errors})
+            continue
+
+        region = serializer.validated_data
+        row_errors = {}
+        if region['name'] in names:
+            row_errors['name'] = ["Region with this name already exists."]
+        if (region['latitude'], region['longitude']) in coordinates:
+            row_errors['non_field_errors'] = ["Region with this exact latitude and longitude already exists."]
+        if row_errors:
+            errors.append({'row': index, 'errors': row_errors})
+            continue
+
+        # Later rows must not reuse the name or coordinates of this one
+        names.add(region['name'])
+        coordinates.add((region['latitude'], region['longitude']))
+        valid.append(region)
+
+    return valid, errors
+
+def create_regions(regions: List[Dict[str, Any]]) -> List[Region]:
+    """
+    Insert validated Regions with bulk_create, in a single transaction
+
+    Parameters:
+        regions (List[Dict]): Validated fields of each Region, as returned by validate_regions.
+
+    Returns:
+        The created Regions, with their ids.
+    """
+    with transaction.atomic():
+        return Region.objects.bulk_create([Region(**region) for region in regions], batch_size=IMPORT_BATCH_SIZE)
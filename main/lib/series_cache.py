@@ -0,0 +1,208 @@
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+from datetime import date, datetime
+from django.conf import settings
+from django.db.models import Count, Min, QuerySet
+from main.models import Region, ClimateReading
+from typing import Dict, Optional
+
+# Variables of ClimateReading stored in the cache, one float32 .npy file each (plus date.npy)
+SERIES_FIELDS = [
+    'mean_temperature', 'max_temperature', 'min_temperature',
+    'min_humidity', 'max_humidity', 'mean_humidity',
+    'rain', 'cloud_cover', 'soil_moisture',
+]
+
+# Memory maps opened by this process, keyed by Region id: (version directory, series)
+_mapped = {}
+
+def _cache_dir() -> Optional[str]:
+    """
+    Get the directory holding the series cache, None when the cache is disabled
+    """
+    cache_dir = getattr(settings, 'CLIMATE_SERIES_CACHE_DIR', None)
+    return str(cache_dir) if cache_dir else None
+
+def _watermark(region: Region) -> Optional[float]:
+    """
+    Get the data watermark of a Region as stored in the cache metadata
+    """
+    return region.data_updated_at.timestamp() if region.data_updated_at else None
+
+def _current_version(region_id: int) -> Optional[str]:
+    """
+    Get the directory of the current version of a Region's series, None if it has not been cached
+    """
+    try:
+        return os.path.realpath(os.path.join(_cache_dir(), str(region_id), 'current'), strict=True)
+    except OSError:
+        return None
+
+def _read_version(version_dir: str) -> Dict[str, np.ndarray]:
+    """
+    Memory-map all arrays of a cached version read-only
+    """
+    series = {'date': np.load(os.path.join(version_dir, 'date.npy'), mmap_mode='r')}
+    for field in SERIES_FIELDS:
+        series[field] = np.load(os.path.join(version_dir, f'{field}.npy'), mmap_mode='r')
+    with open(os.path.join(version_dir, 'meta.json')) as meta_file:
+        series['meta'] = json.load(meta_file)
+    return series
+
+def load_series(region: Region) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Get the cached daily series of a Region
+
+    Arrays are memory-mapped read-only, so every worker process shares the same pages of the files.
+
+    Parameters:
+        region (Region): The Region, its data watermark is used to check the cache is up to date.
+
+    Returns:
+        A dictionary with a datetime64 'date' array and a float32 array per variable in SERIES_FIELDS,
+        sorted by date. None when the cache is disabled, missing or out of date.
+    """
+    if not _cache_dir() or region.data_updated_at is None:
+        return None
+
+    version_dir = _current_version(region.id)
+    if version_dir is None:
+        return None
+
+    # Reuse this process' maps unless the files were replaced since they were opened
+    mapped = _mapped.get(region.id)
+    if mapped is None or mapped[0] != version_dir:
+        try:
+            mapped = (version_dir, _read_version(version_dir))
+        except OSError:
+            return None
+        _mapped[region.id] = mapped
+
+    series = mapped[1]
+    if series['meta']['watermark'] != _watermark(region):
+        return None
+    return series
+
+def _write_version(region: Region, series: Dict[str, np.ndarray]):
+    """
+    Write a new version of a Region's series and atomically make it the current one
+    """
+    region_dir = os.path.join(_cache_dir(), str(region.id))
+    version_dir = os.path.join(region_dir, uuid.uuid4().hex)
+    os.makedirs(version_dir)
+
+    np.save(os.path.join(version_dir, 'date.npy'), np.ascontiguousarray(series['date'], dtype='datetime64[D]'))
+    for field in SERIES_FIELDS:
+        np.save(os.path.join(version_dir, f'{field}.npy'), np.ascontiguousarray(series[field], dtype=np.float32))
+    # The first date and row count let a later load check the version still matches the database before appending to it
+    with open(os.path.join(version_dir, 'meta.json'), 'w') as meta_file:
+        json.dump({
+            'watermark': _watermark(region),
+            'first_date': str(series['date'][0]) if len(series['date']) else None,
+            'rows': len(series['date']),
+        }, meta_file)
+
+    # Swap the 'current' symlink in a single rename so readers never see a partial version
+    old_version = _current_version(region.id)
+    link = os.path.join(region_dir, f'current.{uuid.uuid4().hex}')
+    os.symlink(os.path.basename(version_dir), link)
+    os.replace(link, os.path.join(region_dir, 'current'))
+
+    # Processes that still map the old files keep them until they reopen, as unlinked files stay readable
+    if old_version is not None:
+        shutil.rmtree(old_version, ignore_errors=True)
+
+def series_rows(region: Region, after: date = None) -> QuerySet:
+    """
+    Query the date and SERIES_FIELDS of a Region's readings in date order
+
+    Parameters:
+        region (Region): The Region.
+        after (date): Only query readings after this date (optional).
+    """
+    readings = ClimateReading.objects.filter(region=region)
+    if after is not None:
+        readings = readings.filter(date__gt=after)
+    return readings.order_by('date').values_list('date', *SERIES_FIELDS)
+
+def _query_series(region: Region, after: date = None) -> Dict[str, np.ndarray]:
+    """
+    Load a Region's readings from the database as arrays
+
+    Parameters:
+        region (Region): The Region.
+        after (date): Only load readings after this date (optional).
+    """
+    rows = list(series_rows(region, after))
+
+    series = {'date': np.array([row[0] for row in rows], dtype='datetime64[D]')}
+    for i, field in enumerate(SERIES_FIELDS):
+        series[field] = np.array([row[i + 1] for row in rows], dtype=np.float32)
+    return series
+
+def _can_append(region: Region, existing: Dict[str, np.ndarray], previous_updated_at: datetime) -> bool:
+    """
+    Check that a cached version holds exactly the Region's readings from before the load
+
+    A version left behind by other data, such as a reset database reusing the Region id, must be rebuilt.
+    """
+    meta = existing['meta']
+    if previous_updated_at is None or meta.get('watermark') != previous_updated_at.timestamp():
+        return False
+    if meta.get('rows') != len(existing['date']) or len(existing['date']) == 0:
+        return False
+
+    stored = ClimateReading.objects.filter(region=region, date__lte=existing['date'][-1].item()).aggregate(
+        first_date=Min('date'), rows=Count('id')
+    )
+    return meta.get('first_date') == str(stored['first_date']) and meta['rows'] == stored['rows']
+
+def refresh_series(region: Region, from_date: date = None, previous_updated_at: datetime = None):
+    """
+    Bring the cached series of a Region up to date after readings were loaded
+
+    When all loaded readings are newer than the cached series, and the cached series matches the Region's
+    data from before the load, only the new days are read from the database and appended. Otherwise the
+    whole series is rebuilt.
+
+    Parameters:
+        region (Region): The Region, with its data watermark already bumped for the loaded readings.
+        from_date (date): Earliest date that received readings (optional, defaults to rebuilding).
+        previous_updated_at (datetime): Data watermark of the Region before the load (optional, defaults to rebuilding).
+    """
+    if not _cache_dir():
+        return
+
+    existing = None
+    version_dir = _current_version(region.id)
+    if version_dir is not None and from_date is not None:
+        try:
+            existing = _read_version(version_dir)
+        except OSError:
+            existing = None
+        if existing is not None and (
+            len(existing['date']) == 0
+            or np.datetime64(from_date, 'D') <= existing['date'][-1]
+            or not _can_append(region, existing, previous_updated_at)
+        ):
+            existing = None
+
+    if existing is None:
+        _write_version(region, _query_series(region))
+        return
+
+    new = _query_series(region, after=existing['date'][-1].item())
+    _write_version(region, {
+        field: np.concatenate([existing[field], new[field]]) for field in ['date', *SERIES_FIELDS]
+    })
+
+def delete_series(region_id: int):
+    """
+    Remove the cached series of a Region
+    """
+    _mapped.pop(region_id, None)
+    if _cache_dir():
+        shutil.rmtree(os.path.join(_cache_dir(), str(region_id)), ignore_errors=True)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from main.lib.analysis_cache import analysis_cache_stats, reset_analysis_cache_stats
+
+class Command(BaseCommand):
+    """
+    Show the hit/miss counters of the analysis result cache
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after showing them')
+
+    def handle(self, *args, **kwargs):
+        stats = analysis_cache_stats()
+        self.stdout.write(f"Hits: {stats['hits']}")
+        self.stdout.write(f"Misses: {stats['misses']}")
+        self.stdout.write(f"Hit rate: {stats['hit_rate']}%")
+
+        if kwargs['reset']:
+            reset_analysis_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Reset analysis cache counters'))
@@ -0,0 +1,114 @@
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connections
+from main.models import Region, BackfillCheckpoint
+from main.lib.ingestion import plan_backfill, backfill_unit, finish_backfill, year_range
+
+def _close_connections():
+    """
+    Make each worker process open its own database connections instead of sharing the parent's
+    """
+    connections.close_all()
+
+class Command(BaseCommand):
+    """
+    Load decades of historical climate data for Regions
+    Work is split into units of one year for a batch of Regions, fetched in batched multi-location requests and run
+    in a pool of worker processes. Finished years are checkpointed and years that are already loaded are skipped,
+    so running the command again after an interruption resumes where it stopped
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=30, help='Number of years of history to load (default: 30)')
+        parser.add_argument('--region', action='append', help='Name of a Region to backfill (repeatable), defaults to all Regions')
+        parser.add_argument('--workers', type=int, default=4, help='Number of worker processes, 1 runs units in this process (default: 4)')
+        parser.add_argument('--batch-size', type=int, help='Most Regions fetched together in a unit (default: INGESTION_CHUNK_SIZE setting)')
+        parser.add_argument('--restart', action='store_true', help='Ignore checkpoints and loaded readings of the selected Regions and load every year again')
+
+    def handle(self, *args, **kwargs):
+        regions = Region.objects.all()
+        if kwargs['region']:
+            regions = regions.filter(name__in=kwargs['region'])
+        region_names = {region.id: region.name for region in regions}
+
+        end_date = date.today() - timedelta(days=1)
+        years = range(end_date.year - kwargs['years'], end_date.year + 1)
+
+        checkpoints = BackfillCheckpoint.objects.filter(region__in=regions, year__in=years)
+        if kwargs['restart']:
+            checkpoints.delete()
+            finished = set()
+        else:
+            finished = set(checkpoints.values_list('region_id', 'year'))
+
+        units, complete = plan_backfill(list(region_names), list(years), end_date, finished, kwargs['batch_size'], skip_loaded=not kwargs['restart'])
+        # Checkpoint finished years that were already loaded, so the next run does not count their readings again
+        BackfillCheckpoint.objects.bulk_create([
+            BackfillCheckpoint(region_id=region_id, year=year)
+            for region_id, year in complete if year_range(year, end_date)[1] == date(year, 12, 31)
+        ], ignore_conflicts=True)
+
+        total = sum(len(region_ids) for _, region_ids in units)
+        self.stdout.write(
+            f'Backfilling {total} region-years in {len(units)} batches ({len(finished)} already checkpointed, '
+            f'{len(complete)} already loaded) with {kwargs["workers"]} workers'
+        )
+
+        started = time.monotonic()
+        done = 0
+        readings = 0
+        for year, region_ids, unit_readings in self._run_units(units, end_date, kwargs['workers']):
+            done += len(region_ids)
+            readings += unit_readings
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'[{done}/{total}] {year}, {len(region_ids)} regions: {unit_readings} readings '
+                f'({elapsed:.0f}s elapsed, {readings / elapsed if elapsed > 0 else 0:.0f} readings/s, '
+                f'{done / elapsed * 60 if elapsed > 0 else 0:.1f} region-years/min)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully backfilled {done} region-years ({readings} readings)'))
+
+    def _run_units(self, units, end_date, workers):
+        """
+        Run the units, yielding (year, region_ids, readings) as each one finishes
+
+        Units only update the monthly rollups, which are kept per month, so any units can run at the same time.
+        Once every unit of a Region is done its score index, watermark and cached series are updated once.
+        """
+        remaining = Counter(region_id for _, region_ids in units for region_id in region_ids)
+        first_years = {}
+        for year, region_ids in units:
+            for region_id in region_ids:
+                first_years[region_id] = min(year, first_years.get(region_id, year))
+
+        def finished_regions(region_ids):
+            """Get the Regions whose last unit just finished, with the first day loaded for them"""
+            remaining.subtract(region_ids)
+            return [(region_id, date(first_years[region_id], 1, 1)) for region_id in region_ids if remaining[region_id] == 0]
+
+        if workers <= 1:
+            for year, region_ids in units:
+                result = backfill_unit(year, region_ids, end_date)
+                for region_id, from_date in finished_regions(region_ids):
+                    finish_backfill(region_id, from_date)
+                yield result
+            return
+
+        # Connections must not be shared with the forked worker processes
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_close_connections) as executor:
+            running = {executor.submit(backfill_unit, year, region_ids, end_date): 'unit' for year, region_ids in units}
+            while running:
+                finished_futures, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished_futures:
+                    result = future.result()
+                    if running.pop(future) != 'unit':
+                        continue
+                    # The parent process does not use the database while the workers run, so Regions are finished by a worker
+                    for region_id, from_date in finished_regions(result[1]):
+                        running[executor.submit(finish_backfill, region_id, from_date)] = 'region'
+                    yield result
@@ -0,0 +1,163 @@
+import json
+import statistics
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from main.models import Region, ClimateReading
+from main.lib.climate_scoring import SCORE_VERSION
+from main.lib.climate_data_functions import latest_reading_dates, monthly_aggregate_rows, score_index_rows
+from main.lib.series_cache import series_rows
+
+# Unique index on (region, date) with the covered columns, replaced by a plain unique index inside a rolled back
+# transaction to measure the queries without the covered columns
+BENCHMARKED_INDEX = 'climatereading_region_date_uniq'
+PLAIN_INDEX = 'climatereading_region_date_plain'
+
+# Prefix of the names of the Regions generated for the benchmark
+BENCHMARK_REGION_PREFIX = 'Benchmark region'
+
+class _Rollback(Exception):
+    """Raised to roll back the transaction the indexes were dropped in"""
+
+class Command(BaseCommand):
+    """
+    Benchmark the climate reading indexes on PostgreSQL
+    Generates readings for benchmark Regions, then shows the query plans and timings of the queries ingestion reads
+    readings with, with a plain (region, date) unique index (swapped in a transaction that is rolled back) and with
+    the covering one.
+    NOTE: Swapping the indexes locks the readings table while the queries run without them, do not run it on a busy database
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--regions', type=int, default=200, help='Number of benchmark Regions (default: 200)')
+        parser.add_argument('--years', type=int, default=30, help='Years of daily readings per benchmark Region (default: 30)')
+        parser.add_argument('--runs', type=int, default=5, help='Number of timed runs of each query, the median is shown (default: 5)')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark Regions and readings, a later run reuses them')
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The climate reading indexes are only benchmarked on PostgreSQL')
+
+        regions = self._benchmark_regions(kwargs['regions'], kwargs['years'])
+        try:
+            end_date = date.today().replace(month=1, day=1)
+            queries = self._queries(regions, end_date)
+
+            results = {}
+            for label, covering in [('before', False), ('after', True)]:
+                results[label] = self._run_queries(queries, covering, kwargs['runs'])
+
+            for name in queries:
+                self.stdout.write(f'\n{name}')
+                for label in ['before', 'after']:
+                    seconds, plan = results[label][name]
+                    self.stdout.write(f'  {label:<6} {seconds * 1000:9.2f} ms  {plan}')
+                self.stdout.write(f'  speedup {results["before"][name][0] / max(results["after"][name][0], 1e-9):.1f}x')
+        finally:
+            if not kwargs['keep']:
+                Region.objects.filter(name__startswith=BENCHMARK_REGION_PREFIX).delete()
+
+        self.stdout.write(self.style.SUCCESS(f'\nSuccessfully benchmarked {len(queries)} queries'))
+
+    def _benchmark_regions(self, count, years):
+        """
+        Get the benchmark Regions, generating them and their readings if needed
+        """
+        regions = list(Region.objects.filter(name__startswith=BENCHMARK_REGION_PREFIX).order_by('id'))
+        if regions:
+            self.stdout.write(f'Reusing {len(regions)} benchmark regions')
+            return regions
+
+        # Coordinates in the Southern Ocean, away from any real Region
+        regions = Region.objects.bulk_create([
+            Region(name=f'{BENCHMARK_REGION_PREFIX} {i}', latitude=-60 - i / 1000, longitude=-150.0)
+            for i in range(count)
+        ])
+        start_date = date(date.today().year - years, 1, 1)
+        self.stdout.write(f'Generating {years} years of readings for {count} benchmark regions...')
+
+        # Readings are generated by the database, day by day for all Regions like ingestion loads them
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(ClimateReading._meta.db_table)} (region_id, date, mean_temperature, max_temperature, "
+                "min_temperature, min_humidity, max_humidity, mean_humidity, rain, cloud_cover, soil_moisture, score, "
+                "temperature_score, humidity_score, rain_score, cloud_score, score_version) "
+                "SELECT region.id, day::date, 15 + random() * 10, 20 + random() * 15, 5 + random() * 10, 30 + random() * 20, "
+                "60 + random() * 30, 45 + random() * 30, random() * 10, random() * 100, random() * 0.5, random() * 100, "
+                "random() * 100, random() * 100, random() * 100, random() * 100, %s "
+                "FROM generate_series(%s::date, %s::date - 1, interval '1 day') AS day "
+                "CROSS JOIN (SELECT id FROM main_region WHERE name LIKE %s) AS region "
+                "ORDER BY day, region.id",
+                [SCORE_VERSION, start_date, date.today().replace(month=1, day=1), f'{BENCHMARK_REGION_PREFIX}%']
+            )
+            self.stdout.write(f'Generated {cursor.rowcount} readings')
+
+        # Index-only scans need the visibility map set by VACUUM, and the planner needs fresh statistics
+        with connection.cursor() as cursor:
+            cursor.execute(f"VACUUM ANALYZE {quote(ClimateReading._meta.db_table)}")
+
+        return regions
+
+    def _queries(self, regions, end_date):
+        """
+        Build the benchmarked queries, the querysets ingestion reads readings with after loading a Region's data
+        """
+        region = regions[0]
+        last_month = (end_date - timedelta(days=1)).replace(day=1)
+        return {
+            'Score index rebuild of a Region (all years)': score_index_rows(region.id),
+            'Score index update of a Region (last 30 days)': score_index_rows(region.id, end_date - timedelta(days=30)),
+            'Rollup of a Region (one month)': monthly_aggregate_rows(
+                ClimateReading.objects.filter(region_id=region.id, date__gte=last_month, date__lt=end_date)
+            ),
+            'Rollup rebuild of a Region (all months)': monthly_aggregate_rows(ClimateReading.objects.filter(region_id=region.id)),
+            'Series of a Region (all days)': series_rows(region),
+            'Latest reading of every Region': latest_reading_dates(regions),
+        }
+
+    def _run_queries(self, queries, covering, runs):
+        """
+        Time each query, with a plain unique index in place of the covering one unless covering is True
+
+        Returns:
+            Dict: (median execution seconds, plan summary) of each query
+        """
+        results = {}
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                if not covering:
+                    quote = connection.ops.quote_name
+                    cursor.execute(f"DROP INDEX {quote(BENCHMARKED_INDEX)}")
+                    cursor.execute(f"CREATE UNIQUE INDEX {quote(PLAIN_INDEX)} ON {quote(ClimateReading._meta.db_table)} (region_id, date)")
+
+                for name, queryset in queries.items():
+                    sql, params = queryset.query.sql_with_params()
+                    timings = []
+                    for _ in range(runs):
+                        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+                        explained = cursor.fetchone()[0]
+                        explained = json.loads(explained) if isinstance(explained, str) else explained
+                        timings.append(explained[0]['Execution Time'] / 1000)
+                    results[name] = (statistics.median(timings), self._plan_summary(explained[0]['Plan']))
+
+                # Restore the covering index
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return results
+
+    def _plan_summary(self, plan):
+        """
+        Summarize a plan as its distinct scan nodes, for example 'Index Only Scan using climatereading_region_date_uniq'
+        """
+        scans = []
+        nodes = [plan]
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get('Plans', []))
+            if 'Scan' in node['Node Type']:
+                scan = node['Node Type'] + (f" using {node['Index Name']}" if 'Index Name' in node else '')
+                if scan not in scans:
+                    scans.append(scan)
+        return ', '.join(scans) or plan['Node Type']
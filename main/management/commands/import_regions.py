@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from main.lib.climate_data_functions import default_start_date
+from main.lib.region_import import read_regions_file, validate_regions, create_regions
+from config.tasks import start_ingestion_run
+
+class Command(BaseCommand):
+    """
+    Import Regions from a CSV or JSON file
+    Every Region is validated before any is created, the new Regions are inserted in bulk and their climate
+    data is then loaded by the Celery workers in batched multi-location requests
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of a .csv file (with a name,latitude,longitude,description header) or a .json file')
+        parser.add_argument('--no-fetch', action='store_true', help='Only create the Regions, their climate data is then loaded by the next scheduled fetch')
+
+    def handle(self, *args, **kwargs):
+        try:
+            rows = read_regions_file(kwargs['path'])
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Could not read {kwargs["path"]}: {error}')
+
+        regions, errors = validate_regions(rows)
+        if errors:
+            for error in errors:
+                messages = '; '.join(f'{field}: {" ".join(str(message) for message in field_messages)}' for field, field_messages in error['errors'].items())
+                self.stderr.write(f'Row {error["row"] + 1}: {messages}')
+            raise CommandError(f'{len(errors)} of {len(rows)} regions are invalid, nothing was imported')
+
+        regions = create_regions(regions)
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {len(regions)} regions'))
+
+        if regions and not kwargs['no_fetch']:
+            # New Regions have no readings, so they share a single fetch window
+            run = start_ingestion_run({default_start_date(): regions}, date.today() - timedelta(days=1))
+            self.stdout.write(f'Started ingestion run {run.id} with {run.chunk_count} chunks')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from main.models import Region
+from main.lib.climate_data_functions import rebuild_climate_aggregates
+
+class Command(BaseCommand):
+    """
+    Rebuild the monthly climate rollups and score index from the daily ClimateReadings
+    Needed once for readings loaded before the rollups existed, ingestion keeps them up to date afterwards
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region', action='append', help='Name of a Region to rebuild (repeatable), defaults to all Regions')
+
+    def handle(self, *args, **kwargs):
+        regions = Region.objects.all()
+        if kwargs['region']:
+            regions = regions.filter(name__in=kwargs['region'])
+
+        # Rebuild one Region at a time to keep each transaction a manageable size
+        for region in regions:
+            rebuild_climate_aggregates([region])
+            self.stdout.write(f'Rebuilt aggregates for {region.name}')
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt aggregates for {len(regions)} regions'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from main.models import Region, ClimateReading
+from main.lib.climate_scoring import SCORE_VERSION, score_update_fields
+from main.lib.climate_data_functions import rebuild_climate_aggregates
+
+class Command(BaseCommand):
+    """
+    Recompute the stored scores of ClimateReadings
+    Only rows that have not been scored yet, or were scored with an older version of the scoring rules, are updated
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute every reading, not only stale ones')
+
+    def handle(self, *args, **kwargs):
+        readings = ClimateReading.objects.all()
+        if not kwargs['all']:
+            readings = readings.filter(Q(score_version__isnull=True) | ~Q(score_version=SCORE_VERSION))
+
+        # Update one Region at a time to keep each transaction a manageable size
+        total = 0
+        for region in Region.objects.all():
+            updated = readings.filter(region=region).update(**score_update_fields())
+            if updated:
+                # Monthly rollups and the score index hold score sums, so they need rebuilding with the new scores
+                rebuild_climate_aggregates([region])
+                self.stdout.write(f'Rescored {updated} readings for {region.name}')
+            total += updated
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully rescored {total} readings (score version {SCORE_VERSION})'))
@@ -43,7 +43,6 @@ class Command(BaseCommand):
         ]
         
         # Create regions
-        for region_data in regions:
-            Region.objects.create(**region_data)
+        Region.objects.bulk_create([Region(**region_data) for region_data in regions])
             
         self.stdout.write(self.style.SUCCESS(f'Successfully created {len(regions)} regions'))
\ No newline at end of file
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-17 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_rename_location_region_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='climatereading',
+            name='cloud_score',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='climatereading',
+            name='humidity_score',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='climatereading',
+            name='rain_score',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='climatereading',
+            name='score',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='climatereading',
+            name='score_version',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='climatereading',
+            name='temperature_score',
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.6 on 2026-10-17 00:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_climatereading_cloud_score_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClimateMonthlyAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('reading_count', models.PositiveIntegerField()),
+                ('score_sum', models.FloatField()),
+                ('optimal_days', models.PositiveIntegerField()),
+                ('mean_temperature_min', models.FloatField()),
+                ('mean_temperature_max', models.FloatField()),
+                ('mean_temperature_mean', models.FloatField()),
+                ('max_temperature_min', models.FloatField()),
+                ('max_temperature_max', models.FloatField()),
+                ('max_temperature_mean', models.FloatField()),
+                ('min_temperature_min', models.FloatField()),
+                ('min_temperature_max', models.FloatField()),
+                ('min_temperature_mean', models.FloatField()),
+                ('min_humidity_min', models.FloatField()),
+                ('min_humidity_max', models.FloatField()),
+                ('min_humidity_mean', models.FloatField()),
+                ('max_humidity_min', models.FloatField()),
+                ('max_humidity_max', models.FloatField()),
+                ('max_humidity_mean', models.FloatField()),
+                ('mean_humidity_min', models.FloatField()),
+                ('mean_humidity_max', models.FloatField()),
+                ('mean_humidity_mean', models.FloatField()),
+                ('rain_min', models.FloatField()),
+                ('rain_max', models.FloatField()),
+                ('rain_mean', models.FloatField()),
+                ('cloud_cover_min', models.FloatField()),
+                ('cloud_cover_max', models.FloatField()),
+                ('cloud_cover_mean', models.FloatField()),
+                ('soil_moisture_min', models.FloatField()),
+                ('soil_moisture_max', models.FloatField()),
+                ('soil_moisture_mean', models.FloatField()),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_aggregates', to='main.region')),
+            ],
+            options={
+                'unique_together': {('region', 'year', 'month')},
+            },
+        ),
+    ]
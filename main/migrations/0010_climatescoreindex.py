@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-17 00:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_climatemonthlyaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClimateScoreIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('cumulative_days', models.PositiveIntegerField()),
+                ('cumulative_optimal_days', models.PositiveIntegerField()),
+                ('cumulative_score', models.FloatField()),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_index', to='main.region')),
+            ],
+            options={
+                'unique_together': {('region', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_climatescoreindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='region',
+            name='data_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
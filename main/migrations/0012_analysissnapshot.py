@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-17 01:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_region_data_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('best_growing_season', models.JSONField()),
+                ('longterm_viability', models.FloatField()),
+                ('avg_historical_performance', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+                ('region', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_snapshot', to='main.region')),
+            ],
+        ),
+    ]
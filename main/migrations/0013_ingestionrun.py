@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_analysissnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('partial', 'Partially failed'), ('failed', 'Failed')], default='running', max_length=16)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('chunk_count', models.PositiveIntegerField(default=0)),
+                ('failed_chunks', models.PositiveIntegerField(default=0)),
+                ('region_count', models.PositiveIntegerField(default=0)),
+                ('readings_loaded', models.PositiveIntegerField(default=0)),
+                ('fetch_seconds', models.FloatField(default=0)),
+                ('load_seconds', models.FloatField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+            ],
+        ),
+    ]
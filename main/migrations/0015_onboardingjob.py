@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-17 01:20
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_backfillcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OnboardingJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('region_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('days_loaded', models.PositiveIntegerField(default=0)),
+                ('readings_loaded', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('region', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='onboarding_jobs', to='main.region')),
+            ],
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Range partitions main_climatereading by date on PostgreSQL, one partition per calendar year.
+# Other databases keep a regular table, the operations are no-ops there.
+
+from datetime import date
+from django.db import migrations
+
+TABLE = 'main_climatereading'
+
+# First year of the climate API data, and number of coming years partitioned up front
+FIRST_PARTITION_YEAR = 1950
+YEARS_AHEAD = 2
+
+
+def _rebuild_table(schema_editor, partitioned):
+    """
+    Copy the readings into a new (partitioned or regular) table and swap it in, keeping the names of
+    the constraints and indexes so later migrations can still find them.
+
+    The primary key of a partitioned table must include the partition key, so it becomes (id, date).
+    Ids still come from a single sequence, so they stay unique across partitions.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    new_table = f'{TABLE}_rebuilt'
+    sequence = f'{new_table}_id_seq'
+    cursor = schema_editor.connection.cursor()
+
+    # Primary key, unique and foreign key constraints are added again once the new table is renamed
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')",
+        [TABLE]
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+        "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+        [TABLE, TABLE]
+    )
+    indexes = cursor.fetchall()
+
+    # Identity columns are not supported on partitioned tables (before PostgreSQL 17), ids come from a plain sequence
+    cursor.execute(f"CREATE SEQUENCE {sequence}")
+    cursor.execute(
+        f"CREATE TABLE {new_table} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        + (" PARTITION BY RANGE (date)" if partitioned else "")
+    )
+    cursor.execute(f"ALTER TABLE {new_table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+
+    if partitioned:
+        cursor.execute(f"SELECT EXTRACT(YEAR FROM MIN(date))::int FROM {TABLE}")
+        first_year = min(cursor.fetchone()[0] or FIRST_PARTITION_YEAR, FIRST_PARTITION_YEAR)
+        for year in range(first_year, date.today().year + YEARS_AHEAD + 1):
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_y{year} PARTITION OF {new_table} "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+
+    cursor.execute(f"INSERT INTO {new_table} SELECT * FROM {TABLE}")
+    cursor.execute(f"SELECT setval('{sequence}', COALESCE((SELECT MAX(id) FROM {new_table}), 0) + 1, false)")
+
+    # Swap the tables, the old identity sequence is dropped with the old table
+    cursor.execute(f"DROP TABLE {TABLE}")
+    cursor.execute(f"ALTER TABLE {new_table} RENAME TO {TABLE}")
+    cursor.execute(f"ALTER SEQUENCE {sequence} RENAME TO {TABLE}_id_seq")
+    cursor.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+
+    for name, kind, definition in constraints:
+        if kind == 'p':
+            definition = "PRIMARY KEY (id, date)" if partitioned else "PRIMARY KEY (id)"
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+    for name, definition in indexes:
+        # Indexes of a partitioned table are listed as ON ONLY, they must be created on the whole table
+        cursor.execute(definition.replace(" ON ONLY ", " ON "))
+
+
+def partition_table(apps, schema_editor):
+    _rebuild_table(schema_editor, partitioned=True)
+
+
+def unpartition_table(apps, schema_editor):
+    _rebuild_table(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_onboardingjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_table, unpartition_table),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-17 02:15
+
+from django.db import migrations, models
+
+UNIQUE_INDEX = 'climatereading_region_date_uniq'
+
+
+def create_plain_unique_index(apps, schema_editor):
+    # Databases without covering indexes (such as SQLite for local runs) skip unique constraints with included
+    # columns, so they get the same unique index without them and existing days are still kept on conflict
+    if not schema_editor.connection.features.supports_covering_indexes:
+        schema_editor.execute(f"CREATE UNIQUE INDEX {UNIQUE_INDEX} ON main_climatereading (region_id, date)")
+
+
+def drop_plain_unique_index(apps, schema_editor):
+    if not schema_editor.connection.features.supports_covering_indexes:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {UNIQUE_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_partition_climatereading'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='climatereading',
+            name='main_climat_region__8c754a_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='climatereading',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='climatereading',
+            constraint=models.UniqueConstraint(fields=('region', 'date'), include=('score', 'max_temperature', 'mean_humidity', 'rain', 'cloud_cover'), name='climatereading_region_date_uniq'),
+        ),
+        migrations.RunPython(create_plain_unique_index, drop_plain_unique_index),
+    ]
@@ -1,2 +1,5 @@
 from .region import *
-from .climate import *
\ No newline at end of file
+from .climate import *
+from .aggregate import *
+from .analysis import *
+from .ingestion import *
\ No newline at end of file
@@ -0,0 +1,53 @@
+from django.db import models
+from .region import Region
+
+# Fields of ClimateReading summarised by ClimateMonthlyAggregate, each gets a _min, _max and _mean field
+AGGREGATED_FIELDS = [
+    'mean_temperature', 'max_temperature', 'min_temperature',
+    'min_humidity', 'max_humidity', 'mean_humidity',
+    'rain', 'cloud_cover', 'soil_moisture',
+]
+
+class ClimateMonthlyAggregate(models.Model):
+    """
+    Rollup of a Region's ClimateReadings for one calendar month
+
+    Kept up to date by update_loaded_climate_data for the months that readings are loaded into,
+    so analysis does not need to rescan daily readings.
+    """
+    region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='monthly_aggregates')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    reading_count = models.PositiveIntegerField()
+    score_sum = models.FloatField()
+    optimal_days = models.PositiveIntegerField()
+    mean_temperature_min = models.FloatField()
+    mean_temperature_max = models.FloatField()
+    mean_temperature_mean = models.FloatField()
+    max_temperature_min = models.FloatField()
+    max_temperature_max = models.FloatField()
+    max_temperature_mean = models.FloatField()
+    min_temperature_min = models.FloatField()
+    min_temperature_max = models.FloatField()
+    min_temperature_mean = models.FloatField()
+    min_humidity_min = models.FloatField()
+    min_humidity_max = models.FloatField()
+    min_humidity_mean = models.FloatField()
+    max_humidity_min = models.FloatField()
+    max_humidity_max = models.FloatField()
+    max_humidity_mean = models.FloatField()
+    mean_humidity_min = models.FloatField()
+    mean_humidity_max = models.FloatField()
+    mean_humidity_mean = models.FloatField()
+    rain_min = models.FloatField()
+    rain_max = models.FloatField()
+    rain_mean = models.FloatField()
+    cloud_cover_min = models.FloatField()
+    cloud_cover_max = models.FloatField()
+    cloud_cover_mean = models.FloatField()
+    soil_moisture_min = models.FloatField()
+    soil_moisture_max = models.FloatField()
+    soil_moisture_mean = models.FloatField()
+
+    class Meta:
+        unique_together = ['region', 'year', 'month']
@@ -0,0 +1,14 @@
+from django.db import models
+from .region import Region
+
+class AnalysisSnapshot(models.Model):
+    """
+    Analysis results of a Region precomputed after ingestion
+
+    Served by the analysis endpoints while fresh, see main.lib.analysis_snapshots.
+    """
+    region = models.OneToOneField(Region, on_delete=models.CASCADE, related_name='analysis_snapshot')
+    best_growing_season = models.JSONField()
+    longterm_viability = models.FloatField()
+    avg_historical_performance = models.FloatField()
+    computed_at = models.DateTimeField()
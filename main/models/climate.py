@@ -2,6 +2,13 @@ from django.db import models
 from .region import Region
 
 class ClimateReading(models.Model):
+    """
+    Climate data of a Region for one day
+
+    On PostgreSQL the table is range partitioned by date, one partition per calendar year, so queries filtering
+    on date only scan the partitions of the years they cover. Its primary key is (id, date), ids are still unique.
+    Partitions of the coming years are created, and expired years detached, by config.tasks.maintain_climate_partitions.
+    """
     region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='climate_readings')
     date = models.DateField()
     mean_temperature = models.FloatField()
@@ -13,11 +20,25 @@ class ClimateReading(models.Model):
     rain = models.FloatField()
     cloud_cover = models.FloatField()
     soil_moisture = models.FloatField()
+    # Precomputed evaluation scores, filled in at ingestion time (see main.lib.climate_scoring)
+    score = models.FloatField(null=True)
+    temperature_score = models.FloatField(null=True)
+    humidity_score = models.FloatField(null=True)
+    rain_score = models.FloatField(null=True)
+    cloud_score = models.FloatField(null=True)
+    # Version of the scoring rules used for the stored scores, rows with an older version are stale
+    score_version = models.PositiveSmallIntegerField(null=True)
 
     class Meta:
-        unique_together = ['region', 'date']
-        indexes = [
-            models.Index(fields=['region', 'date']),
+        # One unique index on (region, date) that also covers the columns read by stored_score_expression, so the
+        # score index rebuild of a Region after each load can be an index-only scan. Databases without covering
+        # indexes get a plain unique index instead, see migration 0017.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['region', 'date'],
+                include=['score', 'max_temperature', 'mean_humidity', 'rain', 'cloud_cover'],
+                name='climatereading_region_date_uniq'
+            ),
         ]
     
     def evaluate(self) -> float:
@@ -77,3 +98,19 @@ class ClimateReading(models.Model):
         score = (temp_score * 0.25) + (humidity_score * 0.25) + (rain_score * 0.25) + (cloud_score * 0.25)
         
         return score
+
+class ClimateScoreIndex(models.Model):
+    """
+    Running totals of a Region's ClimateReadings up to and including each date
+
+    Totals for any date range are the difference between two rows, so range queries do not need to scan readings.
+    Kept up to date by update_loaded_climate_data as new days are loaded.
+    """
+    region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='score_index')
+    date = models.DateField()
+    cumulative_days = models.PositiveIntegerField()
+    cumulative_optimal_days = models.PositiveIntegerField()
+    cumulative_score = models.FloatField()
+
+    class Meta:
+        unique_together = ['region', 'date']
@@ -0,0 +1,78 @@
+import uuid
+from django.db import models
+from .region import Region
+
+class IngestionRun(models.Model):
+    """
+    Statistics of a climate data ingestion run, recorded once all of its chunks have finished
+
+    See config.tasks.fetch_data.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('partial', 'Partially failed'),
+        ('failed', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='running')
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    chunk_count = models.PositiveIntegerField(default=0)
+    failed_chunks = models.PositiveIntegerField(default=0)
+    region_count = models.PositiveIntegerField(default=0)
+    readings_loaded = models.PositiveIntegerField(default=0)
+    # Time spent by all chunks fetching from the API and loading into the database (seconds)
+    fetch_seconds = models.FloatField(default=0)
+    load_seconds = models.FloatField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+
+class BackfillCheckpoint(models.Model):
+    """
+    A (Region, year) unit of historical climate data finished by the backfill_climate command
+
+    Units with a checkpoint are skipped when an interrupted backfill is run again.
+    """
+    region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='backfill_checkpoints')
+    year = models.PositiveSmallIntegerField()
+    readings_loaded = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['region', 'year']
+
+class OnboardingJob(models.Model):
+    """
+    Loading of the climate history of a Region created through the API, run in the background
+
+    The Region is deleted if the job fails, so no Region is left without data. See config.tasks.onboard_region.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    region = models.ForeignKey(Region, on_delete=models.SET_NULL, null=True, blank=True, related_name='onboarding_jobs')
+    # Kept for the status of failed jobs, whose Region is deleted
+    region_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='pending')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    # Days loaded so far, a retried job resumes after them
+    days_loaded = models.PositiveIntegerField(default=0)
+    readings_loaded = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def days_total(self) -> int:
+        return max(0, (self.end_date - self.start_date).days + 1)
+
+    @property
+    def progress(self) -> float:
+        """Share of the days loaded, from 0 to 1"""
+        return min(1.0, self.days_loaded / self.days_total) if self.days_total else 1.0
@@ -5,6 +5,8 @@ class Region(models.Model):
     latitude = models.FloatField(null=False)
     longitude = models.FloatField(null=False)
     description = models.TextField(null=True, blank=True)
+    # Watermark bumped whenever climate data is loaded for the Region, cached analysis results from before it are stale
+    data_updated_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ['latitude', 'longitude']
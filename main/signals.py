@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from main.models import Region
+from main.lib.series_cache import delete_series
+
+@receiver(post_delete, sender=Region)
+def delete_region_series(sender, instance, **kwargs):
+    """
+    Remove the cached series of a deleted Region, so a later Region reusing its id never sees it
+    """
+    delete_series(instance.id)
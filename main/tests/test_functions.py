@@ -1,23 +1,64 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.db import connection, transaction, IntegrityError
+from unittest import skipIf, skipUnless
+import os
+import json
+import calendar
+import tempfile
+import shutil
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from io import StringIO
 import pandas as pd
 from unittest.mock import patch, MagicMock
 from datetime import date, timedelta
 from main.lib.open_meteo import ClimateDataProvider
+from main.lib import open_meteo_replay
+from main.lib.open_meteo_replay import ReplayAdapter
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError
+from redis.exceptions import ConnectionError as RedisConnectionError
+from main.lib import rate_limiter
+from main.lib.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded, request_weight
+from main.lib.climate_loader import load_climate_columns, _copy_rows
+from main.lib.region_import import validate_regions
+from main.lib.partitions import plan_partitions, maintain_partitions, is_partitioned, partition_years
+from main.lib.ingestion import INGESTION_BYTES_PER_DAY, date_spans, ingest_regions
 from main.lib.climate_data_functions import (
+    CLIMATE_DATA_FIELDS,
     get_all_region_coordinates,
     process_climate_data,
     determine_start_date,
-    create_climate_readings
+    plan_fetch_windows,
+    climate_data_columns,
+    create_climate_readings,
+    rebuild_climate_aggregates,
+    remove_climate_data_before,
+    update_region_data,
+    default_start_date
 )
-from main.models import Region, ClimateReading
+from main.models import Region, ClimateReading, ClimateMonthlyAggregate, ClimateScoreIndex, AnalysisSnapshot, IngestionRun, BackfillCheckpoint, OnboardingJob
+from django.utils import timezone
 from django.db.models import Max
 import numpy as np
 from main.lib.climate_analyzation import (
     analyze_seasonal_suitability,
     analyze_longterm_viability,
-    analyze_historical_performance
+    analyze_historical_performance,
+    analyze_seasonal_suitability_batch,
+    analyze_longterm_viability_batch,
+    analyze_historical_performance_batch,
+    analyze_summary_batch,
+    _period_totals
 )
+from main.lib.series_cache import load_series
+from main.lib.analysis_snapshots import compute_snapshots, fresh_snapshot
+from config.tasks import precompute_analysis, fetch_data, fetch_region_chunk, onboard_region
+from main.lib.analysis_cache import cached_analysis, analysis_cache_stats, reset_analysis_cache_stats
+from main.lib.climate_scoring import SCORE_VERSION, evaluate_batch, evaluate_frame, score_expression
 
+@override_settings(RATE_LIMIT_REDIS_URL='')
 class ClimateDataProviderTestCases(TestCase):
     """Test cases for the ClimateDataProvider class"""
     
@@ -52,8 +93,8 @@ class ClimateDataProviderTestCases(TestCase):
     @patch('main.lib.open_meteo.openmeteo_requests.Client')
     def test_get_climate_data_multiple_regions(self, mock_client):
         """Test fetching climate data for multiple regions"""
-        # Setup mock response
-        self.mock_client.weather_api.return_value = [MagicMock()]
+        # Setup mock response, one response per location in the batch
+        self.mock_client.weather_api.return_value = [MagicMock(), MagicMock()]
         
         # Mock _process_response method
         test_df = pd.DataFrame({'date': pd.date_range('2020-01-01', '2020-01-05')})
@@ -65,11 +106,110 @@ class ClimateDataProviderTestCases(TestCase):
         result = self.provider.get_climate_data(lats, longs, "2020-01-01", "2020-01-05")
         
         # Assertions
-        self.assertEqual(self.mock_client.weather_api.call_count, 2)
+        self.assertEqual(self.mock_client.weather_api.call_count, 1)
+        self.assertEqual(self.mock_client.weather_api.call_args.kwargs['params']['latitude'], "45.0,46.0")
         self.assertEqual(len(result), 2)
         self.assertEqual("45.0,45.0" in result, True)
         self.assertEqual("46.0,46.0" in result, True)
     
+    def test_get_climate_data_batches(self):
+        """Test that locations are split into batches and responses are mapped back in order"""
+        self.provider.batch_size = 2
+        self.provider.workers = 1
+        responses = [MagicMock() for _ in range(5)]
+        self.mock_client.weather_api.side_effect = [responses[0:2], responses[2:4], responses[4:5]]
+        self.provider._process_response = MagicMock(side_effect=lambda response, variables: response)
+        
+        lats = [40.0, 41.0, 42.0, 43.0, 44.0]
+        longs = [140.0, 141.0, 142.0, 143.0, 144.0]
+        result = self.provider.get_climate_data(lats, longs, "2020-01-01", "2020-01-05")
+        
+        self.assertEqual(self.mock_client.weather_api.call_count, 3)
+        self.assertEqual(result["42.0,142.0"], responses[2])
+        self.assertEqual(result["44.0,144.0"], responses[4])
+    
+    @patch('main.lib.open_meteo.openmeteo_requests.Client')
+    def test_get_climate_data_concurrent(self, mock_client):
+        """Test that batches fetched concurrently are mapped back to the right regions"""
+        provider = ClimateDataProvider(cache_duration=0, batch_size=1, workers=3)
+        mock_client.return_value.weather_api.side_effect = lambda url, params: [params['latitude']]
+        provider._process_response = MagicMock(side_effect=lambda response, variables: response)
+        
+        lats = [40.0, 41.0, 42.0, 43.0]
+        longs = [140.0, 141.0, 142.0, 143.0]
+        result = provider.get_climate_data(lats, longs, "2020-01-01", "2020-01-05")
+        
+        self.assertEqual(mock_client.return_value.weather_api.call_count, 4)
+        self.assertEqual(list(result.keys()), ["40.0,140.0", "41.0,141.0", "42.0,142.0", "43.0,143.0"])
+        self.assertEqual(result["42.0,142.0"], "42.0")
+        
+        # The session is pooled per worker and keeps the retry policy
+        adapter = mock_client.call_args.kwargs['session'].get_adapter("https://climate-api.open-meteo.com")
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(adapter.max_retries.total, 5)
+    
+    def test_get_climate_data_rate_limited(self):
+        """Test that a batch rejected by the API quota is sent again after backing off"""
+        self.provider.rate_limiter = MagicMock()
+        self.mock_client.weather_api.side_effect = [RateLimitExceeded(3), [MagicMock()]]
+        self.provider._process_response = MagicMock(return_value=pd.DataFrame())
+        
+        result = self.provider.get_climate_data(45.0, 45.0, "2020-01-01", "2020-01-28", ["a", "b"])
+        
+        self.assertEqual(self.mock_client.weather_api.call_count, 2)
+        self.assertIn("45.0,45.0", result)
+        self.provider.rate_limiter.acquire.assert_called_with(2.0)
+        self.provider.rate_limiter.rate_limited.assert_called_once_with(3)
+        self.provider.rate_limiter.success.assert_called_once()
+    
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'climate_tiles': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiles'},
+    })
+    def test_get_climate_data_year_tiles(self):
+        """Test that ranges are assembled from shared year tiles and only missing tiles are fetched"""
+        provider = ClimateDataProvider()
+        provider._fetch_range = MagicMock(side_effect=lambda lats, lons, start, end, variables: fake_climate_data(lats, lons, start, end))
+        
+        result = provider.get_climate_data([45.0, 46.0], [45.0, 46.0], "2020-12-30", "2021-01-02")
+        
+        self.assertEqual(provider._fetch_range.call_count, 2)
+        self.assertEqual(provider._fetch_range.call_args_list[0].args[:4], ([45.0, 46.0], [45.0, 46.0], "2020-01-01", "2020-12-31"))
+        self.assertEqual(result["46.0,46.0"]['date'].dt.strftime("%Y-%m-%d").tolist(), ["2020-12-30", "2020-12-31", "2021-01-01", "2021-01-02"])
+        
+        # Another provider reuses the tiles, an overlapping range only fetches the tile of the new location
+        other = ClimateDataProvider()
+        other._fetch_range = MagicMock(side_effect=lambda lats, lons, start, end, variables: fake_climate_data(lats, lons, start, end))
+        result = other.get_climate_data([45.0, 47.0], [45.0, 47.0], "2021-03-01", "2021-03-31")
+        
+        other._fetch_range.assert_called_once()
+        self.assertEqual(other._fetch_range.call_args.args[:4], ([47.0], [47.0], "2021-01-01", "2021-12-31"))
+        self.assertEqual(len(result["45.0,45.0"]), 31)
+    
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'climate_tiles': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'jittered-tiles', 'TIMEOUT': 1000},
+    })
+    def test_tile_ttl_jitter(self):
+        """Test that tiles fetched together are cached for different durations within the jitter"""
+        provider = ClimateDataProvider()
+        provider._fetch_range = MagicMock(side_effect=lambda lats, lons, start, end, variables: fake_climate_data(lats, lons, start, end))
+
+        with patch.object(provider.tile_cache, 'set', wraps=provider.tile_cache.set) as mock_set:
+            provider.get_climate_data([45.0, 46.0, 47.0], [45.0, 46.0, 47.0], "2020-01-01", "2021-12-31")
+
+        timeouts = [call.kwargs['timeout'] for call in mock_set.call_args_list]
+        self.assertEqual(len(timeouts), 6)
+        self.assertTrue(all(750 <= timeout <= 1000 for timeout in timeouts))
+        self.assertGreater(len(set(timeouts)), 1)
+    
+    def test_get_climate_data_missing_responses(self):
+        """Test error when the API returns fewer responses than requested locations"""
+        self.mock_client.weather_api.return_value = [MagicMock()]
+        
+        with self.assertRaises(ValueError):
+            self.provider.get_climate_data([45.0, 46.0], [45.0, 46.0], "2020-01-01", "2020-01-05")
+    
     def test_get_climate_data_validation_error(self):
         """Test error handling for mismatched lat/long lists"""
         with self.assertRaises(ValueError):
@@ -117,6 +257,236 @@ class ClimateDataProviderTestCases(TestCase):
             self.assertEqual(result["precipitation_sum"].tolist(), [20.0, 20.5, 21.0, 21.5, 22.0])
 
 
+# Daily variables returned by the climate API
+CLIMATE_VARIABLES = ["temperature_2m_mean", "temperature_2m_max", "temperature_2m_min", "cloud_cover_mean",
+                     "relative_humidity_2m_mean", "relative_humidity_2m_max", "relative_humidity_2m_min",
+                     "precipitation_sum", "soil_moisture_0_to_10cm_mean"]
+
+
+def fake_climate_data(latitude, longitude, start_date, end_date):
+    """Build complete climate data for the requested locations and dates, standing in for the API"""
+    days = pd.date_range(start_date, end_date)
+    return {
+        f"{lat},{lon}": pd.DataFrame({'date': days, **{variable: [20.0] * len(days) for variable in CLIMATE_VARIABLES}})
+        for lat, lon in zip(latitude, longitude)
+    }
+
+
+class EagerChord:
+    """Stands in for celery's chord, running the chunk tasks and then the callback in this process without a broker"""
+
+    def __init__(self):
+        self.headers = []
+
+    def __call__(self, header):
+        header = list(header)
+        self.headers.append([task.args for task in header])
+
+        def apply_callback(callback):
+            return callback.apply(([task.apply().get() for task in header],))
+        return apply_callback
+
+
+def load_readings(readings):
+    """Load unsaved ClimateReadings the way ingestion does, through climate_data_columns and load_climate_columns"""
+    region_columns = {}
+    for region_id in {reading.region_id for reading in readings}:
+        region_readings = [reading for reading in readings if reading.region_id == region_id]
+        climate_df = pd.DataFrame({
+            'date': pd.to_datetime([reading.date for reading in region_readings]),
+            **{variable: [getattr(reading, field) for reading in region_readings] for field, variable in CLIMATE_DATA_FIELDS.items()}
+        })
+        region_columns[region_id] = climate_data_columns(climate_df)[0]
+    return load_climate_columns(region_columns)
+
+
+class FakeClock:
+    """Clock advanced by sleeping, standing in for the time module"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@override_settings(RATE_LIMIT_REDIS_URL='')
+class ClimateReplayTestCases(TestCase):
+    """Test cases for the record, replay and synthetic modes of the ClimateDataProvider"""
+
+    def setUp(self):
+        self.recordings_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.recordings_dir, ignore_errors=True)
+
+    def test_synthetic_mode(self):
+        """Test synthetic responses are decoded by the real client like API responses"""
+        provider = ClimateDataProvider(mode="synthetic", workers=1)
+        self.assertIsNone(provider.tile_cache)
+        self.assertIsNone(provider.rate_limiter)
+
+        data = provider.get_climate_data([45.0, -33.9], [7.5, 18.4], "2020-01-01", "2020-01-10")
+
+        self.assertEqual(list(data.keys()), ["45.0,7.5", "-33.9,18.4"])
+        for df in data.values():
+            self.assertEqual(list(df.columns), ["date"] + CLIMATE_VARIABLES)
+            self.assertEqual(df["date"].dt.strftime("%Y-%m-%d").tolist(), [f"2020-01-{day:02d}" for day in range(1, 11)])
+            self.assertTrue(df["cloud_cover_mean"].between(0, 100).all())
+            self.assertTrue((df["precipitation_sum"] >= 0).all())
+
+        # January is winter in the north and summer in the south
+        self.assertLess(data["45.0,7.5"]["temperature_2m_mean"].mean(), data["-33.9,18.4"]["temperature_2m_mean"].mean())
+
+        # The same request always gets the same values
+        again = provider.get_climate_data([45.0], [7.5], "2020-01-01", "2020-01-10")
+        pd.testing.assert_frame_equal(again["45.0,7.5"], data["45.0,7.5"])
+
+    def test_record_and_replay(self):
+        """Test recorded responses are replayed byte for byte, with the injected latency"""
+        synthetic = ReplayAdapter(synthetic=True)
+        with patch.object(HTTPAdapter, 'send', side_effect=lambda request, **kwargs: synthetic.send(request)) as mock_send:
+            recorded = ClimateDataProvider(mode="record", recordings_dir=self.recordings_dir, workers=1).get_climate_data(
+                [45.0, 46.0], [7.5, 8.5], "2020-03-01", "2020-03-31"
+            )
+        mock_send.assert_called_once()
+        self.assertEqual(len(os.listdir(self.recordings_dir)), 1)
+
+        provider = ClimateDataProvider(mode="replay", recordings_dir=self.recordings_dir, replay_latency=0.25, workers=1)
+        with patch.object(open_meteo_replay.time, 'sleep') as mock_sleep:
+            replayed = provider.get_climate_data([45.0, 46.0], [7.5, 8.5], "2020-03-01", "2020-03-31")
+        mock_sleep.assert_called_once_with(0.25)
+
+        self.assertEqual(recorded.keys(), replayed.keys())
+        for key in recorded:
+            pd.testing.assert_frame_equal(recorded[key], replayed[key])
+
+        # Requests that were not recorded fail in replay mode
+        with self.assertRaises(HTTPError):
+            provider.get_climate_data([45.0], [7.5], "2020-03-01", "2020-03-31")
+
+    def test_invalid_mode(self):
+        """Test unknown modes and replays without recordings are rejected"""
+        with self.assertRaises(ValueError):
+            ClimateDataProvider(mode="offline")
+        with override_settings(OPEN_METEO_RECORDINGS_DIR=''):
+            with self.assertRaises(ValueError):
+                ClimateDataProvider(mode="replay")
+
+
+class RateLimiterTestCases(TestCase):
+    """Test cases for the adaptive API rate limiter"""
+
+    def setUp(self):
+        """Use a fake clock and a fresh local state"""
+        rate_limiter._local_states.clear()
+        self.clock = FakeClock()
+        self.time_patch = patch('main.lib.rate_limiter.time', self.clock)
+        self.time_patch.start()
+        # 60 calls per minute with a burst of 2 calls
+        self.limiter = AdaptiveRateLimiter("test", 60, burst_seconds=2)
+
+    def tearDown(self):
+        self.time_patch.stop()
+
+    def test_request_weight(self):
+        """Test that long and wide requests count as multiple calls"""
+        self.assertEqual(request_weight(1, 7, 9), 1.0)
+        self.assertEqual(request_weight(2, 28, 9), 4.0)
+        self.assertEqual(request_weight(1, 14, 20), 2.0)
+
+    def test_acquire_waits_for_tokens(self):
+        """Test that requests wait once the burst is used up"""
+        self.limiter.acquire(1)
+        self.limiter.acquire(1)
+        self.assertEqual(self.clock.slept, [])
+
+        self.limiter.acquire(1)
+        self.assertEqual(self.clock.slept, [1.0])
+
+    def test_heavy_request_goes_into_debt(self):
+        """Test that a request heavier than the burst is paid back before the next one"""
+        self.limiter.acquire(5)
+        self.limiter.acquire(1)
+        self.assertEqual(sum(self.clock.slept), 4.0)
+
+    def test_rate_limited_backs_off_and_settles_under_ceiling(self):
+        """Test that a 429 pauses and halves the rate, which then recovers to just under the rejected rate"""
+        self.limiter.rate_limited(retry_after=30)
+        self.assertEqual(self.limiter.current_rate(), 30)
+
+        self.limiter.acquire(1)
+        self.assertGreaterEqual(sum(self.clock.slept), 30)
+
+        for _ in range(50):
+            self.limiter.success()
+        self.assertAlmostEqual(self.limiter.current_rate(), 54)
+
+        # The rejected rate is forgotten after a while and the configured rate is probed again
+        self.clock.now += rate_limiter.CEILING_TTL
+        for _ in range(50):
+            self.limiter.success()
+        self.assertAlmostEqual(self.limiter.current_rate(), 60)
+
+
+    def test_concurrent_rate_limits_back_off_once(self):
+        """Test that 429s of requests that were in flight during a backoff do not lower the rate or ceiling again"""
+        for _ in range(4):
+            self.limiter.rate_limited()
+        self.assertEqual(self.limiter.current_rate(), 30)
+
+        self.limiter.acquire(1)
+        for _ in range(50):
+            self.limiter.success()
+        self.assertAlmostEqual(self.limiter.current_rate(), 54)
+
+    def test_ceiling_keeps_highest_rejected_rate(self):
+        """Test that a later 429 at a lower rate does not lower the remembered ceiling"""
+        self.limiter.rate_limited(retry_after=1)
+        self.clock.now += 2
+        self.limiter.rate_limited(retry_after=1)
+        self.assertEqual(self.limiter.current_rate(), 15)
+
+        self.clock.now += 2
+        for _ in range(50):
+            self.limiter.success()
+        self.assertAlmostEqual(self.limiter.current_rate(), 54)
+
+    def test_current_rate_of_fresh_state(self):
+        """Test that the rate of a limiter that was never used is the configured rate"""
+        self.assertEqual(self.limiter.current_rate(), 60)
+
+    def test_hourly_quota(self):
+        """Test that requests wait for the next clock hour once the hourly quota is used up"""
+        limiter = AdaptiveRateLimiter("hourly", 600, burst_seconds=60, hourly_limit=5)
+        self.clock.now = 3600 * 10 + 100
+        for _ in range(5):
+            limiter.acquire(1)
+        self.assertEqual(self.clock.slept, [])
+
+        limiter.acquire(1)
+        self.assertEqual(self.clock.slept, [3500])
+
+    def test_long_wait_raises(self):
+        """Test that a wait longer than max_wait raises with the wait instead of sleeping"""
+        limiter = AdaptiveRateLimiter("bounded", 600, burst_seconds=60, hourly_limit=5, max_wait=60)
+        self.clock.now = 3600 * 10 + 100
+        for _ in range(5):
+            limiter.acquire(1)
+
+        with self.assertRaises(RateLimitExceeded) as raised:
+            limiter.acquire(1)
+        self.assertEqual(raised.exception.retry_after, 3500)
+        self.assertEqual(self.clock.slept, [])
+
 class ClimateDataFunctionsTestCases(TestCase):
     """Test cases for climate data processing functions"""
     
@@ -195,7 +565,29 @@ class ClimateDataFunctionsTestCases(TestCase):
         self.assertEqual(readings[0].mean_temperature, 10.0)
         self.assertEqual(readings[1].max_temperature, 16.0)
         self.assertEqual(readings[2].min_humidity, 22.0)
+
+        # Scores are computed at ingestion time
+        for reading in readings:
+            self.assertEqual(reading.score, reading.evaluate())
+            self.assertEqual(reading.score_version, SCORE_VERSION)
+        self.assertEqual(readings[0].temperature_score, 40.0)
+        self.assertEqual(readings[0].humidity_score, 100.0)
+        self.assertEqual(readings[0].rain_score, 100.0)
+        self.assertEqual(readings[0].cloud_score, 70.0)
     
+    def test_process_climate_data_drops_incomplete_days(self):
+        """Test that days missing a variable are dropped in one step"""
+        climate_df = pd.DataFrame({
+            'date': pd.date_range('2020-01-01', '2020-01-03', tz='UTC'),
+            **{variable: [1.0, 1.0, 1.0] for variable in CLIMATE_VARIABLES}
+        })
+        climate_df.loc[1, 'precipitation_sum'] = np.nan
+
+        readings = process_climate_data(self.region1, climate_df)
+
+        self.assertEqual([reading.date for reading in readings], [date(2020, 1, 1), date(2020, 1, 3)])
+        self.assertIsInstance(readings[0].rain, float)
+
     def test_determine_start_date_with_readings(self):
         """Test determining start date with existing readings"""
         # Create another reading with a different date
@@ -231,6 +623,363 @@ class ClimateDataFunctionsTestCases(TestCase):
         one_year_ago = date(date.today().year - 1, date.today().month, date.today().day)
         self.assertEqual(start_date, one_year_ago)
     
+    def test_climate_data_columns(self):
+        """Test turning climate data into columns of reading fields"""
+        # Create a test DataFrame simulating climate data
+        data = {
+            'date': pd.date_range('2020-01-01', '2020-01-03'),
+            'temperature_2m_mean': [10.0, 11.0, 12.0],
+            'temperature_2m_max': [15.0, 16.0, 17.0],
+            'temperature_2m_min': [5.0, 6.0, 7.0],
+            'relative_humidity_2m_mean': [50.0, 51.0, 52.0],
+            'relative_humidity_2m_max': [80.0, 81.0, 82.0],
+            'relative_humidity_2m_min': [20.0, 21.0, 22.0],
+            'precipitation_sum': [5.0, 6.0, 7.0],
+            'cloud_cover_mean': [30.0, 31.0, 32.0],
+            'soil_moisture_0_to_10cm_mean': [0.25, 0.26, 0.27]
+        }
+        climate_df = pd.DataFrame(data)
+        
+        # Process the data
+        columns, dropped = climate_data_columns(climate_df)
+        
+        # Assertions
+        self.assertEqual(dropped, 0)
+        self.assertEqual(columns['date'].tolist(), [date(2020, 1, 1), date(2020, 1, 2), date(2020, 1, 3)])
+        self.assertEqual(columns['mean_temperature'][0], 10.0)
+        self.assertEqual(columns['max_temperature'][1], 16.0)
+        self.assertEqual(columns['min_humidity'][2], 22.0)
+
+        # Scores are computed at ingestion time
+        for i in range(3):
+            reading = ClimateReading(**{field: columns[field][i] for field in CLIMATE_DATA_FIELDS})
+            self.assertEqual(columns['score'][i], reading.evaluate())
+        self.assertEqual(columns['score_version'].tolist(), [SCORE_VERSION] * 3)
+        self.assertEqual(columns['temperature_score'][0], 40.0)
+        self.assertEqual(columns['humidity_score'][0], 100.0)
+        self.assertEqual(columns['rain_score'][0], 100.0)
+        self.assertEqual(columns['cloud_score'][0], 70.0)
+    
+    def test_climate_data_columns_drops_incomplete_days(self):
+        """Test that days missing a variable are dropped in one step"""
+        climate_df = pd.DataFrame({
+            'date': pd.date_range('2020-01-01', '2020-01-03', tz='UTC'),
+            **{variable: [1.0, 1.0, 1.0] for variable in CLIMATE_VARIABLES}
+        })
+        climate_df.loc[1, 'precipitation_sum'] = np.nan
+
+        columns, dropped = climate_data_columns(climate_df)
+
+        self.assertEqual(dropped, 1)
+        self.assertEqual(columns['date'].tolist(), [date(2020, 1, 1), date(2020, 1, 3)])
+        self.assertEqual(columns['rain'].dtype, np.float64)
+
+    def test_plan_fetch_windows(self):
+        """Test that each region starts after its own latest reading and regions sharing a window are grouped"""
+        region3 = Region.objects.create(name="Test Region 3", latitude=47.0, longitude=47.0)
+        reading = ClimateReading.objects.get(region=self.region1)
+        reading.pk = None
+        reading.region = region3
+        reading.save()
+
+        with self.assertNumQueries(1):
+            windows = plan_fetch_windows([self.region1, self.region2, region3], date(2020, 6, 1))
+
+        one_year_ago = date(date.today().year - 1, date.today().month, date.today().day)
+        self.assertEqual(windows[date(2020, 1, 2)], [self.region1, region3])
+        self.assertNotIn(self.region2, windows[date(2020, 1, 2)])
+
+        # Regions without readings start at the default date, which is after the end date here
+        self.assertEqual(list(windows.keys()), [date(2020, 1, 2)])
+        self.assertEqual(plan_fetch_windows([self.region2], one_year_ago), {one_year_ago: [self.region2]})
+
+    def test_plan_fetch_windows_up_to_date(self):
+        """Test that regions with readings up to the end date are left out"""
+        self.assertEqual(plan_fetch_windows([self.region1], date(2020, 1, 1)), {})
+
+    @patch('config.tasks.chord', new_callable=EagerChord)
+    @patch('config.tasks.precompute_analysis')
+    @patch('main.lib.ingestion.ClimateDataProvider')
+    def test_fetch_data_per_region_windows(self, mock_provider_class, mock_precompute, mock_chord):
+        """Test that fetch_data only requests the dates each region is missing"""
+        mock_provider = mock_provider_class.return_value
+        mock_provider.get_climate_data.return_value = {}
+
+        fetch_data()
+
+        yesterday = (date.today() - timedelta(days=1)).strftime("%Y-%m-%d")
+        one_year_ago = date(date.today().year - 1, date.today().month, date.today().day).strftime("%Y-%m-%d")
+        # One chunk per fetch window, each with the regions starting on that date
+        self.assertEqual(sorted(mock_chord.headers[0], key=lambda chunk: chunk[1]), [
+            ([self.region1.id], "2020-01-02", yesterday),
+            ([self.region2.id], one_year_ago, yesterday),
+        ])
+        calls = {call.kwargs['start_date']: call.kwargs for call in mock_provider.get_climate_data.call_args_list}
+        self.assertEqual(calls["2020-01-02"]['latitude'], [45.0])
+        self.assertEqual(calls[one_year_ago]['latitude'], [46.0])
+        self.assertTrue(all(call['end_date'] == yesterday for call in calls.values()))
+
+    @patch('config.tasks.chord', new_callable=EagerChord)
+    @patch('config.tasks.precompute_analysis')
+    @patch('main.lib.ingestion.ClimateDataProvider')
+    def test_fetch_data_records_run(self, mock_provider_class, mock_precompute, mock_chord):
+        """Test that the chord callback records the statistics of the run and precomputes updated regions"""
+        def get_climate_data(latitude, longitude, start_date, end_date):
+            days = pd.date_range(start_date, periods=2)
+            return {
+                f"{lat},{lon}": pd.DataFrame({'date': days, **{variable: [1.0, 1.0] for variable in CLIMATE_VARIABLES}})
+                for lat, lon in zip(latitude, longitude)
+            }
+        mock_provider_class.return_value.get_climate_data.side_effect = get_climate_data
+
+        fetch_data()
+
+        run = IngestionRun.objects.get()
+        self.assertEqual(run.status, 'succeeded')
+        self.assertEqual(run.chunk_count, 2)
+        self.assertEqual(run.region_count, 2)
+        self.assertEqual(run.readings_loaded, 4)
+        self.assertIsNotNone(run.finished_at)
+        self.assertEqual(sorted(mock_precompute.delay.call_args.args[0]), [self.region1.id, self.region2.id])
+
+    @patch('config.tasks.chord', new_callable=EagerChord)
+    @patch('config.tasks.precompute_analysis')
+    @patch('main.lib.ingestion.ClimateDataProvider')
+    def test_fetch_data_failed_chunk(self, mock_provider_class, mock_precompute, mock_chord):
+        """Test that a chunk failing after its retries is recorded without losing the other chunks"""
+        def get_climate_data(latitude, longitude, start_date, end_date):
+            if latitude == [46.0]:
+                raise ConnectionError("API unavailable")
+            return {}
+        mock_provider_class.return_value.get_climate_data.side_effect = get_climate_data
+
+        fetch_data()
+
+        run = IngestionRun.objects.get()
+        self.assertEqual(run.status, 'partial')
+        self.assertEqual(run.failed_chunks, 1)
+        self.assertEqual(run.errors, ["ConnectionError: API unavailable"])
+        # The failing chunk was retried before giving up
+        self.assertEqual(mock_provider_class.return_value.get_climate_data.call_count, 5)
+
+    def test_load_climate_columns(self):
+        """Test loading readings straight from columns, keeping existing days and updating derived data"""
+        climate_df = pd.DataFrame({
+            'date': pd.date_range('2020-01-01', '2020-01-03'),
+            **{variable: [20.0, 21.0, 22.0] for variable in CLIMATE_VARIABLES}
+        })
+        columns, _ = climate_data_columns(climate_df)
+
+        stats = load_climate_columns({self.region1.id: columns, self.region2.id: columns})
+
+        # The existing reading of region 1 on 2020-01-01 is kept and not counted as loaded
+        self.assertEqual(stats['rows'], 5)
+        self.assertEqual(stats['sent'], 6)
+        self.assertEqual(ClimateReading.objects.get(region=self.region1, date="2020-01-01").mean_temperature, 10.0)
+        self.assertEqual(ClimateReading.objects.filter(region=self.region2).count(), 3)
+        reading = ClimateReading.objects.get(region=self.region2, date="2020-01-02")
+        self.assertEqual(reading.score, reading.evaluate())
+        self.assertEqual(ClimateMonthlyAggregate.objects.get(region=self.region2).reading_count, 3)
+        self.assertIsNotNone(Region.objects.get(pk=self.region2.pk).data_updated_at)
+
+    @skipUnless(connection.vendor == 'postgresql', "COPY is only used on PostgreSQL")
+    def test_copy_rows_skips_existing_days(self):
+        """Test that rows merged from the COPY staging table keep existing days and count only the new ones"""
+        def columns(start, end):
+            region_columns, _ = climate_data_columns(pd.DataFrame({
+                'date': pd.date_range(start, end),
+                **{variable: 20.0 for variable in CLIMATE_VARIABLES}
+            }))
+            return {'region_id': np.full(len(region_columns['date']), self.region1.id), **region_columns}
+
+        # 2019-12-30 to 2020-01-02 overlaps the existing reading on 2020-01-01
+        self.assertEqual(_copy_rows(columns('2019-12-30', '2020-01-02')), 3)
+        # Overlaps two of the days just loaded
+        self.assertEqual(_copy_rows(columns('2020-01-02', '2020-01-05')), 3)
+        # Nothing is new
+        self.assertEqual(_copy_rows(columns('2019-12-30', '2020-01-05')), 0)
+
+        self.assertEqual(ClimateReading.objects.filter(region=self.region1).count(), 7)
+        self.assertEqual(ClimateReading.objects.get(region=self.region1, date="2020-01-01").mean_temperature, 10.0)
+
+    def test_load_readings_aggregates_months(self):
+        """Test that loading readings builds the rollups of the months they are loaded into"""
+        # Create test reading objects
+        region = self.region1
+        readings = [
+            ClimateReading(
+                region=region,
+                date="2020-03-01",
+                mean_temperature=10.0,
+                max_temperature=15.0,
+                min_temperature=5.0,
+                mean_humidity=50.0,
+                max_humidity=80.0,
+                min_humidity=20.0,
+                rain=5.0,
+                cloud_cover=30.0,
+                soil_moisture=0.25
+            ),
+            ClimateReading(
+                region=region,
+                date="2020-03-02",
+                mean_temperature=11.0,
+                max_temperature=16.0,
+                min_temperature=6.0,
+                mean_humidity=51.0,
+                max_humidity=81.0,
+                min_humidity=21.0,
+                rain=6.0,
+                cloud_cover=31.0,
+                soil_moisture=0.26
+            )
+        ]
+        
+        # Count readings before
+        count_before = ClimateReading.objects.count()
+        
+        # Create readings
+        load_readings(readings)
+        
+        # Count readings after
+        count_after = ClimateReading.objects.count()
+        
+        # Assertions
+        self.assertEqual(count_after - count_before, 2)
+        self.assertTrue(ClimateReading.objects.filter(date="2020-03-01").exists())
+        self.assertTrue(ClimateReading.objects.filter(date="2020-03-02").exists())
+
+        # The monthly rollup for the touched month is created
+        aggregate = ClimateMonthlyAggregate.objects.get(region=region, year=2020, month=3)
+        self.assertEqual(aggregate.reading_count, 2)
+        self.assertEqual(aggregate.score_sum, readings[0].evaluate() + readings[1].evaluate())
+        self.assertEqual(aggregate.optimal_days, 2)
+        self.assertEqual(aggregate.max_temperature_min, 15.0)
+        self.assertEqual(aggregate.max_temperature_max, 16.0)
+        self.assertEqual(aggregate.rain_mean, 5.5)
+
+        # Only the touched month is aggregated, not the existing January reading
+        self.assertFalse(ClimateMonthlyAggregate.objects.filter(region=region, month=1).exists())
+
+    def test_load_readings_updates_existing_aggregate(self):
+        """Test that adding readings to a month updates its rollup"""
+        def reading(day, rain):
+            return ClimateReading(
+                region=self.region2,
+                date=date(2020, 4, day),
+                mean_temperature=10.0,
+                max_temperature=30.0,
+                min_temperature=5.0,
+                mean_humidity=50.0,
+                max_humidity=80.0,
+                min_humidity=20.0,
+                rain=rain,
+                cloud_cover=0.0,
+                soil_moisture=0.25
+            )
+
+        load_readings([reading(1, 2.0)])
+        # A duplicate of an existing day is ignored, the new day is added
+        load_readings([reading(1, 2.0), reading(2, 20.0)])
+
+        aggregate = ClimateMonthlyAggregate.objects.get(region=self.region2, year=2020, month=4)
+        self.assertEqual(aggregate.reading_count, 2)
+        self.assertEqual(aggregate.score_sum, 100.0 + 85.0)
+        self.assertEqual(aggregate.optimal_days, 2)
+        self.assertEqual(aggregate.rain_max, 20.0)
+        self.assertEqual(ClimateMonthlyAggregate.objects.filter(region=self.region2).count(), 1)
+    
+    def test_load_readings_updates_score_index(self):
+        """Test that the score index is extended with new days and recomputed after backfilled days"""
+        def reading(day, cloud_cover):
+            return ClimateReading(
+                region=self.region2,
+                date=date(2020, 5, day),
+                mean_temperature=10.0,
+                max_temperature=30.0,
+                min_temperature=5.0,
+                mean_humidity=50.0,
+                max_humidity=80.0,
+                min_humidity=20.0,
+                rain=2.0,
+                cloud_cover=cloud_cover,
+                soil_moisture=0.25
+            )
+
+        load_readings([reading(2, 0.0), reading(3, 100.0)])
+        # Newer day is appended
+        load_readings([reading(5, 20.0)])
+        # Older day is backfilled before the existing rows
+        load_readings([reading(1, 40.0)])
+
+        index = list(ClimateScoreIndex.objects.filter(region=self.region2).order_by('date'))
+        self.assertEqual([row.date for row in index], [date(2020, 5, day) for day in [1, 2, 3, 5]])
+        self.assertEqual([row.cumulative_days for row in index], [1, 2, 3, 4])
+        self.assertEqual([row.cumulative_score for row in index], [90.0, 190.0, 265.0, 360.0])
+        self.assertEqual([row.cumulative_optimal_days for row in index], [1, 2, 3, 4])
+
+    def test_rescore_climate_readings(self):
+        """Test the management command only recomputes stale scores"""
+        # A reading scored with the current rules, with a score that should be left alone
+        current = ClimateReading.objects.create(
+            region=self.region2,
+            date="2020-01-02",
+            mean_temperature=10.0,
+            max_temperature=15.0,
+            min_temperature=5.0,
+            mean_humidity=50.0,
+            max_humidity=80.0,
+            min_humidity=20.0,
+            rain=5.0,
+            cloud_cover=30.0,
+            soil_moisture=0.25,
+            score=1.0,
+            score_version=SCORE_VERSION
+        )
+        # A reading scored with an older version of the rules
+        stale = ClimateReading.objects.create(
+            region=self.region2,
+            date="2020-01-03",
+            mean_temperature=10.0,
+            max_temperature=15.0,
+            min_temperature=5.0,
+            mean_humidity=50.0,
+            max_humidity=80.0,
+            min_humidity=20.0,
+            rain=5.0,
+            cloud_cover=30.0,
+            soil_moisture=0.25,
+            score=1.0,
+            score_version=SCORE_VERSION - 1
+        )
+
+        call_command('rescore_climate_readings', stdout=StringIO())
+
+        # The unscored reading from setUp and the stale reading are recomputed
+        for reading in [ClimateReading.objects.get(region=self.region1), stale]:
+            reading.refresh_from_db()
+            self.assertEqual(reading.score, reading.evaluate())
+            self.assertEqual(reading.rain_score, 100.0)
+            self.assertEqual(reading.score_version, SCORE_VERSION)
+
+        current.refresh_from_db()
+        self.assertEqual(current.score, 1.0)
+
+    def test_load_climate_columns_empty(self):
+        """Test loading climate columns without any days"""
+        # Count readings before
+        count_before = ClimateReading.objects.count()
+        
+        # Load a Region without any complete days
+        columns, _ = climate_data_columns(pd.DataFrame({'date': pd.to_datetime([]), **{variable: [] for variable in CLIMATE_VARIABLES}}))
+        self.assertEqual(load_climate_columns({self.region1.id: columns})['rows'], 0)
+        
+        # Count readings after
+        count_after = ClimateReading.objects.count()
+        
+        # Assertions - count should not change
+        self.assertEqual(count_after, count_before)
+
     def test_create_climate_readings(self):
         """Test creating climate readings in bulk"""
         # Create test reading objects
@@ -277,7 +1026,20 @@ class ClimateDataFunctionsTestCases(TestCase):
         self.assertEqual(count_after - count_before, 2)
         self.assertTrue(ClimateReading.objects.filter(date="2020-03-01").exists())
         self.assertTrue(ClimateReading.objects.filter(date="2020-03-02").exists())
-    
+
+        # The monthly rollup for the touched month is created
+        aggregate = ClimateMonthlyAggregate.objects.get(region=region, year=2020, month=3)
+        self.assertEqual(aggregate.reading_count, 2)
+        self.assertEqual(aggregate.score_sum, readings[0].evaluate() + readings[1].evaluate())
+        self.assertEqual(aggregate.optimal_days, 2)
+        self.assertEqual(aggregate.max_temperature_min, 15.0)
+        self.assertEqual(aggregate.max_temperature_max, 16.0)
+        self.assertEqual(aggregate.rain_mean, 5.5)
+
+        # Only the touched month is aggregated, not the existing January reading
+        self.assertFalse(ClimateMonthlyAggregate.objects.filter(region=region, month=1).exists())
+
+
     def test_create_climate_readings_empty_list(self):
         """Test creating climate readings with empty list"""
         # Count readings before
@@ -292,6 +1054,412 @@ class ClimateDataFunctionsTestCases(TestCase):
         # Assertions - count should not change
         self.assertEqual(count_after, count_before)
 
+
+class IngestionTestCases(TestCase):
+    """Test cases for the streaming ingestion pipeline"""
+
+    def setUp(self):
+        """Set up regions without readings"""
+        self.region1 = Region.objects.create(name="Stream Region 1", latitude=45.0, longitude=45.0)
+        self.region2 = Region.objects.create(name="Stream Region 2", latitude=46.0, longitude=46.0)
+
+    def test_date_spans(self):
+        """Test that date ranges are split so each span fits in the memory budget"""
+        budget = 10 * INGESTION_BYTES_PER_DAY
+        spans = date_spans(date(2020, 1, 1), date(2020, 1, 12), 2, budget)
+
+        self.assertEqual(spans, [
+            (date(2020, 1, 1), date(2020, 1, 5)),
+            (date(2020, 1, 6), date(2020, 1, 10)),
+            (date(2020, 1, 11), date(2020, 1, 12)),
+        ])
+        # More regions than the budget allows still fetch a day at a time
+        self.assertEqual(len(date_spans(date(2020, 1, 1), date(2020, 1, 3), 50, budget)), 3)
+
+    def test_date_spans_whole_years(self):
+        """Test that spans fetched through the tile cache end at the end of a year and budget whole years"""
+        budget = 2 * 366 * 3 * INGESTION_BYTES_PER_DAY
+        spans = date_spans(date(2015, 6, 1), date(2020, 3, 1), 3, budget, whole_years=True)
+
+        self.assertEqual(spans, [
+            (date(2015, 6, 1), date(2016, 12, 31)),
+            (date(2017, 1, 1), date(2018, 12, 31)),
+            (date(2019, 1, 1), date(2020, 3, 1)),
+        ])
+        # A budget smaller than a year still fetches a year at a time
+        self.assertEqual(date_spans(date(2020, 1, 1), date(2021, 1, 3), 3, 10 * INGESTION_BYTES_PER_DAY, whole_years=True), [
+            (date(2020, 1, 1), date(2020, 12, 31)),
+            (date(2021, 1, 1), date(2021, 1, 3)),
+        ])
+
+    def test_ingest_regions_streams_spans(self):
+        """Test that each span is loaded before the next one is fetched"""
+        provider = MagicMock()
+        loaded_before_fetch = []
+        def get_climate_data(**kwargs):
+            loaded_before_fetch.append(ClimateReading.objects.count())
+            return fake_climate_data(**kwargs)
+        provider.get_climate_data.side_effect = get_climate_data
+
+        stats = list(ingest_regions([self.region1, self.region2], date(2020, 1, 1), date(2020, 1, 12), provider, 10 * INGESTION_BYTES_PER_DAY))
+
+        self.assertEqual(loaded_before_fetch, [0, 10, 20])
+        self.assertEqual([span['readings'] for span in stats], [10, 10, 4])
+        self.assertEqual(ClimateReading.objects.count(), 24)
+
+    @override_settings(INGESTION_MEMORY_BUDGET_MB=1)
+    @patch('main.lib.ingestion.INGESTION_BYTES_PER_DAY', 1024 * 1024 // 4)
+    @patch('main.lib.ingestion.ClimateDataProvider')
+    def test_chunk_retry_resumes_from_failed_span(self, mock_provider_class):
+        """Test that a retried chunk does not fetch the spans it already loaded again"""
+        requested = []
+        def get_climate_data(**kwargs):
+            requested.append(kwargs['start_date'])
+            if kwargs['start_date'] == "2020-01-05" and requested.count("2020-01-05") == 1:
+                raise ConnectionError("API unavailable")
+            return fake_climate_data(**kwargs)
+        mock_provider_class.return_value.get_climate_data.side_effect = get_climate_data
+
+        result = fetch_region_chunk.apply(args=([self.region1.id], "2020-01-01", "2020-01-08")).get()
+
+        # Spans of 4 days fit in the budget, the second one failed once
+        self.assertEqual(requested, ["2020-01-01", "2020-01-05", "2020-01-05"])
+        self.assertEqual(result['readings'], 8)
+        self.assertIsNone(result['error'])
+
+
+class OnboardingTestCases(TestCase):
+    """Test cases for loading the climate history of new Regions in the background"""
+
+    def setUp(self):
+        self.region = Region.objects.create(name="New Region", latitude=45.0, longitude=45.0)
+        self.job = OnboardingJob.objects.create(
+            region=self.region, region_name=self.region.name, start_date=date(2020, 1, 1), end_date=date(2020, 1, 8)
+        )
+
+    @override_settings(INGESTION_MEMORY_BUDGET_MB=1)
+    @patch('main.lib.ingestion.INGESTION_BYTES_PER_DAY', 1024 * 1024 // 4)
+    @patch('config.tasks.precompute_analysis')
+    @patch('main.lib.ingestion.ClimateDataProvider')
+    def test_onboarding_resumes_after_loaded_days(self, mock_provider_class, mock_precompute):
+        """Test that a retried job records its progress and does not fetch the days it already loaded again"""
+        requested = []
+        def get_climate_data(**kwargs):
+            requested.append(kwargs['start_date'])
+            if kwargs['start_date'] == "2020-01-05" and requested.count("2020-01-05") == 1:
+                raise ConnectionError("API unavailable")
+            return fake_climate_data(**kwargs)
+        mock_provider_class.return_value.get_climate_data.side_effect = get_climate_data
+
+        onboard_region.apply(args=(str(self.job.id),))
+
+        self.job.refresh_from_db()
+        self.assertEqual(requested, ["2020-01-01", "2020-01-05", "2020-01-05"])
+        self.assertEqual(self.job.status, 'succeeded')
+        self.assertEqual(self.job.days_loaded, 8)
+        self.assertEqual(self.job.progress, 1.0)
+        self.assertEqual(self.job.readings_loaded, 8)
+        self.assertIsNotNone(self.job.finished_at)
+        self.assertEqual(ClimateReading.objects.filter(region=self.region).count(), 8)
+        mock_precompute.delay.assert_called_once_with([self.region.id])
+
+    @patch('main.lib.ingestion.ClimateDataProvider')
+    def test_failed_onboarding_deletes_region(self, mock_provider_class):
+        """Test that a job out of retries fails and deletes its Region"""
+        mock_provider_class.return_value.get_climate_data.side_effect = ConnectionError("API unavailable")
+
+        onboard_region.apply(args=(str(self.job.id),))
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'failed')
+        self.assertEqual(self.job.error, "ConnectionError: API unavailable")
+        self.assertIsNone(self.job.region)
+        self.assertFalse(Region.objects.filter(name="New Region").exists())
+
+    @patch('config.tasks.precompute_analysis')
+    @patch('main.lib.ingestion.ClimateDataProvider')
+    def test_onboarding_retried_after_quota_wait(self, mock_provider_class, mock_precompute):
+        """Test that quota waits are retried after the wait instead of blocking, beyond the retries for errors"""
+        waits = [RateLimitExceeded(3500)] * 4
+        def get_climate_data(**kwargs):
+            if waits:
+                raise waits.pop()
+            return fake_climate_data(**kwargs)
+        mock_provider_class.return_value.get_climate_data.side_effect = get_climate_data
+
+        with patch.object(onboard_region, 'retry', wraps=onboard_region.retry) as mock_retry:
+            onboard_region.apply(args=(str(self.job.id),))
+
+        self.assertEqual([call.kwargs['countdown'] for call in mock_retry.call_args_list], [3500] * 4)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'succeeded')
+        self.assertEqual(self.job.days_loaded, 8)
+
+
+class RegionImportTestCases(TestCase):
+    """Test cases for importing Regions in bulk"""
+
+    def setUp(self):
+        self.existing = Region.objects.create(name="Existing Region", latitude=45.0, longitude=45.0)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_validate_regions(self):
+        """Test that rows are validated against each other and the existing regions"""
+        valid, errors = validate_regions([
+            {'name': "Region A", 'latitude': "10.5", 'longitude': "20.5", 'description': ""},
+            {'name': "Existing Region", 'latitude': 11.0, 'longitude': 21.0},
+            {'name': "Region B", 'latitude': 10.5, 'longitude': 20.5},
+            {'name': "Region C", 'latitude': 95.0, 'longitude': 20.5},
+            {'name': "Region D", 'latitude': 12.0},
+        ])
+
+        self.assertEqual([region['name'] for region in valid], ["Region A"])
+        self.assertEqual(valid[0]['latitude'], 10.5)
+        self.assertEqual([error['row'] for error in errors], [1, 2, 3, 4])
+        self.assertIn('name', errors[0]['errors'])
+        self.assertIn('non_field_errors', errors[1]['errors'])
+        self.assertIn('latitude', errors[2]['errors'])
+        self.assertIn('longitude', errors[3]['errors'])
+
+    @patch('main.management.commands.import_regions.start_ingestion_run')
+    def test_import_regions_csv(self, mock_start_ingestion_run):
+        """Test that imported regions are created and scheduled together in a single fetch window"""
+        mock_start_ingestion_run.return_value.id = 7
+        mock_start_ingestion_run.return_value.chunk_count = 1
+        path = os.path.join(self.directory, "regions.csv")
+        with open(path, "w", newline="") as file:
+            file.write("name,latitude,longitude,description\n")
+            file.write("Region A,10.0,20.0,First\nRegion B,11.0,21.0,\nRegion C,12.0,22.0,Third\n")
+
+        output = StringIO()
+        call_command('import_regions', path, stdout=output)
+
+        self.assertIn("Successfully created 3 regions", output.getvalue())
+        self.assertIn("Started ingestion run 7 with 1 chunks", output.getvalue())
+        self.assertEqual(Region.objects.filter(name__startswith="Region ").count(), 3)
+        windows, end_date = mock_start_ingestion_run.call_args.args
+        self.assertEqual(list(windows), [default_start_date()])
+        self.assertEqual([region.name for region in windows[default_start_date()]], ["Region A", "Region B", "Region C"])
+        self.assertEqual([region.latitude for region in windows[default_start_date()]], [10.0, 11.0, 12.0])
+        self.assertEqual(end_date, date.today() - timedelta(days=1))
+
+    @patch('main.management.commands.import_regions.start_ingestion_run')
+    def test_import_regions_no_fetch(self, mock_start_ingestion_run):
+        """Test that no ingestion run is started with --no-fetch"""
+        path = os.path.join(self.directory, "regions.csv")
+        with open(path, "w", newline="") as file:
+            file.write("name,latitude,longitude\nRegion A,10.0,20.0\n")
+
+        call_command('import_regions', path, '--no-fetch', stdout=StringIO())
+
+        self.assertTrue(Region.objects.filter(name="Region A").exists())
+        mock_start_ingestion_run.assert_not_called()
+
+    def test_import_regions_invalid(self):
+        """Test that nothing is imported when a row is invalid"""
+        path = os.path.join(self.directory, "regions.json")
+        with open(path, "w") as file:
+            json.dump([{'name': "Region A", 'latitude': 10.0, 'longitude': 20.0}, {'name': "Region B", 'latitude': "north"}], file)
+
+        errors = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_regions', path, stdout=StringIO(), stderr=errors)
+
+        self.assertIn("Row 2: latitude", errors.getvalue())
+        self.assertFalse(Region.objects.filter(name="Region A").exists())
+
+
+class PartitionTestCases(TestCase):
+    """Test cases for the yearly partitions of the climate readings table"""
+
+    def test_plan_partitions_creates_coming_years(self):
+        """Test that missing partitions of the current and coming years are created"""
+        create, detach = plan_partitions([2024, 2025, 2026], date(2026, 3, 1), years_ahead=2)
+
+        self.assertEqual(create, [2027, 2028])
+        self.assertEqual(detach, [])
+
+    def test_plan_partitions_detaches_expired_years(self):
+        """Test that partitions older than the retention are detached"""
+        create, detach = plan_partitions(list(range(1990, 2029)), date(2026, 3, 1), years_ahead=2, retention_years=30)
+
+        self.assertEqual(create, [])
+        self.assertEqual(detach, list(range(1990, 1997)))
+
+    def test_maintain_partitions_unpartitioned(self):
+        """Test that nothing is done when the readings table is not partitioned"""
+        self.assertEqual(maintain_partitions(), ([], []))
+
+    def test_remove_climate_data_before(self):
+        """Test that data derived from the readings of detached years no longer counts them"""
+        region = Region.objects.create(name="Retention Region", latitude=45.0, longitude=45.0)
+        columns, _ = climate_data_columns(fake_climate_data([45.0], [45.0], "2000-12-30", "2001-01-02")["45.0,45.0"])
+        load_climate_columns({region.id: columns})
+        watermark = Region.objects.get(pk=region.pk).data_updated_at
+
+        # Detaching the partition of 2000 removes its readings from the table
+        ClimateReading.objects.filter(date__year=2000).delete()
+        self.assertEqual(remove_climate_data_before(2001), [region.id])
+
+        self.assertEqual(list(ClimateMonthlyAggregate.objects.filter(region=region).values_list('year', flat=True)), [2001])
+        index = list(ClimateScoreIndex.objects.filter(region=region).order_by('date'))
+        self.assertEqual([row.date for row in index], [date(2001, 1, 1), date(2001, 1, 2)])
+        self.assertEqual([row.cumulative_days for row in index], [1, 2])
+
+        region.refresh_from_db()
+        self.assertGreater(region.data_updated_at, watermark)
+        self.assertEqual(load_series(region)['date'].tolist(), [date(2001, 1, 1), date(2001, 1, 2)])
+
+
+    @skipUnless(connection.vendor == 'postgresql', "The readings table is only partitioned on PostgreSQL")
+    def test_partitioned_table_keeps_keys(self):
+        """Test that the partitioned readings table kept its unique key, foreign key and id sequence"""
+        self.assertTrue(is_partitioned())
+        self.assertTrue({1950, date.today().year, date.today().year + 2} <= set(partition_years()))
+
+        with connection.cursor() as cursor:
+            # ON CONFLICT needs a unique index on (region_id, date) on the partitioned table itself
+            cursor.execute(
+                "SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND indisunique",
+                [ClimateReading._meta.db_table]
+            )
+            self.assertTrue(any("(region_id, date)" in definition for (definition,) in cursor.fetchall()))
+            cursor.execute(
+                "SELECT confrelid::regclass::text FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                [ClimateReading._meta.db_table]
+            )
+            self.assertEqual([row[0] for row in cursor.fetchall()], [Region._meta.db_table])
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [ClimateReading._meta.db_table])
+            self.assertEqual(cursor.fetchone()[0], f"public.{ClimateReading._meta.db_table}_id_seq")
+
+        region = Region.objects.create(name="Partitioned Region", latitude=45.0, longitude=45.0)
+        first = ClimateReading.objects.create(region=region, date=date(2001, 1, 1), **{field: 1.0 for field in CLIMATE_DATA_FIELDS})
+        second = ClimateReading.objects.create(region=region, date=date(2002, 1, 1), **{field: 1.0 for field in CLIMATE_DATA_FIELDS})
+        self.assertGreater(second.id, first.id)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ClimateReading.objects.create(region=region, date=date(2001, 1, 1), **{field: 1.0 for field in CLIMATE_DATA_FIELDS})
+
+    @skipUnless(connection.vendor == 'postgresql', "The readings table is only partitioned on PostgreSQL")
+    def test_maintain_partitions_detaches_expired_years(self):
+        """Test that expired years are detached with their derived data and their Regions can still be deleted"""
+        region = Region.objects.create(name="Detached Region", latitude=45.0, longitude=45.0)
+        columns, _ = climate_data_columns(fake_climate_data([45.0], [45.0], "1951-12-30", "1952-01-02")["45.0,45.0"])
+        load_climate_columns({region.id: columns})
+
+        today = date.today()
+        with override_settings(CLIMATE_READING_RETENTION_YEARS=today.year - 1951):
+            created, detached = maintain_partitions(today)
+
+        self.assertEqual(created, [])
+        self.assertEqual(detached, [1950, 1951])
+        self.assertNotIn(1951, partition_years())
+        self.assertEqual(list(ClimateReading.objects.filter(region=region).values_list('date', flat=True).order_by('date')), [date(1952, 1, 1), date(1952, 1, 2)])
+        self.assertEqual(ClimateScoreIndex.objects.filter(region=region).order_by('date').first().cumulative_days, 1)
+
+        # The detached table has no foreign key left, so deleting the Region passes the deferred checks
+        region.delete()
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class ClimateIndexBenchmarkTestCases(TestCase):
+    """Test cases for the benchmark_climate_indexes command"""
+
+    @skipIf(connection.vendor == 'postgresql', "The benchmark runs on PostgreSQL")
+    def test_benchmark_requires_postgresql(self):
+        """Test that the indexes are not benchmarked on databases without them"""
+        with self.assertRaises(CommandError):
+            call_command('benchmark_climate_indexes', stdout=StringIO())
+        self.assertFalse(Region.objects.filter(name__startswith="Benchmark region").exists())
+
+
+class BackfillTestCases(TestCase):
+    """Test cases for the backfill_climate management command"""
+
+    def setUp(self):
+        """Set up a region and a provider returning complete data for any request"""
+        self.region = Region.objects.create(name="Backfill Region", latitude=45.0, longitude=45.0)
+        self.provider_patch = patch('main.lib.ingestion.ClimateDataProvider')
+        self.provider = self.provider_patch.start().return_value
+        self.provider.get_climate_data.side_effect = fake_climate_data
+
+    def tearDown(self):
+        self.provider_patch.stop()
+
+    def test_backfill_checkpoints_finished_years(self):
+        """Test that every finished year is loaded and checkpointed, the current year is not"""
+        output = StringIO()
+        call_command('backfill_climate', years=2, workers=1, stdout=output)
+
+        this_year = date.today().year
+        self.assertEqual(
+            sorted(BackfillCheckpoint.objects.values_list('year', flat=True)),
+            [this_year - 2, this_year - 1]
+        )
+        self.assertEqual(BackfillCheckpoint.objects.get(year=this_year - 1).readings_loaded, 366 if calendar.isleap(this_year - 1) else 365)
+        self.assertTrue(ClimateReading.objects.filter(region=self.region, date=date(this_year - 2, 1, 1)).exists())
+        self.assertIn('[3/3]', output.getvalue())
+
+    def test_backfill_updates_region_data_once(self):
+        """Test that the score index and cached series of a Region are updated once, after all its years are loaded"""
+        with patch('main.lib.ingestion.update_region_data', wraps=update_region_data) as mock_update:
+            call_command('backfill_climate', years=2, workers=1, stdout=StringIO())
+
+        this_year = date.today().year
+        mock_update.assert_called_once_with({self.region.id: date(this_year - 2, 1, 1)})
+        index = ClimateScoreIndex.objects.filter(region=self.region).order_by('-date').first()
+        self.assertEqual(index.cumulative_days, ClimateReading.objects.filter(region=self.region).count())
+        self.assertEqual(ClimateMonthlyAggregate.objects.filter(region=self.region, year=this_year - 2).count(), 12)
+
+    def test_backfill_batches_regions_of_a_year(self):
+        """Test that the Regions of a year are fetched together in batched requests"""
+        region2 = Region.objects.create(name="Backfill Region 2", latitude=46.0, longitude=46.0)
+
+        output = StringIO()
+        call_command('backfill_climate', years=1, workers=1, stdout=output)
+
+        this_year = date.today().year
+        requests = self.provider.get_climate_data.call_args_list
+        self.assertEqual([call.kwargs['start_date'] for call in requests], [f"{this_year - 1}-01-01", f"{this_year}-01-01"])
+        for call in requests:
+            self.assertEqual(sorted(call.kwargs['latitude']), [45.0, 46.0])
+        self.assertEqual(BackfillCheckpoint.objects.filter(year=this_year - 1).count(), 2)
+        self.assertIn('4 region-years in 2 batches', output.getvalue())
+
+    def test_backfill_skips_loaded_years(self):
+        """Test that years already holding every day are checkpointed without being fetched again"""
+        this_year = date.today().year
+        list(ingest_regions([self.region], date(this_year - 1, 1, 1), date(this_year - 1, 12, 31)))
+        self.provider.get_climate_data.reset_mock()
+
+        output = StringIO()
+        call_command('backfill_climate', years=1, workers=1, stdout=output)
+
+        requested = [call.kwargs['start_date'] for call in self.provider.get_climate_data.call_args_list]
+        self.assertEqual(requested, [f"{this_year}-01-01"])
+        self.assertTrue(BackfillCheckpoint.objects.filter(region=self.region, year=this_year - 1).exists())
+        self.assertIn('1 already loaded', output.getvalue())
+
+    def test_backfill_resumes_from_checkpoints(self):
+        """Test that checkpointed years are skipped unless restarting"""
+        this_year = date.today().year
+        BackfillCheckpoint.objects.create(region=self.region, year=this_year - 1)
+
+        output = StringIO()
+        call_command('backfill_climate', years=1, workers=1, stdout=output)
+
+        requested = [call.kwargs['start_date'] for call in self.provider.get_climate_data.call_args_list]
+        self.assertNotIn(f"{this_year - 1}-01-01", requested)
+        self.assertIn('1 already checkpointed', output.getvalue())
+
+        call_command('backfill_climate', years=1, workers=1, restart=True, stdout=StringIO())
+        requested = [call.kwargs['start_date'] for call in self.provider.get_climate_data.call_args_list]
+        self.assertIn(f"{this_year - 1}-01-01", requested)
+
+
 class ClimateAnalyzationTestCases(TestCase):
     """Test cases for climate analyzation functions"""
     
@@ -394,6 +1562,9 @@ class ClimateAnalyzationTestCases(TestCase):
                 soil_moisture=0.4
             )
 
+        # Readings were created directly rather than through ingestion, so build the rollups
+        rebuild_climate_aggregates(Region.objects.all())
+
     def test_analyze_seasonal_suitability(self):
         """Test seasonal suitability analysis for southern hemisphere"""
         # Get the best growing months
@@ -488,4 +1659,383 @@ class ClimateAnalyzationTestCases(TestCase):
         
         # Region 1 should have better performance due to our data setup
         self.assertGreater(performance1, performance2, 
-                         "Region with better climate should have higher performance score")
\ No newline at end of file
+                         "Region with better climate should have higher performance score")
+
+    def test_analysis_period_boundary(self):
+        """Test that periods starting part way through a month only count days from the start date"""
+        # Region 1 has exactly one reading per day of the last year
+        total_days = ClimateReading.objects.filter(
+            region=self.region, date__gte=date(date.today().year - 1, date.today().month, date.today().day)
+        ).count()
+        optimal_days = sum(
+            1 for reading in ClimateReading.objects.filter(region=self.region) if reading.evaluate() >= 70
+        )
+
+        viability = analyze_longterm_viability(self.region, time_period=1)
+        self.assertEqual(viability, round(optimal_days / total_days * 100, 2))
+
+    def test_period_totals_arbitrary_range(self):
+        """Test that totals for any date range match the readings in that range"""
+        start_date = date.today() - timedelta(days=100)
+        end_date = date.today() - timedelta(days=40)
+
+        totals = _period_totals(Region.objects.all(), start_date, end_date)
+
+        readings = ClimateReading.objects.filter(region=self.region, date__gte=start_date, date__lte=end_date)
+        scores = [reading.evaluate() for reading in readings]
+        self.assertEqual(totals[self.region.id]['total_days'], len(scores))
+        self.assertEqual(totals[self.region.id]['optimal_days'], sum(1 for score in scores if score >= 70))
+        self.assertAlmostEqual(totals[self.region.id]['total_score'], sum(scores))
+
+        # Region 2 only has readings in the last 20 days
+        self.assertNotIn(self.region2.id, totals)
+
+    def test_batch_analysis_matches_single_region(self):
+        """Test that batch analysis gives the same results as analyzing each region"""
+        empty_region = Region.objects.create(name="Empty Batch Region", latitude=-43.0, longitude=172.0)
+        regions = Region.objects.all()
+
+        seasons = analyze_seasonal_suitability_batch(regions)
+        viability = analyze_longterm_viability_batch(regions, time_period=1)
+        performance = analyze_historical_performance_batch(regions, time_period=1)
+
+        for region in [self.region, self.region2, empty_region]:
+            self.assertEqual(seasons[region.id], analyze_seasonal_suitability(region))
+            self.assertEqual(viability[region.id], analyze_longterm_viability(region, time_period=1))
+            self.assertEqual(performance[region.id], analyze_historical_performance(region, time_period=1))
+
+        self.assertEqual(seasons[empty_region.id], ['December', 'January', 'February'])
+        self.assertEqual(viability[empty_region.id], 0)
+        self.assertEqual(performance[empty_region.id], 0)
+
+    @override_settings(CLIMATE_SERIES_CACHE_DIR='')
+    def test_batch_analysis_query_count(self):
+        """Test that batch analysis uses one query regardless of the number of regions"""
+        regions = Region.objects.all()
+        list(regions)
+
+        with self.assertNumQueries(1):
+            analyze_seasonal_suitability_batch(regions)
+        with self.assertNumQueries(2):
+            analyze_longterm_viability_batch(regions)
+        with self.assertNumQueries(2):
+            analyze_historical_performance_batch(regions)
+
+
+    def test_precompute_analysis(self):
+        """Test that the precompute task stores the analysis results of each region"""
+        result = precompute_analysis([self.region.id])
+
+        self.assertEqual(result, "Precomputed analysis for 1 regions")
+        snapshot = AnalysisSnapshot.objects.get(region=self.region)
+        self.assertEqual(snapshot.best_growing_season, analyze_seasonal_suitability(self.region))
+        self.assertEqual(snapshot.longterm_viability, analyze_longterm_viability(self.region))
+        self.assertEqual(snapshot.avg_historical_performance, analyze_historical_performance(self.region))
+        self.assertFalse(AnalysisSnapshot.objects.filter(region=self.region2).exists())
+
+        # Recomputing updates the existing snapshot
+        precompute_analysis()
+        self.assertEqual(AnalysisSnapshot.objects.count(), 2)
+
+    def test_fresh_snapshot(self):
+        """Test when snapshots are considered stale"""
+        self.assertIsNone(fresh_snapshot(self.region))
+
+        compute_snapshots(Region.objects.filter(pk=self.region.pk))
+        region = Region.objects.select_related('analysis_snapshot').get(pk=self.region.pk)
+        self.assertIsNotNone(fresh_snapshot(region))
+
+        # Computed on an earlier day
+        AnalysisSnapshot.objects.filter(region=region).update(computed_at=timezone.now() - timedelta(days=1))
+        region = Region.objects.select_related('analysis_snapshot').get(pk=self.region.pk)
+        self.assertIsNone(fresh_snapshot(region))
+
+        # Data loaded after it was computed
+        AnalysisSnapshot.objects.filter(region=region).update(computed_at=timezone.now())
+        Region.objects.filter(pk=region.pk).update(data_updated_at=timezone.now() + timedelta(minutes=1))
+        region = Region.objects.select_related('analysis_snapshot').get(pk=self.region.pk)
+        self.assertIsNone(fresh_snapshot(region))
+
+
+class ClimateScoringTestCases(TestCase):
+    """Test cases for the vectorized climate scoring functions"""
+
+    def setUp(self):
+        """Build a grid of values covering every bin boundary of evaluate()"""
+        temperatures = [-5.0, 19.9, 20.0, 24.9, 25.0, 32.0, 32.1, 35.0, 35.1, np.nan]
+        humidities = [10.0, 20.0, 29.9, 30.0, 39.9, 40.0, 60.0, 60.1, 70.0, 70.1, 80.0, 80.1]
+        rains = [-1.0, 0.0, 0.1, 5.0, 5.1, 15.0, 15.1]
+        clouds = [0.0, 37.5, 100.0]
+
+        grid = np.array(np.meshgrid(temperatures, humidities, rains, clouds)).reshape(4, -1)
+        self.max_temperature, self.mean_humidity, self.rain, self.cloud_cover = grid
+
+    def test_evaluate_batch_matches_evaluate(self):
+        """Test that batch scores are identical to scoring each reading individually"""
+        scores = evaluate_batch(self.max_temperature, self.mean_humidity, self.rain, self.cloud_cover)
+
+        expected = [
+            ClimateReading(max_temperature=t, mean_humidity=h, rain=r, cloud_cover=c).evaluate()
+            for t, h, r, c in zip(self.max_temperature, self.mean_humidity, self.rain, self.cloud_cover)
+        ]
+
+        self.assertEqual(len(scores), len(expected))
+        for score, expected_score in zip(scores, expected):
+            self.assertEqual(score, expected_score)
+
+    def test_evaluate_frame(self):
+        """Test scoring a DataFrame of readings"""
+        df = pd.DataFrame({
+            'max_temperature': [30.0, 15.0],
+            'mean_humidity': [50.0, 85.0],
+            'rain': [3.0, 25.0],
+            'cloud_cover': [15.0, 90.0],
+        })
+
+        scores = evaluate_frame(df)
+
+        self.assertEqual(scores.tolist(), [96.25, 35.0])
+
+    def test_evaluate_batch_empty(self):
+        """Test scoring with no readings"""
+        scores = evaluate_batch([], [], [], [])
+        self.assertEqual(len(scores), 0)
+
+    def test_score_expression_matches_evaluate(self):
+        """Test that scoring in the database gives the same numbers as evaluate()"""
+        region = Region.objects.create(name="Scoring Region", latitude=10.0, longitude=10.0)
+
+        # NaN values cannot be stored consistently across databases, so leave them out here
+        valid = ~np.isnan(self.max_temperature)
+        start = date(2000, 1, 1)
+        ClimateReading.objects.bulk_create([
+            ClimateReading(
+                region=region,
+                date=start + timedelta(days=i),
+                mean_temperature=0.0,
+                max_temperature=t,
+                min_temperature=0.0,
+                mean_humidity=h,
+                max_humidity=0.0,
+                min_humidity=0.0,
+                rain=r,
+                cloud_cover=c,
+                soil_moisture=0.0
+            )
+            for i, (t, h, r, c) in enumerate(zip(
+                self.max_temperature[valid], self.mean_humidity[valid], self.rain[valid], self.cloud_cover[valid]
+            ))
+        ])
+
+        readings = ClimateReading.objects.filter(region=region).annotate(score_value=score_expression())
+        for reading in readings:
+            self.assertEqual(reading.score_value, reading.evaluate())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AnalysisCacheTestCases(TestCase):
+    """Test cases for the analysis result cache"""
+
+    def setUp(self):
+        """Create a region with data loaded through ingestion, and one without"""
+        cache.clear()
+
+        self.region = Region.objects.create(name="Cached Region", latitude=-35.0, longitude=138.0)
+        self.unloaded_region = Region.objects.create(name="Unloaded Region", latitude=-36.0, longitude=139.0)
+        self.load_reading(date.today() - timedelta(days=2))
+
+        self.compute = MagicMock(side_effect=lambda regions, **params: {region.id: region.name for region in regions})
+
+    def load_reading(self, reading_date):
+        """Load a reading for the cached region through ingestion"""
+        load_readings([ClimateReading(
+            region=self.region,
+            date=reading_date,
+            mean_temperature=25.0,
+            max_temperature=30.0,
+            min_temperature=20.0,
+            mean_humidity=50.0,
+            max_humidity=60.0,
+            min_humidity=40.0,
+            rain=2.0,
+            cloud_cover=20.0,
+            soil_moisture=0.25
+        )])
+
+    def computed_region_ids(self):
+        """Region ids passed to the analysis function in its last call"""
+        return {region.id for region in self.compute.call_args[0][0]}
+
+    def test_results_are_cached(self):
+        """Test that only regions without a cached result are computed"""
+        results = cached_analysis('test', Region.objects.all(), self.compute, time_period=5)
+        self.assertEqual(results, {self.region.id: "Cached Region", self.unloaded_region.id: "Unloaded Region"})
+        self.assertEqual(self.compute.call_args[1], {'time_period': 5})
+
+        results = cached_analysis('test', Region.objects.all(), self.compute, time_period=5)
+        self.assertEqual(results, {self.region.id: "Cached Region", self.unloaded_region.id: "Unloaded Region"})
+
+        # Regions without a watermark are never cached
+        self.assertEqual(self.compute.call_count, 2)
+        self.assertEqual(self.computed_region_ids(), {self.unloaded_region.id})
+
+    def test_parameters_are_part_of_key(self):
+        """Test that results with different parameters are cached separately"""
+        regions = Region.objects.filter(pk=self.region.pk)
+        cached_analysis('test', regions, self.compute, time_period=5)
+        cached_analysis('test', regions, self.compute, time_period=10)
+        cached_analysis('other', regions, self.compute, time_period=5)
+
+        self.assertEqual(self.compute.call_count, 3)
+
+    def test_ingestion_invalidates_results(self):
+        """Test that loading new readings bumps the watermark so results are recomputed"""
+        cached_analysis('test', Region.objects.filter(pk=self.region.pk), self.compute)
+        self.load_reading(date.today() - timedelta(days=1))
+        cached_analysis('test', Region.objects.filter(pk=self.region.pk), self.compute)
+
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_cache_unavailable(self):
+        """Test that results are computed live when the cache backend is down"""
+        down = RedisConnectionError("Connection refused")
+        with patch.object(cache, 'get_many', side_effect=down), patch.object(cache, 'set_many', side_effect=down), \
+                patch.object(cache, 'add', side_effect=down):
+            with self.assertLogs('main.lib.analysis_cache', level='WARNING'):
+                results = cached_analysis('test', Region.objects.all(), self.compute)
+
+        self.assertEqual(results, {self.region.id: "Cached Region", self.unloaded_region.id: "Unloaded Region"})
+        self.assertEqual(self.computed_region_ids(), {self.region.id, self.unloaded_region.id})
+
+    def test_stats(self):
+        """Test hit and miss counters"""
+        regions = Region.objects.all()
+        cached_analysis('test', regions, self.compute)
+        cached_analysis('test', regions, self.compute)
+
+        self.assertEqual(analysis_cache_stats(), {'hits': 1, 'misses': 3, 'hit_rate': 25.0})
+
+        reset_analysis_cache_stats()
+        self.assertEqual(analysis_cache_stats(), {'hits': 0, 'misses': 0, 'hit_rate': 0})
+
+
+class SeriesCacheTestCases(TestCase):
+    """Test cases for the memory-mapped climate series cache"""
+
+    def setUp(self):
+        """Use a temporary cache directory and load some readings"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(CLIMATE_SERIES_CACHE_DIR=self.cache_dir)
+        self.settings_override.enable()
+
+        self.region = Region.objects.create(name="Series Region", latitude=-35.0, longitude=138.0)
+        self.start = date.today() - timedelta(days=60)
+        load_readings([self.reading(self.start + timedelta(days=i)) for i in range(40)])
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_dir)
+
+    def reading(self, reading_date):
+        """Build a reading whose cloud cover varies with the day of the month"""
+        return ClimateReading(
+            region=self.region,
+            date=reading_date,
+            mean_temperature=25.0,
+            max_temperature=30.0,
+            min_temperature=20.0,
+            mean_humidity=50.0,
+            max_humidity=60.0,
+            min_humidity=40.0,
+            rain=2.0,
+            cloud_cover=float(reading_date.day * 3),
+            soil_moisture=0.25
+        )
+
+    def test_series_written_on_ingestion(self):
+        """Test that loading readings writes the region's series"""
+        series = load_series(Region.objects.get(pk=self.region.pk))
+
+        self.assertEqual(len(series['date']), 40)
+        self.assertEqual(series['date'][0], np.datetime64(self.start, 'D'))
+        self.assertEqual(series['cloud_cover'].dtype, np.float32)
+        self.assertFalse(series['cloud_cover'].flags.writeable)
+
+    def test_series_appended_and_rebuilt(self):
+        """Test that newer days are appended and older days cause a rebuild"""
+        load_readings([self.reading(self.start + timedelta(days=45))])
+        load_readings([self.reading(self.start - timedelta(days=5))])
+
+        series = load_series(Region.objects.get(pk=self.region.pk))
+        dates = list(ClimateReading.objects.filter(region=self.region).order_by('date').values_list('date', flat=True))
+        self.assertEqual(series['date'].tolist(), dates)
+
+        # Only the current version of the files is kept
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_dir, str(self.region.id)))), 2)
+
+    def test_series_of_other_data_rebuilt(self):
+        """Test that new days are not appended to a version left behind by other data under the same region id"""
+        # Same region id, but the readings the version was built from are gone, as after a database reset
+        ClimateReading.objects.filter(region=self.region).delete()
+        Region.objects.filter(pk=self.region.pk).update(data_updated_at=None)
+        load_readings([self.reading(self.start + timedelta(days=45 + i)) for i in range(5)])
+
+        series = load_series(Region.objects.get(pk=self.region.pk))
+        self.assertEqual(series['date'].tolist(), [self.start + timedelta(days=45 + i) for i in range(5)])
+
+    def test_series_deleted_with_region(self):
+        """Test that deleting a region removes its cached series"""
+        region_dir = os.path.join(self.cache_dir, str(self.region.id))
+        self.assertTrue(os.path.isdir(region_dir))
+
+        self.region.delete()
+
+        self.assertFalse(os.path.exists(region_dir))
+
+    def test_stale_series_not_used(self):
+        """Test that a series older than the region's data watermark is ignored"""
+        Region.objects.filter(pk=self.region.pk).update(data_updated_at=timezone.now() + timedelta(minutes=1))
+        self.assertIsNone(load_series(Region.objects.get(pk=self.region.pk)))
+
+    def test_analysis_from_series_matches_database(self):
+        """Test that analyzing from the series gives the same results as the database"""
+        regions = Region.objects.all()
+        # Regions, then the score index rows before and at the end of each period, the series are not scored for them
+        with self.assertNumQueries(5):
+            from_series = (
+                analyze_seasonal_suitability_batch(regions),
+                analyze_longterm_viability_batch(regions, time_period=1),
+                analyze_historical_performance_batch(regions, time_period=1),
+            )
+
+        with override_settings(CLIMATE_SERIES_CACHE_DIR=''):
+            regions = Region.objects.all()
+            from_database = (
+                analyze_seasonal_suitability_batch(regions),
+                analyze_longterm_viability_batch(regions, time_period=1),
+                analyze_historical_performance_batch(regions, time_period=1),
+            )
+
+        self.assertEqual(from_series, from_database)
+
+    def test_summary_matches_separate_analyses(self):
+        """Test that the summary gives the same results as the separate analyses, from the series and the database"""
+        regions = Region.objects.all()
+        expected = {
+            'best_growing_season': analyze_seasonal_suitability_batch(regions)[self.region.id],
+            'longterm_viability': analyze_longterm_viability_batch(regions)[self.region.id],
+            'avg_historical_performance': analyze_historical_performance_batch(regions)[self.region.id],
+        }
+
+        # Regions, latest score index rows and the score index rows before each period
+        with self.assertNumQueries(4):
+            self.assertEqual(analyze_summary_batch(Region.objects.all())[self.region.id], expected)
+
+        with override_settings(CLIMATE_SERIES_CACHE_DIR=''):
+            # Regions, monthly rollups, latest score index rows and the score index rows before each period
+            with self.assertNumQueries(5):
+                self.assertEqual(analyze_summary_batch(Region.objects.all())[self.region.id], expected)
+            self.assertEqual(
+                analyze_summary_batch(Region.objects.all(), ['longterm_viability'])[self.region.id],
+                {'longterm_viability': expected['longterm_viability']}
+            )
@@ -1,11 +1,18 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from main.models import Region, ClimateReading
-from django.db import IntegrityError
-from api.region.views import RegionView
+from django.db import IntegrityError, connection
+from api.region.views import RegionView, RegionBulkImportView
+from api.analysis.views import WineRegionSeasonAnalysisView, WineRegionViabilityAnalysisView, WineRegionPerformanceComparisonView, WineRegionSummaryView
+from datetime import date, timedelta
+from main.lib.climate_data_functions import rebuild_climate_aggregates
+from main.lib.analysis_snapshots import compute_snapshots
+from main.models import AnalysisSnapshot, OnboardingJob
+from django.utils import timezone
 from rest_framework.test import APIRequestFactory
 from django.urls import reverse
 from rest_framework import status
 from unittest.mock import patch
+from kombu.exceptions import OperationalError
 
 class RegionViewsTestCases(TestCase):
     def setUp(self):
@@ -54,28 +61,78 @@ class RegionViewsTestCases(TestCase):
         with self.assertRaises(Region.DoesNotExist):
             self.view(request)
     
-    @patch('api.region.views.ClimateDataProvider')
-    @patch('api.region.views.process_climate_data')
-    @patch('api.region.views.create_climate_readings')
-    def test_post_region_success(self, mock_create_readings, mock_process_data, mock_provider_class):
-        """Test successful creation of a region with mocked climate data processing"""
-        # Setup mocks
-        mock_provider = mock_provider_class.return_value
-        mock_provider.get_climate_data.return_value = {f"{self.new_region_data['latitude']},{self.new_region_data['longitude']}": []}
-        mock_process_data.return_value = []
-        
-        # Make request
+    @patch('api.region.views.onboard_region')
+    def test_post_region_success(self, mock_onboard_region):
+        """Test that a region is created and its climate data is loaded in the background"""
         request = self.factory.post('/api/region/', self.new_region_data, format='json')
-        response = self.view(request)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.view(request)
         
         # Verify response and database state
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(callbacks), 1)
+        region = Region.objects.get(name=self.new_region_data['name'])
+        job = OnboardingJob.objects.get(region=region)
+        self.assertEqual(response.data['job_id'], str(job.id))
+        self.assertEqual(response.data['status_url'], f"/api/region/jobs/{job.id}/")
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual(job.end_date, date.today() - timedelta(days=1))
+        
+        # Verify the job was queued
+        mock_onboard_region.delay.assert_called_once_with(str(job.id))
+    
+    @patch('api.region.views.start_ingestion_run')
+    def test_bulk_import_regions(self, mock_start_ingestion_run):
+        """Test that valid regions are created together and their climate data is scheduled"""
+        mock_start_ingestion_run.return_value.id = 7
+        regions = [{"name": f"Bulk Region {i}", "latitude": 10.0 + i, "longitude": 20.0} for i in range(3)]
+        
+        request = self.factory.post('/api/region/bulk/', {"regions": regions}, format='json')
+        response = RegionBulkImportView.as_view()(request)
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data, {"created": 3, "ingestion_run_id": 7})
+        windows = mock_start_ingestion_run.call_args.args[0]
+        self.assertEqual([region.name for region in list(windows.values())[0]], [region["name"] for region in regions])
+    
+    def test_bulk_import_invalid_regions(self):
+        """Test that no region is created when one of them is invalid"""
+        regions = [
+            {"name": "Bulk Region", "latitude": 10.0, "longitude": 20.0},
+            {"name": self.test_region.name, "latitude": 11.0, "longitude": 20.0},
+        ]
+        
+        request = self.factory.post('/api/region/bulk/', regions, format='json')
+        response = RegionBulkImportView.as_view()(request)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], "1 of 2 regions are invalid.")
+        self.assertEqual(response.data['errors'][0]['row'], 1)
+        self.assertFalse(Region.objects.filter(name="Bulk Region").exists())
+    
+    def test_onboarding_job_status(self):
+        """Test the status endpoint reports the progress of a job"""
+        job = OnboardingJob.objects.create(
+            region=self.test_region, region_name=self.test_region.name, status='running',
+            start_date=date(2020, 1, 1), end_date=date(2020, 1, 10), days_loaded=4, readings_loaded=4
+        )
+        
+        response = self.client.get(f'/api/region/jobs/{job.id}/')
+        
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(Region.objects.filter(name=self.new_region_data['name']).exists())
+        self.assertEqual(response.data['job_id'], str(job.id))
+        self.assertEqual(response.data['region'], self.test_region.name)
+        self.assertEqual(response.data['status'], 'running')
+        self.assertEqual(response.data['days_total'], 10)
+        self.assertEqual(response.data['progress'], 0.4)
+        self.assertIsNone(response.data['error'])
+    
+    def test_onboarding_job_not_found(self):
+        """Test error when the job doesn't exist"""
+        response = self.client.get('/api/region/jobs/00000000-0000-0000-0000-000000000000/')
         
-        # Verify mocks were called
-        mock_provider.get_climate_data.assert_called_once()
-        mock_process_data.assert_called_once()
-        mock_create_readings.assert_called_once()
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['message'], "Job with this id does not exist.")
     
     def test_post_region_missing_fields(self):
         """Test error when required fields are missing"""
@@ -123,3 +180,187 @@ class RegionViewsTestCases(TestCase):
         
         self.assertEqual(response.status_code, 404)
         self.assertEqual(response.data['message'], "Region with this name does not exist.")
+
+
+class RegionOnboardingQueueTestCases(TransactionTestCase):
+    """Test cases for queueing the onboarding of new Regions, once their creation is committed"""
+
+    @patch('api.region.views.onboard_region')
+    def test_post_region_queue_unavailable(self, mock_onboard_region):
+        """Test that the region is removed and its job failed when the job cannot be queued"""
+        mock_onboard_region.delay.side_effect = OperationalError("Error 111 connecting to redis:6379. Connection refused.")
+        request = APIRequestFactory().post('/api/region/', {"name": "Queued Region", "latitude": 50.0, "longitude": 50.0}, format='json')
+        response = RegionView.as_view()(request)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Region.objects.filter(name="Queued Region").exists())
+        job = OnboardingJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNone(job.region)
+        self.assertIn("OperationalError", job.error)
+
+    @patch('api.region.views.onboard_region')
+    def test_post_region_queued_after_commit(self, mock_onboard_region):
+        """Test that the job is queued once the Region and job are committed, so the worker can read them"""
+        def delay(job_id):
+            self.assertFalse(connection.in_atomic_block)
+            self.assertTrue(OnboardingJob.objects.filter(pk=job_id, region__name="Queued Region").exists())
+        mock_onboard_region.delay.side_effect = delay
+        request = APIRequestFactory().post('/api/region/', {"name": "Queued Region", "latitude": 50.0, "longitude": 50.0}, format='json')
+        response = RegionView.as_view()(request)
+
+        self.assertEqual(response.status_code, 202)
+        mock_onboard_region.delay.assert_called_once_with(response.data['job_id'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AnalysisViewsTestCases(TestCase):
+    def setUp(self):
+        """Set up test regions with a recent history of readings"""
+        self.factory = APIRequestFactory()
+
+        self.good_region = Region.objects.create(name="Good Region", latitude=-35.0, longitude=138.0)
+        self.poor_region = Region.objects.create(name="Poor Region", latitude=-36.0, longitude=139.0)
+
+        for i in range(1, 31):
+            reading_date = date.today() - timedelta(days=i)
+            ClimateReading.objects.create(
+                region=self.good_region,
+                date=reading_date,
+                mean_temperature=25.0,
+                max_temperature=30.0,
+                min_temperature=20.0,
+                mean_humidity=50.0,
+                max_humidity=60.0,
+                min_humidity=40.0,
+                rain=2.0,
+                cloud_cover=20.0,
+                soil_moisture=0.25
+            )
+            ClimateReading.objects.create(
+                region=self.poor_region,
+                date=reading_date,
+                mean_temperature=10.0,
+                max_temperature=15.0,
+                min_temperature=5.0,
+                mean_humidity=85.0,
+                max_humidity=90.0,
+                min_humidity=80.0,
+                rain=25.0,
+                cloud_cover=90.0,
+                soil_moisture=0.5
+            )
+
+        rebuild_climate_aggregates(Region.objects.all())
+
+    def test_season_analysis(self):
+        """Test seasonal analysis for all regions"""
+        request = self.factory.get('/api/analysis/season')
+        response = WineRegionSeasonAnalysisView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        for result in response.data:
+            self.assertEqual(len(result['best_growing_season']), 3)
+
+    def test_viability_analysis_filtered(self):
+        """Test viability analysis for a single requested region"""
+        request = self.factory.get('/api/analysis/viability', {'region': self.good_region.name})
+        response = WineRegionViabilityAnalysisView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{"name": "Good Region", "longterm_viability": 100.0}])
+
+    def test_performance_comparison(self):
+        """Test performance comparison orders regions from best to worst"""
+        request = self.factory.get('/api/analysis/compare_performance')
+        response = WineRegionPerformanceComparisonView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['name'] for result in response.data], ["Good Region", "Poor Region"])
+        self.assertEqual(response.data[0]['avg_historical_performance'], 95.0)
+        self.assertEqual(response.data[1]['avg_historical_performance'], 35.0)
+
+    def test_analysis_query_count(self):
+        """Test that analyzing all regions does not issue queries per region"""
+        Region.objects.create(name="Third Region", latitude=-37.0, longitude=140.0)
+
+        # One query for the regions and their snapshots, one for the regions without a fresh snapshot,
+        # one for the regions missing from the cache, then a fixed number of grouped queries for the analysis
+        for view, queries in [
+            (WineRegionSeasonAnalysisView, 4),
+            (WineRegionViabilityAnalysisView, 5),
+            (WineRegionPerformanceComparisonView, 5)
+        ]:
+            request = self.factory.get('/api/analysis/')
+            with self.assertNumQueries(queries):
+                view.as_view()(request)
+
+    def test_analysis_served_from_snapshot(self):
+        """Test that fresh snapshots are served instead of computing results"""
+        compute_snapshots(Region.objects.all())
+        AnalysisSnapshot.objects.filter(region=self.good_region).update(longterm_viability=42.0)
+
+        request = self.factory.get('/api/analysis/viability')
+        with self.assertNumQueries(1):
+            response = WineRegionViabilityAnalysisView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn({"name": "Good Region", "longterm_viability": 42.0}, response.data)
+        self.assertIn({"name": "Poor Region", "longterm_viability": 0.0}, response.data)
+
+    def test_analysis_stale_snapshot_falls_back(self):
+        """Test that snapshots computed before new data was loaded are not served"""
+        compute_snapshots(Region.objects.all())
+        AnalysisSnapshot.objects.filter(region=self.good_region).update(longterm_viability=42.0)
+        Region.objects.filter(pk=self.good_region.pk).update(data_updated_at=timezone.now() + timedelta(minutes=1))
+
+        request = self.factory.get('/api/analysis/viability', {'region': self.good_region.name})
+        response = WineRegionViabilityAnalysisView.as_view()(request)
+
+        self.assertEqual(response.data, [{"name": "Good Region", "longterm_viability": 100.0}])
+
+    def test_summary_analysis(self):
+        """Test that the summary returns all metrics of each region"""
+        request = self.factory.get('/api/analysis/summary', {'region': self.good_region.name})
+        response = WineRegionSummaryView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['longterm_viability'], 100.0)
+        self.assertEqual(response.data[0]['avg_historical_performance'], 95.0)
+        self.assertEqual(len(response.data[0]['best_growing_season']), 3)
+
+    def test_summary_fields(self):
+        """Test that only the requested fields are returned, comma separated or repeated"""
+        for params in ['fields=avg_historical_performance,longterm_viability', 'fields=longterm_viability&fields=avg_historical_performance']:
+            request = self.factory.get(f'/api/analysis/summary?region=Poor%20Region&{params}')
+            response = WineRegionSummaryView.as_view()(request)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, [{"name": "Poor Region", "longterm_viability": 0.0, "avg_historical_performance": 35.0}])
+
+    def test_summary_invalid_fields(self):
+        """Test error when unknown fields are requested"""
+        request = self.factory.get('/api/analysis/summary', {'fields': 'longterm_viability,rainfall'})
+        response = WineRegionSummaryView.as_view()(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("rainfall", response.data['message'])
+
+    def test_summary_served_from_snapshot(self):
+        """Test that the summary is served from fresh snapshots"""
+        compute_snapshots(Region.objects.all())
+
+        request = self.factory.get('/api/analysis/summary', {'fields': 'longterm_viability'})
+        with self.assertNumQueries(1):
+            response = WineRegionSummaryView.as_view()(request)
+
+        self.assertIn({"name": "Good Region", "longterm_viability": 100.0}, response.data)
+
+    def test_analysis_no_regions_found(self):
+        """Test error when none of the requested regions exist"""
+        request = self.factory.get('/api/analysis/season', {'region': 'Non-existent Region'})
+        response = WineRegionSeasonAnalysisView.as_view()(request)
+
+        self.assertEqual(response.status_code, 404)